@@ -0,0 +1,7 @@
+"""Benchmarks of the UGRID checks on synthetic meshes.
+
+Not part of the installed package; run from a checkout with::
+
+    $ python -m benchmarks.run --sizes 1e3 1e5 1e6 --output bench.json
+
+"""
@@ -0,0 +1,200 @@
+r"""Time the UGRID checks on synthetic meshes of increasing size.
+
+For every mesh kind and size, a file is generated with
+``benchmarks.synthetic.write_mesh``, then ``UgridChecker.setup`` and each
+``_check*`` method are timed individually and their peak memory recorded with
+``tracemalloc`` (numpy reports its allocations to it). The records are written
+as JSON and/or CSV so that runs can be compared.
+
+Example::
+
+    $ python -m benchmarks.run --sizes 1e3 1e4 1e5 --kinds triangles mixed \\
+        --nonstd --derived --output bench.json --csv bench.csv
+
+"""
+
+import argparse
+import csv
+import json
+import platform
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+from netCDF4 import Dataset
+
+from benchmarks.synthetic import KINDS, write_mesh
+from cc_plugin_ugrid import __version__
+from cc_plugin_ugrid.checker import UgridChecker
+
+FIELDS = (
+    "kind",
+    "size",
+    "nonstd",
+    "elements",
+    "mesh",
+    "step",
+    "seconds",
+    "peak_bytes",
+    "score",
+    "out_of",
+    "error",
+)
+
+
+def _measure(func, *args):
+    """Call a function, returning (result, error, seconds, peak_bytes)."""
+    tracemalloc.reset_peak()
+    start = time.perf_counter()
+    result, error = None, None
+    try:
+        result = func(*args)
+    except Exception as err:  # noqa: BLE001
+        error = f"{type(err).__name__}: {err}"
+    seconds = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    return result, error, seconds, peak
+
+
+def bench_file(path, options=None):
+    """Time ``setup`` and each check of a UGRID file.
+
+    The checks are called directly, bypassing the results cached by
+    ``check_run``, so each one is timed on its own. Checks whose inputs are
+    missing from the mesh are not run.
+
+    :param str path   : path of the netCDF file
+    :param set options: checker options, e.g. {"validate_data"}
+
+    :returns list of dict: one record per step, see ``FIELDS``
+    """
+    records = []
+    tracemalloc.start()
+    try:
+        with Dataset(path) as ds:
+            checker = UgridChecker(options=options)
+            _, error, seconds, peak = _measure(checker.setup, ds)
+            records.append({"mesh": "", "step": "setup", "seconds": seconds, "peak_bytes": peak, "error": error})
+            if error is not None:
+                return records
+            for mesh in checker.meshes:
+                for name, check in checker.yield_checks(mesh):
+                    result, error, seconds, peak = _measure(check, mesh)
+                    score, out_of = result.value if result is not None else (None, None)
+                    records.append(
+                        {
+                            "mesh": mesh.name,
+                            "step": name,
+                            "seconds": seconds,
+                            "peak_bytes": peak,
+                            "score": score,
+                            "out_of": out_of,
+                            "error": error,
+                        },
+                    )
+    finally:
+        tracemalloc.stop()
+    return records
+
+
+def run(sizes, kinds=KINDS, *, nonstd=False, derived=False, options=None, workdir=None, keep=False):  # noqa: PLR0913
+    """Generate the synthetic meshes and benchmark them.
+
+    :param iterable sizes: number of elements of the meshes
+    :param iterable kinds: mesh kinds, see ``benchmarks.synthetic.KINDS``
+    :param bool nonstd   : also benchmark non-standard dimension order
+    :param bool derived  : add the derived connectivities to 2D meshes
+    :param set options   : checker options, e.g. {"validate_data"}
+    :param str workdir   : directory for the generated files (default: a
+                           temporary directory)
+    :param bool keep     : keep the generated files
+
+    :returns list of dict: the records of all runs, see ``FIELDS``
+    """
+    records = []
+    with tempfile.TemporaryDirectory(dir=workdir) as tmp:
+        for kind in kinds:
+            for size in sizes:
+                for order in (False, True) if nonstd else (False,):
+                    name = f"{kind}_{size}{'_nonstd' if order else ''}.nc"
+                    path = Path(workdir if keep and workdir else tmp) / name
+                    start = time.perf_counter()
+                    elements = write_mesh(path, kind, size, nonstd=order, derived=derived)
+                    run_info = {"kind": kind, "size": size, "nonstd": order, "elements": elements}
+                    records.append({**run_info, "mesh": "", "step": "generate", "seconds": time.perf_counter() - start})
+                    records.extend({**run_info, **r} for r in bench_file(path, options))
+                    if not keep:
+                        path.unlink()
+    return [{field: record.get(field) for field in FIELDS} for record in records]
+
+
+def write_json(records, path, options=None):
+    """Write the records and the environment they were measured in as JSON."""
+    report = {
+        "version": __version__,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "options": sorted(options or ()),
+        "records": records,
+    }
+    Path(path).write_text(json.dumps(report, indent=2) + "\n")
+
+
+def write_csv(records, path):
+    """Write the records as CSV, one row per step."""
+    with Path(path).open("w", newline="") as fp:
+        writer = csv.DictWriter(fp, fieldnames=FIELDS)
+        writer.writeheader()
+        writer.writerows(records)
+
+
+def main(argv=None):
+    """Command line entry point of the benchmarks."""
+    parser = argparse.ArgumentParser(description="Benchmark the UGRID checks on synthetic meshes.")
+    parser.add_argument(
+        "--sizes",
+        nargs="+",
+        type=lambda s: int(float(s)),
+        default=[10**3, 10**4, 10**5],
+        help="number of elements, e.g. 1e3 1e6 (default: 1e3 1e4 1e5)",
+    )
+    parser.add_argument("--kinds", nargs="+", choices=KINDS, default=list(KINDS))
+    parser.add_argument("--nonstd", action="store_true", help="also use non-standard dimension order")
+    parser.add_argument(
+        "--derived",
+        action="store_true",
+        help="add edge and face adjacencies to 2D meshes (derived in memory)",
+    )
+    parser.add_argument(
+        "-O",
+        "--option",
+        action="append",
+        default=None,
+        help="checker option; may be repeated (default: validate_data)",
+    )
+    parser.add_argument("--workdir", help="directory for the generated files")
+    parser.add_argument("--keep", action="store_true", help="keep the generated files in --workdir")
+    parser.add_argument("--output", help="JSON report")
+    parser.add_argument("--csv", help="CSV report")
+    args = parser.parse_args(argv)
+
+    options = set(args.option) if args.option is not None else {"validate_data"}
+    records = run(args.sizes, args.kinds, nonstd=args.nonstd, derived=args.derived, options=options, workdir=args.workdir, keep=args.keep)
+
+    if args.output:
+        write_json(records, args.output, options)
+    if args.csv:
+        write_csv(records, args.csv)
+    for r in records:
+        status = r["error"] or ("" if r["score"] is None else f"{r['score']}/{r['out_of']}")
+        print(  # noqa: T201
+            f"{r['kind']:>10} {r['size']:>10} {'nonstd' if r['nonstd'] else 'std':>6} {r['step']:<28}"
+            f" {r['seconds']:9.4f}s {(r['peak_bytes'] or 0) / 2**20:9.1f} MiB {status}",
+        )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,257 @@
+"""Synthetic UGRID mesh generator.
+
+Writes 1D, 2D and 3D UGRID files of any size built on a regular grid. The
+arrays are generated and written in blocks, so files with up to 10^8
+elements can be written in bounded memory.
+
+Kinds of mesh:
+    line      : 1D network, ``size`` edges
+    triangles : 2D mesh of ``size`` triangles (approximately)
+    mixed     : 2D mesh of quads and triangles padded with ``_FillValue``
+    hexahedra : 3D mesh of ``size`` hexahedral volumes (approximately)
+"""
+
+import math
+
+import numpy as np
+from netCDF4 import Dataset
+
+from cc_plugin_ugrid import connectivity
+from cc_plugin_ugrid.topology import MeshEdges
+
+KINDS = ("line", "triangles", "mixed", "hexahedra")
+FILL = -1
+BLOCK_SIZE = 2**20  # number of elements generated per block
+
+
+def _grid(size, ndim):
+    """Return the number of cells along each axis of a grid of about ``size`` cells."""
+    n = max(1, math.ceil(size ** (1 / ndim)))
+    return (n,) * ndim
+
+
+def _node_ids(i, j, ncx, k=None, ncy=None):
+    """Return the node index of grid corners (i, j[, k])."""
+    ids = j * (ncx + 1) + i
+    if k is not None:
+        ids = ids + k * (ncx + 1) * (ncy + 1)
+    return ids
+
+
+def _triangles(j0, j1, ncx):
+    """Two anticlockwise triangles per cell for cell rows j0 to j1."""
+    j, i = np.divmod(np.arange(j0 * ncx, j1 * ncx), ncx)
+    n00, n10 = _node_ids(i, j, ncx), _node_ids(i + 1, j, ncx)
+    n01, n11 = _node_ids(i, j + 1, ncx), _node_ids(i + 1, j + 1, ncx)
+    tri = np.empty((len(i), 2, 3), dtype=np.int32)
+    tri[:, 0] = np.stack([n00, n10, n11], axis=1)
+    tri[:, 1] = np.stack([n00, n11, n01], axis=1)
+    return tri.reshape(-1, 3)
+
+
+def _mixed(j0, j1, ncx):
+    """Quads for even cells, two padded triangles for odd cells."""
+    j, i = np.divmod(np.arange(j0 * ncx, j1 * ncx), ncx)
+    n00, n10 = _node_ids(i, j, ncx), _node_ids(i + 1, j, ncx)
+    n01, n11 = _node_ids(i, j + 1, ncx), _node_ids(i + 1, j + 1, ncx)
+    quad = i % 2 == 0
+    faces = np.full((len(i), 2, 4), FILL, dtype=np.int32)
+    faces[:, 0, :3] = np.stack([n00, n10, n11], axis=1)
+    faces[:, 1, :3] = np.stack([n00, n11, n01], axis=1)
+    faces[quad, 0] = np.stack([n00, n10, n11, n01], axis=1)[quad]
+    keep = np.ones((len(i), 2), dtype=bool)
+    keep[quad, 1] = False
+    return faces[keep]
+
+
+def _mixed_count(ncx, ncy):
+    """Return the number of faces of a mixed mesh."""
+    return ncy * (math.ceil(ncx / 2) + 2 * (ncx // 2))
+
+
+def _hexahedra(k0, k1, ncx, ncy):
+    """Hexahedra for cell layers k0 to k1."""
+    k, rest = np.divmod(np.arange(k0 * ncx * ncy, k1 * ncx * ncy), ncx * ncy)
+    j, i = np.divmod(rest, ncx)
+    corners = [(0, 0, 0), (1, 0, 0), (1, 1, 0), (0, 1, 0), (0, 0, 1), (1, 0, 1), (1, 1, 1), (0, 1, 1)]
+    return np.stack(
+        [_node_ids(i + di, j + dj, ncx, k + dk, ncy) for di, dj, dk in corners],
+        axis=1,
+    ).astype(np.int32)
+
+
+def _write_rows(var, start, values, *, nonstd):
+    """Write a block of connectivity rows."""
+    if nonstd:
+        var[:, start : start + len(values)] = values.T
+    else:
+        var[start : start + len(values)] = values
+
+
+def _connectivity(ds, name, cf_role, dims, *, nonstd, fill):  # noqa: PLR0913
+    """Create a connectivity variable in standard or non-standard order.
+
+    :param tuple dims: (element dimension, nodes dimension)
+    """
+    dims = dims[::-1] if nonstd else dims
+    var = ds.createVariable(name, "i4", dims, fill_value=FILL if fill else None)
+    var.cf_role = cf_role
+    var.start_index = 0
+    return var
+
+
+def _coordinates(ds, shape, dims, ncoords):
+    """Create and write node coordinates on a regular grid."""
+    names = ("lon", "lat", "z")[:ncoords]
+    units = ("degrees_east", "degrees_north", "m")
+    variables = []
+    for name, unit in zip(names, units):
+        var = ds.createVariable(name, "f8", (dims,))
+        var.standard_name = {"lon": "longitude", "lat": "latitude", "z": "height"}[name]
+        var.units = unit
+        variables.append(var)
+    nnodes = math.prod(n + 1 for n in shape)
+    step = BLOCK_SIZE
+    for start in range(0, nnodes, step):
+        ids = np.arange(start, min(start + step, nnodes))
+        rest = ids
+        for var, n in zip(variables, shape):
+            rest, pos = np.divmod(rest, n + 1)
+            var[start : start + len(ids)] = pos / n
+    return " ".join(names)
+
+
+def _write_derived(ds, mesh, faces_var, nnodes, *, nonstd):
+    """Add the edge and face adjacencies of a 2D mesh.
+
+    The face node connectivity is read back in full and the adjacencies are
+    derived in memory, so this is limited by the available memory. The
+    edge node connectivity follows ``nonstd``; the other arrays are written
+    in standard order.
+    """
+    with connectivity.raw_values(faces_var):
+        faces = np.asarray(faces_var[:], dtype=np.int64)
+    if nonstd:
+        faces = faces.T
+    edges = MeshEdges.from_faces(faces, nnodes)
+    ds.createDimension("nedges", len(edges.keys))
+    ds.createDimension("two", 2)
+    maxnodes = faces.shape[1]
+    arrays = {
+        "edge_node_connectivity": ("edge_nodes", "two", np.stack(np.divmod(edges.keys, nnodes), axis=1)),
+        "edge_face_connectivity": ("edge_faces", "two", edges.edge_faces),
+        "face_edge_connectivity": ("face_edges", "maxnumnodesperface", edges.face_edges[:, :maxnodes]),
+        "face_face_connectivity": ("face_faces", "maxnumnodesperface", edges.face_faces[:, :maxnodes]),
+    }
+    for cty, (name, nodes_dim, values) in arrays.items():
+        elem_dim = "nedges" if cty.startswith("edge") else "nfaces"
+        order = nonstd and cty == "edge_node_connectivity"
+        var = _connectivity(ds, name, cty, (elem_dim, nodes_dim), nonstd=order, fill=cty != "edge_node_connectivity")
+        _write_rows(var, 0, values.astype(np.int32), nonstd=order)
+        mesh.setncattr(cty, name)
+    if nonstd:
+        mesh.edge_dimension = "nedges"
+
+
+def _write_line(ds, mesh, size, *, nonstd):
+    """Write a 1D network of ``size`` edges."""
+    nedges = max(1, int(size))
+    ds.createDimension("nnodes", nedges + 1)
+    ds.createDimension("nedges", nedges)
+    ds.createDimension("two", 2)
+    mesh.topology_dimension = 1
+    mesh.node_coordinates = _coordinates(ds, (nedges,), "nnodes", 1)
+    mesh.edge_node_connectivity = "edge_nodes"
+    if nonstd:
+        mesh.edge_dimension = "nedges"
+    var = _connectivity(ds, "edge_nodes", "edge_node_connectivity", ("nedges", "two"), nonstd=nonstd, fill=False)
+    for start in range(0, nedges, BLOCK_SIZE):
+        first = np.arange(start, min(start + BLOCK_SIZE, nedges), dtype=np.int32)
+        _write_rows(var, start, np.stack([first, first + 1], axis=1), nonstd=nonstd)
+    return nedges
+
+
+def _write_faces(ds, mesh, kind, size, *, nonstd, derived):  # noqa: PLR0913
+    """Write a 2D mesh of triangles or of mixed quads and triangles."""
+    ncx, ncy = _grid(size / 2 if kind == "triangles" else size * 2 / 3, 2)
+    if kind == "triangles":
+        nfaces, maxnodes, make = 2 * ncx * ncy, 3, _triangles
+    else:
+        nfaces, maxnodes, make = _mixed_count(ncx, ncy), 4, _mixed
+    ds.createDimension("nnodes", (ncx + 1) * (ncy + 1))
+    ds.createDimension("nfaces", nfaces)
+    ds.createDimension("maxnumnodesperface", maxnodes)
+    mesh.topology_dimension = 2
+    mesh.node_coordinates = _coordinates(ds, (ncx, ncy), "nnodes", 2)
+    mesh.face_node_connectivity = "face_nodes"
+    if nonstd:
+        mesh.face_dimension = "nfaces"
+    dims = ("nfaces", "maxnumnodesperface")
+    var = _connectivity(ds, "face_nodes", "face_node_connectivity", dims, nonstd=nonstd, fill=kind == "mixed")
+    rows = max(1, BLOCK_SIZE // (2 * ncx))
+    start = 0
+    for j0 in range(0, ncy, rows):
+        faces = make(j0, min(j0 + rows, ncy), ncx)
+        _write_rows(var, start, faces, nonstd=nonstd)
+        start += len(faces)
+    if derived:
+        _write_derived(ds, mesh, var, (ncx + 1) * (ncy + 1), nonstd=nonstd)
+    return nfaces
+
+
+def _write_volumes(ds, mesh, size, *, nonstd):
+    """Write a 3D mesh of hexahedra."""
+    ncx, ncy, ncz = _grid(size, 3)
+    nvolumes = ncx * ncy * ncz
+    ds.createDimension("nnodes", (ncx + 1) * (ncy + 1) * (ncz + 1))
+    ds.createDimension("nvolumes", nvolumes)
+    ds.createDimension("maxnumnodespervolume", 8)
+    mesh.topology_dimension = 3
+    mesh.node_coordinates = _coordinates(ds, (ncx, ncy, ncz), "nnodes", 3)
+    mesh.volume_node_connectivity = "volume_nodes"
+    mesh.volume_shape_type = "volume_shape"
+    if nonstd:
+        mesh.volume_dimension = "nvolumes"
+    shape = ds.createVariable("volume_shape", "i1", ("nvolumes",))
+    shape.cf_role = "volume_shape_type"
+    shape.flag_values = np.array([0, 1, 2], dtype="i1")
+    shape.flag_meanings = "tetrahedron wedge hexahedron"
+    dims = ("nvolumes", "maxnumnodespervolume")
+    var = _connectivity(ds, "volume_nodes", "volume_node_connectivity", dims, nonstd=nonstd, fill=False)
+    layers = max(1, BLOCK_SIZE // (ncx * ncy))
+    for k0 in range(0, ncz, layers):
+        volumes = _hexahedra(k0, min(k0 + layers, ncz), ncx, ncy)
+        start = k0 * ncx * ncy
+        _write_rows(var, start, volumes, nonstd=nonstd)
+        shape[start : start + len(volumes)] = 2
+    return nvolumes
+
+
+def write_mesh(path, kind="triangles", size=1000, *, nonstd=False, derived=False, fmt="NETCDF4"):  # noqa: PLR0913
+    """Write a synthetic UGRID mesh.
+
+    :param str path    : path of the file to write
+    :param str kind    : one of ``KINDS``
+    :param int size    : approximate number of elements (edges, faces or volumes)
+    :param bool nonstd : write the node connectivity arrays in non-standard
+                         (nodes, elements) dimension order
+    :param bool derived: for 2D meshes, also write the edge node, edge face,
+                         face edge and face face connectivities; these are
+                         derived in memory
+    :param str fmt     : netCDF format of the file
+
+    :returns int: the actual number of elements
+    """
+    if kind not in KINDS:
+        msg = f"Unknown mesh kind {kind!r}, expected one of {KINDS}"
+        raise ValueError(msg)
+
+    with Dataset(path, "w", format=fmt) as ds:
+        mesh = ds.createVariable("mesh", "i4")
+        mesh.cf_role = "mesh_topology"
+        mesh.long_name = f"synthetic {kind} mesh"
+        if kind == "line":
+            return _write_line(ds, mesh, size, nonstd=nonstd)
+        if kind == "hexahedra":
+            return _write_volumes(ds, mesh, size, nonstd=nonstd)
+        return _write_faces(ds, mesh, kind, size, nonstd=nonstd, derived=derived)
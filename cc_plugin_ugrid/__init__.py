@@ -4,6 +4,11 @@ import logging
 
 from compliance_checker.base import BaseNCCheck, Result
 
+from cc_plugin_ugrid.adapter import as_dataset
+from cc_plugin_ugrid.mesh import MeshTopology, find_data_variables, find_meshes
+from cc_plugin_ugrid.profiling import Profile
+from cc_plugin_ugrid.reader import ArrayReader
+
 try:
     from ._version import __version__
 except ImportError:
@@ -25,6 +30,10 @@ class UgridChecker(BaseNCCheck):
     _cc_author = "Brian McKenna <brian.mckenna@rpsgroup.com>"
     _cc_checker_version = __version__
 
+    memmap = False  # read arrays through numpy.memmap where possible
+    profiling = False  # measure each check in self.profile
+    threads = False  # run the checks on a thread pool
+
     @classmethod
     def beliefs(cls):
         """Beliefs."""
@@ -40,9 +49,29 @@ class UgridChecker(BaseNCCheck):
 
         Assign the dataset and create the dict of meshes it will need to check through.
 
-        Check for attribute existence in the mesh. If an attribute exists,
-        each check will assign the value of the attribute to the mesh
-        dictionary. Otherwise, the attribute in the mesh dict is set as None.
+        Each mesh variable is described by a read-only ``MeshTopology``, which
+        holds the value of each mesh attribute (None if it does not exist) and
+        the sizes of the dimensions and variables the mesh points to. It is
+        built once here and shared by all the checks. Likewise,
+        ``self.bindings`` groups the data variables by the mesh named by
+        their ``mesh`` attribute, in a single pass over the variables.
+
+        Arrays are read through ``self.reader``, which memory-maps contiguous,
+        uncompressed variables if ``memmap`` is enabled.
+
+        With profiling enabled, ``self.profile`` collects the measurements of
+        each check run by ``check_run`` (see ``cc_plugin_ugrid.profiling``);
+        otherwise it is None.
+
+        With the ``threads`` option, ``check_run`` runs the checks on a
+        thread pool and the reader serializes the netCDF4 reads.
+
+        Calling ``setup`` again (e.g. with a new dataset) invalidates any check
+        results cached by ``check_run`` and any topology derived from the data.
+
+        An ``xarray.Dataset`` (e.g. a Zarr store or kerchunk reference opened
+        with ``cc_plugin_ugrid.adapter.open_dataset``) is checked through
+        ``XarrayDataset``, which exposes it as a netCDF4 dataset.
 
         **No validation of the attribute is performed.**
 
@@ -50,39 +79,11 @@ class UgridChecker(BaseNCCheck):
             ds : netCDF4 dataset object
 
         """
-        self.ds = ds
-        self.meshes = {
-            m: {}
-            for m in self.ds.get_variables_by_attributes(
-                cf_role="mesh_topology",
-            )
-        }
-
-        for mesh in self.meshes:
-            for att in (
-                "boundary_node_coordinates",
-                "edge_coordinates",
-                "edge_dimension",
-                "edge_face_connectivity",
-                "edge_node_connectivity",
-                "face_coordinates",
-                "face_dimension",
-                "face_edge_coordinates",
-                "face_face_connectivity",
-                "face_node_connectivity",
-                "nedges",
-                "nfaces",
-                "node_coordinates",
-                "topology_dimension",
-                "volume_dimension",
-                "volume_edge_coordinates",
-                "volume_face_connectivity",
-                "volume_node_connectivity",
-                "volume_coordinates",
-                "volume_shape_type",
-                "volume_volume_connectivity",
-            ):
-                if hasattr(mesh, att):
-                    self.meshes[mesh][att] = mesh.getncattr(att)
-                else:
-                    self.meshes[mesh][att] = None
+        self.ds = as_dataset(ds)
+        self._results = {}
+        self._derived = {}
+        self.reader = ArrayReader(self.ds, memmap=self.memmap, count=self.profiling, threads=self.threads)
+        self._derived_locks = {}
+        self.profile = Profile(logger) if self.profiling else None
+        self.meshes = {m: MeshTopology.from_variable(self.ds, m) for m in find_meshes(self.ds)}
+        self.bindings = find_data_variables(self.ds)
@@ -0,0 +1,275 @@
+"""Checking xarray datasets, e.g. Zarr stores and kerchunk references.
+
+The checks are written against the netCDF4 API (``variables``,
+``dimensions``, ``ncattrs``, ``getncattr``...). ``XarrayDataset`` exposes an
+``xarray.Dataset`` through the same API, so the checks run unchanged on any
+store xarray can open lazily: local Zarr stores, kerchunk references to
+remote netCDF/HDF5 files, or netCDF files opened with another engine.
+
+Values are only read when a check slices a variable, one block at a time.
+When the variables are backed by dask, the connectivity summary
+(see ``summarize``) is computed as a single dask graph over the
+chunks of the array, in parallel on all cores, without materializing the
+array.
+
+Requires ``xarray``; ``dask`` is optional, and ``zarr`` (plus ``fsspec``
+and ``kerchunk`` for references) depends on the store.
+"""
+
+from pathlib import Path
+
+import numpy as np
+
+try:
+    import xarray as xr
+except ImportError:
+    xr = None
+
+try:
+    import dask
+    import dask.array
+except ImportError:
+    dask = None
+
+# suffixes of the stores opened with the zarr engine
+ZARR_SUFFIXES = (".zarr",)
+REFERENCE_SUFFIXES = (".json",)
+
+
+def is_store(path):
+    """Return True if a path names a Zarr store or a kerchunk reference file.
+
+    :param str path: path or URL
+    """
+    return str(path).rstrip("/").endswith(ZARR_SUFFIXES + REFERENCE_SUFFIXES)
+
+
+def open_dataset(source, **kwargs):
+    """Open a store lazily with xarray, leaving the values undecoded.
+
+    Decoding (masking, scaling, times) is disabled so that the variables
+    hold their raw values and attributes, as read by netCDF4. Variables are
+    backed by dask if it is installed. Zarr stores are recognized by their
+    ``.zarr`` suffix and kerchunk references by their ``.json`` suffix.
+
+    :param str source: path or URL of the store
+    :param kwargs    : passed to ``xarray.open_dataset``, overriding the
+                       defaults above (e.g. ``chunks``, ``storage_options``)
+
+    :returns xarray.Dataset: to be checked with ``UgridChecker.setup``
+    """
+    if xr is None:
+        msg = "xarray is required to open Zarr stores and kerchunk references"
+        raise ImportError(msg)
+    options = {"decode_cf": False, "mask_and_scale": False, "decode_times": False}
+    if dask is not None:
+        options["chunks"] = {}
+    path = str(source).rstrip("/")
+    if path.endswith(REFERENCE_SUFFIXES):
+        options["engine"] = "zarr"
+        options["backend_kwargs"] = {"consolidated": False, "storage_options": {"fo": path}}
+        source = "reference://"
+    elif path.endswith(ZARR_SUFFIXES):
+        options["engine"] = "zarr"
+    options.update(kwargs)
+    return xr.open_dataset(source, **options)
+
+
+def as_dataset(ds):
+    """Wrap an xarray dataset in ``XarrayDataset``; return any other dataset as is.
+
+    :param ds: netCDF4 or xarray dataset
+    """
+    if xr is not None and isinstance(ds, xr.Dataset):
+        return XarrayDataset(ds)
+    return ds
+
+
+class Dimension:
+    """A dimension of an ``XarrayDataset``, as a netCDF4 Dimension."""
+
+    __slots__ = ("name", "size", "unlimited")
+
+    def __init__(self, name, size, *, unlimited=False):
+        self.name = name
+        self.size = size
+        self.unlimited = unlimited
+
+    def __len__(self):
+        """Size of the dimension."""
+        return self.size
+
+    def isunlimited(self):
+        """Return True if the dimension is unlimited."""
+        return self.unlimited
+
+
+class XarrayVariable:
+    """A variable of an xarray dataset, as a netCDF4 Variable.
+
+    Slicing reads only the requested values. As with netCDF4, values equal
+    to ``_FillValue`` are masked unless auto-masking is turned off with
+    ``set_auto_mask``; scaling attributes are not applied.
+
+    :param str name               : name of the variable
+    :param xarray.Variable variable: wrapped variable
+    """
+
+    __slots__ = ("mask", "name", "variable")
+
+    def __init__(self, name, variable):
+        self.name = name
+        self.variable = variable
+        self.mask = True
+
+    @property
+    def dimensions(self):
+        """Dimension names of the variable."""
+        return tuple(str(d) for d in self.variable.dims)
+
+    @property
+    def shape(self):
+        """Shape of the variable."""
+        return self.variable.shape
+
+    @property
+    def ndim(self):
+        """Number of dimensions of the variable."""
+        return self.variable.ndim
+
+    @property
+    def dtype(self):
+        """Data type of the variable."""
+        return self.variable.dtype
+
+    @property
+    def dask_array(self):
+        """The values as a dask array, or None if they are not backed by dask."""
+        if self.variable.chunks is None:
+            return None
+        return self.variable.data
+
+    def __len__(self):
+        """Length of the first dimension."""
+        return self.variable.shape[0]
+
+    def __getitem__(self, key):
+        """Read the values of a slice."""
+        values = np.asarray(self.variable[key].values)
+        fill = self.variable.attrs.get("_FillValue")
+        if self.mask and fill is not None:
+            return np.ma.masked_where(values == fill, values, copy=False)
+        return values
+
+    def set_auto_mask(self, mask):
+        """Set the masking of fill values."""
+        self.mask = mask
+
+    def ncattrs(self):
+        """Attribute names of the variable."""
+        return list(self.variable.attrs)
+
+    def getncattr(self, name):
+        """Attribute value of the variable."""
+        try:
+            return self.variable.attrs[name]
+        except KeyError:
+            raise AttributeError(name) from None
+
+
+class XarrayDataset:
+    """An xarray dataset, as a netCDF4 Dataset.
+
+    :param xarray.Dataset dataset: dataset to check, opened without decoding
+                                   (see ``open_dataset``)
+    """
+
+    data_model = "xarray"
+
+    def __init__(self, dataset):
+        self.dataset = dataset
+        self.groups = {}
+        unlimited = set(dataset.encoding.get("unlimited_dims", ()))
+        self.dimensions = {str(name): Dimension(str(name), int(size), unlimited=name in unlimited) for name, size in dataset.sizes.items()}
+        self.variables = {str(name): XarrayVariable(str(name), var) for name, var in dataset.variables.items()}
+
+    def filepath(self):
+        """Return the path of the source file.
+
+        :raises ValueError: if the dataset is not read from a single file
+        """
+        source = self.dataset.encoding.get("source")
+        if not source or not Path(source).is_file():
+            msg = "dataset is not read from a single file"
+            raise ValueError(msg)
+        return source
+
+    def ncattrs(self):
+        """Global attribute names."""
+        return list(self.dataset.attrs)
+
+    def getncattr(self, name):
+        """Global attribute value."""
+        try:
+            return self.dataset.attrs[name]
+        except KeyError:
+            raise AttributeError(name) from None
+
+    def get_variables_by_attributes(self, **kwargs):
+        """Return the variables matching all the given attributes.
+
+        As with netCDF4, a value may be a callable, called with the attribute
+        value (None if missing) and returning True for matching variables.
+        """
+        found = []
+        for var in self.variables.values():
+            attrs = var.variable.attrs
+            for name, value in kwargs.items():
+                if callable(value):
+                    if not value(attrs.get(name)):
+                        break
+                elif name not in attrs or attrs[name] != value:
+                    break
+            else:
+                found.append(var)
+        return found
+
+    def close(self):
+        """Close the underlying dataset."""
+        self.dataset.close()
+
+
+def summarize(array, low, high, fill=None, axis=0):
+    """Summarize the indices and the padding of a dask connectivity array.
+
+    The counterpart of ``connectivity.summarize`` for dask arrays, computed
+    as a single graph.
+
+    :param dask.array.Array array: connectivity values
+    :param int low               : smallest valid index (``start_index``)
+    :param int high              : one past the largest valid index
+    :param fill                  : ``_FillValue``, or None
+    :param int axis              : axis indexing the mesh elements
+
+    :returns tuple: the fields of ``connectivity.IndexSummary``
+    """
+    values = array if axis == 0 else array.T
+    filled = values == fill if fill is not None else dask.array.zeros_like(values, dtype=bool)
+    ok = ((values >= low) & (values < high)) | filled
+    bad_rows = ~ok.all(axis=1)
+    padded = (filled[:, :-1] & ~filled[:, 1:]).any(axis=1)
+    entries = values.shape[1] - filled.sum(axis=1)
+    nbad, anybad, first, npadded, anypadded, first_padded, histogram = dask.compute(
+        (~ok).sum(),
+        bad_rows.any(),
+        bad_rows.argmax(),
+        padded.sum(),
+        padded.any(),
+        padded.argmax(),
+        dask.array.bincount(entries, minlength=values.shape[1] + 1),
+    )
+    return (
+        (int(nbad), int(first) if anybad else None),
+        (int(npadded), int(first_padded) if anypadded else None),
+        np.asarray(histogram),
+    )
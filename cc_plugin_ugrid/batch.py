@@ -0,0 +1,417 @@
+"""Batch checking of many UGRID files.
+
+Runs ``UgridChecker.setup`` and ``UgridChecker.check_run`` over a list (or
+glob patterns) of files on a process pool, yielding each file's results as
+soon as it is done.
+
+For large archives, ``stream_files`` instead writes one JSON record per
+(file, mesh, check) to a JSON-lines file as soon as each result is produced
+(see ``make_record`` for the schema), and records the files done in a
+checkpoint so that an interrupted scan resumes where it stopped.
+
+Example::
+
+    $ ugrid-batch -j 16 "archive/**/*.nc"
+    $ ugrid-batch -j 16 --jsonl results.jsonl --checkpoint results.done "archive/**/*.nc"
+
+"""
+
+from __future__ import annotations
+
+import argparse
+import contextlib
+import glob
+import json
+import logging
+import multiprocessing
+import os
+import queue
+import sys
+import typing
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+
+from netCDF4 import Dataset
+
+from cc_plugin_ugrid import adapter, logger
+from cc_plugin_ugrid.checker import UgridChecker
+
+SCHEMA_VERSION = 1  # version of the records written by ``stream_files``
+POLL_INTERVAL = 0.1  # seconds between checks for finished files while waiting for records
+
+
+class FileReport(typing.NamedTuple):
+    """Results of the UGRID checks for a single file."""
+
+    path: str
+    results: list
+    error: str | None = None
+
+    @property
+    def score(self):
+        """Total (score, out_of) of the file's results."""
+        return (
+            sum(r.value[0] for r in self.results),
+            sum(r.value[1] for r in self.results),
+        )
+
+    @property
+    def passed(self):
+        """True if the file could be checked and every check passed."""
+        score, out_of = self.score
+        return self.error is None and score == out_of
+
+
+def expand_paths(patterns):
+    """Expand glob patterns into a sorted, de-duplicated list of paths.
+
+    Patterns without glob characters are passed through unchanged, so missing
+    files are reported as errors rather than silently skipped.
+
+    :param iterable patterns: file paths or glob patterns
+    """
+    paths = []
+    for pattern in map(os.fspath, patterns):
+        if glob.has_magic(pattern):
+            paths.extend(sorted(glob.glob(pattern, recursive=True)))  # noqa: PTH207
+        else:
+            paths.append(pattern)
+    return list(dict.fromkeys(paths))
+
+
+def check_file(path, options=None, on_result=None):
+    """Run the UGRID checks on a single file.
+
+    Exceptions are caught and reported in the returned ``FileReport`` so that
+    a single bad file does not abort a batch run.
+
+    :param str path         : path of the netCDF file, Zarr store or kerchunk
+                              reference (see ``cc_plugin_ugrid.adapter``)
+    :param set options      : checker options, e.g. {"validate_data"}
+    :param callable on_result: called with (mesh name, check name, Result) as
+                              each mesh check completes (see
+                              ``UgridChecker.check_run``)
+    """
+    try:
+        with adapter.open_dataset(path) if adapter.is_store(path) else Dataset(path) as ds:
+            checker = UgridChecker(options=options)
+            checker.on_result = on_result
+            checker.setup(ds)
+            results = checker.check_run(ds)
+    except Exception as err:  # noqa: BLE001
+        return FileReport(path, [], f"{type(err).__name__}: {err}")
+    return FileReport(path, results)
+
+
+def check_files(patterns, workers=None, options=None):
+    """Check many files in parallel, yielding reports in completion order.
+
+    :param iterable patterns: file paths or glob patterns
+    :param int workers      : number of worker processes; defaults to the
+                              number of CPUs. With 1, files are checked in
+                              the current process.
+    :param set options      : checker options, e.g. {"validate_data"}
+
+    :returns generator of FileReport
+    """
+    paths = expand_paths(patterns)
+    if workers == 1 or len(paths) <= 1:
+        for path in paths:
+            yield check_file(path, options)
+        return
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(check_file, path, options) for path in paths]
+        for future in as_completed(futures):
+            yield future.result()
+
+
+def make_record(path, mesh=None, check=None, result=None, error=None):
+    """Convert a check result into a record of the JSON-lines output.
+
+    Every record has the same keys, so that the output can be loaded
+    incrementally into a table:
+
+    - ``schema``: ``SCHEMA_VERSION``
+    - ``file``: path of the checked file
+    - ``mesh``, ``check``: names of the mesh variable and check method, null
+      for the file-level result (and for results returned by the ``cache``
+      option, which are stored without them)
+    - ``name``: description of the check
+    - ``score``, ``out_of``, ``weight``: as in the compliance checker
+    - ``passed``: true if the score is full
+    - ``msgs``: messages of the check
+    - ``error``: null, or the error of a file that could not be checked, in
+      which case the result fields are null
+
+    :param str path     : path of the checked file
+    :param str mesh     : name of the mesh variable
+    :param str check    : name of the check method
+    :param Result result: result of the check
+    :param str error    : error of a file that could not be checked
+    """
+    record = dict.fromkeys(("schema", "file", "mesh", "check", "name", "score", "out_of", "weight", "passed", "msgs", "error"))
+    record.update(schema=SCHEMA_VERSION, file=path, mesh=mesh, check=check, error=error)
+    if result is not None:
+        score, out_of = (int(v) for v in result.value)
+        record.update(
+            name=result.name,
+            score=score,
+            out_of=out_of,
+            weight=int(result.weight),
+            passed=score == out_of,
+            msgs=[str(m) for m in result.msgs],
+        )
+    return record
+
+
+def record_file(path, options=None, write=None):
+    """Check a single file, converting each result to a record as soon as it is produced.
+
+    :param str path      : path of the file
+    :param set options   : checker options, e.g. {"validate_data"}
+    :param callable write: called with each record (see ``make_record``);
+                           by default the records are returned
+
+    :returns FileReport, list of dict: the report and the records not passed
+                                       to ``write``
+    """
+    records = []
+    write = write or records.append
+    streamed = set()
+
+    def on_result(mesh, check, result):
+        streamed.add(id(result))
+        write(make_record(path, mesh, check, result))
+
+    report = check_file(path, options, on_result)
+    if report.error is not None:
+        write(make_record(path, error=report.error))
+    for result in report.results:
+        if id(result) not in streamed:
+            write(make_record(path, result=result))
+    return report, records
+
+
+class JsonLinesWriter:
+    """Write records as compact JSON lines, with a checkpoint of the files done.
+
+    The records of several files may be interleaved in the output, when they
+    are written as the files are checked in parallel. ``commit(path)`` marks
+    a file as done once all its records are written: the output is flushed
+    to disk, then the file, the size of the output and the offset of the
+    first record of the files still being written (``clean``) are appended
+    to the checkpoint. When the checkpoint exists, the files it lists are in
+    ``done`` and the records of the other files, which all follow ``clean``,
+    are dropped from the output, so that a scan resumed with the same
+    checkpoint writes no duplicate records. If the output is missing or
+    shorter than the checkpoint says, the checkpoint is discarded and the
+    scan starts afresh.
+
+    :param str path      : JSON-lines output file
+    :param str checkpoint: checkpoint file; without one, the output is
+                           overwritten
+    """
+
+    def __init__(self, path, checkpoint=None):
+        self.path = Path(path)
+        self.checkpoint = None if checkpoint is None else Path(checkpoint)
+        self._started = {}  # offset of the first record of the files not committed yet
+        entries = []
+        if self.checkpoint is not None and self.checkpoint.exists():
+            text = self.checkpoint.read_text()
+            # a partial last entry was being appended when interrupted
+            entries = [json.loads(line) for line in text[: text.rfind("\n") + 1].splitlines()]
+        if entries and not (self.path.exists() and self.path.stat().st_size >= entries[-1]["size"]):
+            entries = []  # the output was removed or truncated
+        self.done = {entry["file"] for entry in entries}
+        if not entries:
+            self._fp = self.path.open("wb")
+            if self.checkpoint is not None:
+                self.checkpoint.write_text("")
+            return
+
+        size = entries[-1]["size"]
+        clean = entries[-1].get("clean", size)
+        self._fp = self.path.open("r+b")
+        self._fp.seek(clean)
+        tail = self._fp.read(size - clean).splitlines(keepends=True)
+        self._fp.seek(clean)
+        self._fp.write(b"".join(line for line in tail if json.loads(line)["file"] in self.done))
+        self._fp.truncate()
+        self._fp.flush()
+        os.fsync(self._fp.fileno())
+        size = self._fp.tell()
+        tmp = self.checkpoint.with_name(self.checkpoint.name + ".tmp")
+        tmp.write_text("".join(json.dumps({"file": f, "size": size, "clean": size}) + "\n" for f in sorted(self.done)))
+        tmp.replace(self.checkpoint)
+
+    def write(self, record):
+        """Write a record as a line of JSON."""
+        self._started.setdefault(record["file"], self._fp.tell())
+        self._fp.write(json.dumps(record, separators=(",", ":")).encode() + b"\n")
+
+    def commit(self, path):
+        """Mark a file as done, once all its records are written."""
+        self._fp.flush()
+        self.done.add(path)
+        self._started.pop(path, None)
+        if self.checkpoint is None:
+            return
+        os.fsync(self._fp.fileno())
+        size = self._fp.tell()
+        with self.checkpoint.open("a") as fp:
+            fp.write(json.dumps({"file": path, "size": size, "clean": min(self._started.values(), default=size)}) + "\n")
+
+    def close(self):
+        """Close the output."""
+        self._fp.close()
+
+    def __enter__(self):
+        """Return the writer, closed on exit."""
+        return self
+
+    def __exit__(self, *exc):
+        """Close the output."""
+        self.close()
+
+
+def _drain(records, write):
+    """Write the records waiting in a queue."""
+    with contextlib.suppress(queue.Empty):
+        while True:
+            write(records.get_nowait())
+
+
+def stream_files(patterns, output, workers=None, options=None, checkpoint=None):
+    """Check many files in parallel, streaming the results to a JSON-lines file.
+
+    Each result is written as a record (see ``make_record``) as soon as it is
+    produced. On a process pool, the workers send their records through a
+    queue, so the records of the files being checked are interleaved. The
+    files listed in the checkpoint are skipped (see ``JsonLinesWriter``).
+
+    :param iterable patterns: file paths or glob patterns
+    :param str output       : JSON-lines output file
+    :param int workers      : number of worker processes (see ``check_files``)
+    :param set options      : checker options, e.g. {"validate_data"}
+    :param str checkpoint   : checkpoint file, to resume an interrupted scan
+
+    :returns generator of FileReport: the reports of the files checked, once
+                                      their records are written
+    """
+    with JsonLinesWriter(output, checkpoint) as writer:
+        paths = [path for path in expand_paths(patterns) if path not in writer.done]
+        if workers == 1 or len(paths) <= 1:
+            for path in paths:
+                report, _ = record_file(path, options, writer.write)
+                writer.commit(path)
+                yield report
+            return
+
+        with multiprocessing.Manager() as manager, ProcessPoolExecutor(max_workers=workers) as pool:
+            records = manager.Queue()
+            finished = queue.SimpleQueue()
+            for path in paths:
+                pool.submit(record_file, path, options, records.put).add_done_callback(finished.put)
+            for _ in paths:
+                while finished.empty():
+                    with contextlib.suppress(queue.Empty):
+                        writer.write(records.get(timeout=POLL_INTERVAL))
+                future = finished.get()
+                _drain(records, writer.write)  # the records of the file were queued before it finished
+                report, _ = future.result()
+                writer.commit(report.path)
+                yield report
+
+
+def summarize(reports):
+    """Aggregate file reports into a summary dict.
+
+    :param iterable reports: FileReport objects
+    """
+    summary = {
+        "files": 0,
+        "passed": 0,
+        "failed": 0,
+        "errors": 0,
+        "score": 0,
+        "out_of": 0,
+    }
+    for report in reports:
+        summary["files"] += 1
+        if report.error is not None:
+            summary["errors"] += 1
+        elif report.passed:
+            summary["passed"] += 1
+        else:
+            summary["failed"] += 1
+        score, out_of = report.score
+        summary["score"] += score
+        summary["out_of"] += out_of
+    return summary
+
+
+def main(argv=None):
+    """Command line entry point for batch UGRID checks."""
+    parser = argparse.ArgumentParser(
+        description="Run the UGRID checks over many files in parallel.",
+    )
+    parser.add_argument("paths", nargs="+", help="files or glob patterns")
+    parser.add_argument(
+        "-j",
+        "--workers",
+        type=int,
+        default=None,
+        help="number of worker processes (default: number of CPUs)",
+    )
+    parser.add_argument(
+        "-O",
+        "--option",
+        action="append",
+        default=[],
+        help="checker option, e.g. validate_data; may be repeated",
+    )
+    parser.add_argument(
+        "--jsonl",
+        metavar="FILE",
+        help="stream one JSON record per (file, mesh, check) to FILE instead of printing each file's score",
+    )
+    parser.add_argument(
+        "--checkpoint",
+        metavar="FILE",
+        help="with --jsonl, record the files done in FILE and skip them when resuming",
+    )
+    parser.add_argument("-v", "--verbose", action="store_true")
+    args = parser.parse_args(argv)
+    if args.checkpoint and not args.jsonl:
+        parser.error("--checkpoint requires --jsonl")
+
+    if args.verbose:
+        logger.addHandler(logging.StreamHandler())
+        logger.setLevel(logging.DEBUG)
+
+    options = set(args.option)
+    if args.jsonl:
+        # the records are in the output: keep no reports, only the summary
+        summary = summarize(stream_files(args.paths, args.jsonl, workers=args.workers, options=options, checkpoint=args.checkpoint))
+    else:
+        reports = []
+        for report in check_files(args.paths, workers=args.workers, options=options):
+            reports.append(report)
+            if report.error is not None:
+                print(f"{report.path}: ERROR {report.error}")  # noqa: T201
+            else:
+                score, out_of = report.score
+                print(f"{report.path}: {score}/{out_of}")  # noqa: T201
+            logger.debug("checked %s", report.path)
+        summary = summarize(reports)
+
+    print(  # noqa: T201
+        "{files} files: {passed} passed, {failed} failed, {errors} errors ({score}/{out_of})".format(**summary),
+    )
+    return 0 if summary["passed"] == summary["files"] else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,323 @@
+"""Persistent cache of ``check_run`` results.
+
+Results are stored as JSON files in a cache directory, keyed by a fingerprint
+of the checked file: its path, size and modification time, a hash of its
+metadata (dimensions, variables and attributes, but not the data), the plugin
+version and the checker options that change the results. A file is only read
+back if all of these match, so the data arrays are never opened on a hit.
+
+For files that grow over time (e.g. appended time steps), the results of
+each mesh can instead be keyed by ``mesh_fingerprint``, which only covers the
+metadata of the mesh topology variable, of the variables it points to and of
+their dimensions. Appending data leaves it unchanged, so the mesh checks are
+not re-run, and computing it reads no array.
+
+Structures derived from the connectivity arrays (edges, node adjacency,
+index summaries) can be stored as ``.npz`` files by ``DerivedCache``, keyed
+by a hash of the contents of the arrays they derive from, so files sharing a
+mesh (e.g. the forecasts of a model on the same grid) derive them only once.
+
+The directories are bounded in size: when they grow over ``max_bytes``, the
+least recently used entries are removed.
+"""
+
+import contextlib
+import hashlib
+import json
+import os
+import tempfile
+import typing
+from pathlib import Path
+
+import numpy as np
+from compliance_checker.base import Result
+
+from cc_plugin_ugrid import __version__
+from cc_plugin_ugrid.connectivity import CHUNK_SIZE, fill_value, raw_values, start_index
+
+MAX_BYTES = 64 * 2**20  # default size limit of the cache directory
+DERIVED_MAX_BYTES = 2**30  # default size limit of the derived structures
+
+# options that change how the checks run, but not their results
+RUNTIME_OPTIONS = (
+    "cache",
+    "chunk_threads",
+    "derived_cache",
+    "incremental",
+    "memmap",
+    "memory_budget",
+    "profile",
+    "refresh_cache",
+    "threads",
+)
+
+
+def default_directory():
+    """Return the default cache directory, under ``$XDG_CACHE_HOME``."""
+    base = os.environ.get("XDG_CACHE_HOME") or Path.home() / ".cache"
+    return Path(base) / "cc-plugin-ugrid"
+
+
+def _attributes(obj):
+    """Return the attributes of a dataset, group or variable as sorted pairs."""
+    values = []
+    for name in sorted(obj.ncattrs()):
+        value = obj.getncattr(name)
+        if isinstance(value, np.ndarray):
+            value = (str(value.dtype), value.tolist())
+        values.append((name, repr(value)))
+    return values
+
+
+def _metadata(group):
+    """Describe the dimensions, variables and attributes of a group."""
+    return {
+        "attributes": _attributes(group),
+        "dimensions": [(d.name, d.size, d.isunlimited()) for d in group.dimensions.values()],
+        "variables": [(v.name, str(v.dtype), v.dimensions, _attributes(v)) for v in group.variables.values()],
+        "groups": {name: _metadata(g) for name, g in group.groups.items()},
+    }
+
+
+def fingerprint(ds, options=()):
+    """Return the cache key of a dataset, or None if it is not a file on disk.
+
+    :param netCDF4 dataset ds: dataset to check
+    :param iterable options  : checker options; runtime-only options (see
+                               ``RUNTIME_OPTIONS``) are ignored
+    """
+    try:
+        path = Path(ds.filepath()).resolve()
+        stat = path.stat()
+    except (OSError, ValueError):
+        return None
+    options = sorted(o for o in options if o.partition("=")[0] not in RUNTIME_OPTIONS)
+    key = {
+        "path": str(path),
+        "size": stat.st_size,
+        "mtime": stat.st_mtime_ns,
+        "format": ds.data_model,
+        "metadata": _metadata(ds),
+        "version": __version__,
+        "options": options,
+    }
+    return hashlib.sha256(json.dumps(key, default=str).encode()).hexdigest()
+
+
+def _hash_values(digest, var, chunk_size=CHUNK_SIZE):
+    """Feed the raw values of a variable to a hash, in blocks along its first axis."""
+    shape = var.shape
+    if not shape:
+        digest.update(np.asarray(var[...]).tobytes())
+        return
+    step = max(1, chunk_size // max(1, int(np.prod(shape[1:], dtype=np.int64))))
+    with raw_values(var):
+        for start in range(0, shape[0], step):
+            digest.update(np.ascontiguousarray(var[start : start + step]).tobytes())
+
+
+def mesh_fingerprint(ds, topo, options=()):
+    """Return the cache key of the results of a mesh.
+
+    The key covers the mesh attributes, the metadata (type, dimensions,
+    shape and attributes) of the variables named by its connectivity and
+    coordinate attributes, the sizes of their fixed-size dimensions, the
+    plugin version and the options. No value is read, so the key costs the
+    same whatever the size of the mesh; the size of unlimited dimensions and
+    the other dimensions and variables of the file are left out, so
+    appending records or adding variables does not change it. Values
+    rewritten in place without any change to the metadata are not seen.
+
+    :param netCDF4 dataset ds : dataset holding the mesh
+    :param MeshTopology topo  : descriptor of the mesh
+    :param iterable options   : checker options, see ``fingerprint``
+    """
+    options = sorted(o for o in options if o.partition("=")[0] not in RUNTIME_OPTIONS)
+    variables = [ds.variables[name] for name in sorted(topo.shapes)]
+    dims = sorted({dim for var in variables for dim in var.dimensions})
+    key = {
+        "mesh": topo.as_dict(),
+        "variables": [(v.name, str(v.dtype), v.dimensions, _attributes(v)) for v in variables],
+        "dimensions": [(d, None if ds.dimensions[d].isunlimited() else ds.dimensions[d].size) for d in dims],
+        "version": __version__,
+        "options": options,
+    }
+    return hashlib.sha256(json.dumps(key, default=str).encode()).hexdigest()
+
+
+def array_fingerprint(var, chunk_size=CHUNK_SIZE):
+    """Return a hash of the contents of a connectivity variable.
+
+    The hash covers the raw values, their type and shape, and the
+    ``start_index`` and ``_FillValue`` that give them their meaning, but
+    not the name of the variable or of its file.
+
+    :param netCDF4 variable var: variable to hash (or an ``ArrayReader`` view)
+    :param int chunk_size      : maximum number of values read at once
+    """
+    digest = hashlib.sha256(repr((str(var.dtype), tuple(var.shape), start_index(var), fill_value(var))).encode())
+    _hash_values(digest, var, chunk_size)
+    return digest.hexdigest()
+
+
+def derived_key(name, fingerprints, *params):
+    """Return the cache key of a structure derived from connectivity arrays.
+
+    :param str name          : kind of the structure, e.g. "edges"
+    :param list fingerprints : ``array_fingerprint`` of each source array
+    :param params            : other inputs of the derivation (number of
+                               nodes, axes...)
+    """
+    key = [name, list(fingerprints), [str(p) for p in params], __version__]
+    return hashlib.sha256(json.dumps(key).encode()).hexdigest()
+
+
+def _serialize(result):
+    """Convert a Result into a JSON-compatible dict."""
+    return {
+        "weight": result.weight,
+        "value": result.value,
+        "name": result.name,
+        "msgs": [str(m) for m in result.msgs],
+        "children": [_serialize(c) for c in result.children],
+    }
+
+
+def _deserialize(item):
+    """Rebuild a Result from ``_serialize``."""
+    value = tuple(item["value"]) if isinstance(item["value"], list) else item["value"]
+    children = [_deserialize(c) for c in item["children"]]
+    return Result(item["weight"], value, item["name"], item["msgs"], children)
+
+
+class _DiskCache:
+    """Size-bounded, least-recently-used directory of cache entries.
+
+    Entries are files named after their key and written atomically, so
+    several processes may share the directory. Subclasses define the
+    ``SUFFIX`` of their files and how entries are read and written.
+
+    :param Path directory: cache directory
+    :param int max_bytes : maximum total size of the entries
+    """
+
+    SUFFIX = ""
+
+    def __init__(self, directory, max_bytes):
+        self.directory = Path(directory)
+        self.max_bytes = max_bytes
+
+    def _path(self, key):
+        return self.directory / f"{key}{self.SUFFIX}"
+
+    def _write(self, key, write):
+        """Write an entry atomically with ``write(file)``, then evict old entries if needed."""
+        self.directory.mkdir(parents=True, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        with os.fdopen(fd, "wb") as fp:
+            write(fp)
+        Path(tmp).replace(self._path(key))
+        self.evict()
+
+    def evict(self):
+        """Remove the least recently used entries until under ``max_bytes``."""
+        entries = []
+        for path in self.directory.glob(f"*{self.SUFFIX}"):
+            with contextlib.suppress(OSError):
+                stat = path.stat()
+                entries.append((stat.st_mtime_ns, stat.st_size, path))
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            with contextlib.suppress(OSError):
+                path.unlink()
+            total -= size
+
+    def clear(self):
+        """Remove every entry."""
+        for path in self.directory.glob(f"*{self.SUFFIX}"):
+            with contextlib.suppress(OSError):
+                path.unlink()
+
+
+class ResultCache(_DiskCache):
+    """Size-bounded, least-recently-used cache of check results on disk.
+
+    :param str directory: cache directory (default: ``default_directory()``)
+    :param int max_bytes: maximum total size of the entries
+    """
+
+    SUFFIX = ".json"
+
+    def __init__(self, directory=None, max_bytes=MAX_BYTES):
+        super().__init__(directory or default_directory(), max_bytes)
+
+    def get(self, key):
+        """Return the results stored under a key, or None.
+
+        A hit marks the entry as recently used.
+        """
+        path = self._path(key)
+        try:
+            items = json.loads(path.read_text())
+            os.utime(path)
+        except (OSError, ValueError):
+            return None
+        return [_deserialize(item) for item in items]
+
+    def put(self, key, results):
+        """Store results under a key, then evict old entries if needed."""
+        data = json.dumps([_serialize(r) for r in results], default=int)
+        self._write(key, lambda fp: fp.write(data.encode()))
+
+
+class DerivedCache(_DiskCache):
+    """Size-bounded, least-recently-used cache of derived structures on disk.
+
+    Stores NamedTuples of arrays (e.g. ``topology.MeshEdges``) as ``.npz``
+    files; integer fields are stored as scalars and (count, first) pairs as
+    two-value arrays, -1 standing for a missing first element.
+
+    :param str directory: cache directory (default: ``derived`` under
+                          ``default_directory()``)
+    :param int max_bytes: maximum total size of the entries
+    """
+
+    SUFFIX = ".npz"
+
+    def __init__(self, directory=None, max_bytes=DERIVED_MAX_BYTES):
+        super().__init__(directory or default_directory() / "derived", max_bytes)
+
+    def get(self, key, cls):
+        """Return the structure stored under a key, or None.
+
+        A hit marks the entry as recently used.
+
+        :param str key : see ``derived_key``
+        :param type cls: NamedTuple class of the structure
+        """
+        path = self._path(key)
+        try:
+            with np.load(path) as data:
+                arrays = {name: data[name] for name in cls._fields}
+            os.utime(path)
+        except (OSError, ValueError, KeyError):
+            return None
+        hints = typing.get_type_hints(cls)
+        values = {}
+        for name, array in arrays.items():
+            if hints.get(name) is tuple:
+                values[name] = tuple(None if v == -1 else v for v in array.tolist())
+            elif array.ndim == 0:
+                values[name] = array.item()
+            else:
+                values[name] = array
+        return cls(**values)
+
+    def put(self, key, value):
+        """Store a structure under a key, then evict old entries if needed."""
+        arrays = {}
+        for name, item in zip(value._fields, value):
+            arrays[name] = np.asarray([-1 if v is None else v for v in item] if isinstance(item, tuple) else item)
+        self._write(key, lambda fp: np.savez(fp, **arrays))
@@ -1,11 +1,17 @@
 """Ugrid Compliance-Checker Plugin."""
 
+import contextlib
+import os
 import re
+import threading
 import typing
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
 
+import numpy as np
 from compliance_checker.base import BaseCheck
 
-from cc_plugin_ugrid import UgridChecker
+from cc_plugin_ugrid import UgridChecker, cache, connectivity, coordinates, parallel, profiling, registry, topology
+from cc_plugin_ugrid.mesh import LOCATIONS
 
 
 class UgridChecker(UgridChecker):
@@ -21,10 +27,52 @@ class UgridChecker(UgridChecker):
 
     METHODS_REGEX = re.compile(r"(\w+: *\w+) \((\w+: *\w+)\) *")
     PADDING_TYPES = ("none", "low", "high", "both")
-
-    def __init__(self):
-        pass
-
+    MAX_REPORTED = 10  # number of offending elements listed in messages
+
+    def __init__(self, options=None):
+        self.options = options or set()
+        # opt-in: read connectivity arrays and validate their values
+        self.validate_data = "validate_data" in self.options
+        # opt-in: memory-map uncompressed arrays; only for files opened read-only
+        self.memmap = "memmap" in self.options
+        # opt-in: measure time, bytes read and peak memory of each check
+        self.profiling = "profile" in self.options
+        # opt-in: run the checks on a thread pool; "threads=N" for N threads
+        self.workers = None
+        # opt-in: cache results on disk; "cache=DIR" for another directory
+        self.cache = None
+        # bypass the cached results, storing fresh ones
+        self.refresh_cache = "refresh_cache" in self.options
+        # opt-in: reuse the results of meshes unchanged since the last run
+        self.incremental = "incremental" in self.options
+        # opt-in: store derived edges and adjacencies on disk; "derived_cache=DIR" for another directory
+        self.derived_cache = None
+        # opt-in: process the blocks of large arrays on N threads ("chunk_threads=N")
+        self.chunk_threads = 1
+        # bytes of array blocks held at once by data-level checks ("memory_budget=512M"); the
+        # structures derived from whole connectivity arrays (see _mesh_edges, _node_adjacency) are not counted
+        self.memory_budget = parallel.MEMORY_BUDGET
+        for option in self.options:
+            name, _, value = option.partition("=")
+            if name == "threads":
+                self.threads = True
+                self.workers = int(value) if value else None
+            elif name == "cache":
+                self.cache = cache.ResultCache(value or None)
+            elif name == "derived_cache":
+                self.derived_cache = cache.DerivedCache(value or None)
+            elif name == "chunk_threads":
+                self.chunk_threads = int(value) if value else os.cpu_count() or 1
+            elif name == "memory_budget":
+                self.memory_budget = parallel.parse_size(value)
+        # the mesh results share the directory of the result cache, if any
+        self.mesh_cache = (self.cache or cache.ResultCache()) if self.incremental else None
+        self.chunk_size = connectivity.CHUNK_SIZE
+        self.partition_size = coordinates.PARTITION_SIZE
+        # called with (mesh name, check name, Result) as each mesh check completes
+        self.on_result = None
+
+    @registry.check()
     def _check1_topology_dim(self, mesh):
         """Check the dimension of the mesh topology is valid.
 
@@ -35,19 +83,21 @@ class UgridChecker(UgridChecker):
         out_of = 1
         messages = []
         desc = "The topology dimension is the highest dimension of the data"
+        topology_dimension = self.meshes[mesh].topology_dimension
 
-        if not self.meshes[mesh]["topology_dimension"]:
+        if not topology_dimension:
             m = 'Mesh does not contain the required attribute "topology_dimension"'
             messages.append(m)
 
-        if self.meshes[mesh]["topology_dimension"] not in (1, 2, 3):
-            m = f'Invalid topology_dimension "{self.meshes[mesh]["topology_dimension"]}" of type "{type(self.meshes[mesh]["topology_dimension"])}"'
+        if topology_dimension not in (1, 2, 3):
+            m = f'Invalid topology_dimension "{topology_dimension}" of type "{type(topology_dimension)}"'
             messages.append(m)
         else:
             score += 1
 
         return self.make_result(level, score, out_of, desc, messages)
 
+    @registry.check()
     def _check2_connectivity_attrs(self, mesh):
         """Check the connecivity attributes of a given mesh.
 
@@ -64,7 +114,8 @@ class UgridChecker(UgridChecker):
         2 (face), and 3 (volume) dimensional elements. A mesh's connectivity
         array is dependent on the type of connectivity:
             - 1D : edge_node_connectivity required (nEdges, 2)
-            - 2D : face_node_connectivity required (nFaces, 3);
+            - 2D : face_node_connectivity required (nFaces, MaxNumNodesPerFace),
+                   with at least 3 nodes per face;
                    edge_node_connectivity optional
             - 3D : volume_node_connectivity required (nVolumes, MaxNumNodesPerVolume);
                    edge_node_connectivity, face_node_connectivity optional
@@ -76,8 +127,9 @@ class UgridChecker(UgridChecker):
         messages = []
 
         desc = "Interconnectivity: connection between elements in the mesh"
+        topo = self.meshes[mesh]
 
-        if not self.meshes[mesh]["topology_dimension"]:
+        if not topo.topology_dimension:
             m = 'Mesh does not contain the required attribute "topology_dimension", therefore any defined connectivity cannot be verified.'
             messages.append(m)
             out_of += 1
@@ -92,14 +144,14 @@ class UgridChecker(UgridChecker):
         dims = [1, 2, 3]
 
         for _dim, _conn in zip(dims, conns):
-            if (not self.meshes[mesh][_conn]) and (self.meshes[mesh]["topology_dimension"] == _dim):
+            if (not getattr(topo, _conn)) and (topo.topology_dimension == _dim):
                 out_of += 1  # increment out_of, do not increment score
                 m = f'dataset is {_dim}D, so must have "{_conn}"'
                 return self.make_result(level, score, out_of, desc, messages)
 
         # now we test individual connectivities -- here we will be incrementing the score
         for _conn in conns:
-            if self.meshes[mesh][_conn]:
+            if getattr(topo, _conn):
                 # validate the expected attributes match
                 out_of += 1
                 valid, order = self._validate_nc_shape(mesh, _conn)
@@ -109,6 +161,11 @@ class UgridChecker(UgridChecker):
                 if order == "nonstd":
                     self.__check_nonstd_order_dims__(mesh, _conn)
 
+                if valid and self.validate_data:
+                    valid, m = self._validate_nc_values(mesh, _conn, order)
+                    if m:
+                        messages.append(m)
+
                 if valid:
                     score += 1
                 else:  # notify user of invalid array
@@ -120,6 +177,7 @@ class UgridChecker(UgridChecker):
 
         return self.make_result(level, score, out_of, desc, messages)
 
+    @registry.check(after=("_check1_topology_dim", "_check2_connectivity_attrs"))
     def _check3_ncoords_exist(self, mesh):
         """Check node coordinates in a given mesh variable.
 
@@ -142,38 +200,42 @@ class UgridChecker(UgridChecker):
         out_of = 0
         messages = []
         desc = "Node coordinates point to aux coordinate variables representing" + " locations of nodes"
+        topo = self.meshes[mesh]
 
-        self.meshes[mesh]["node_coordinates"] = []
-        if not self.meshes[mesh].get("topology_dimension"):
+        if not topo.topology_dimension:
             msg = "Failed because no topology dimension exists"
             messages.append(msg)
             out_of += 1
             return self.make_result(level, score, out_of, desc, messages)
-        try:
-            ncoords = mesh.node_coordinates.split(" ")
-            if len(ncoords) == self.meshes[mesh].get("topology_dimension"):
-                for nc in ncoords:
-                    out_of += 1
-                    if nc not in self.ds.variables:
-                        self.meshes[mesh]["node_coordinates"].append(nc)
-                        msg = f'Node coordinate "{nc}" in mesh but not in variables'
-                        messages.append(msg)
-                    else:
-                        score += 1
-            else:
-                msg = "The size of mesh's node coordinates does not match" + " the topology dimension ({})".format(
-                    self.meshes[mesh].get("topology_dimension"),
-                )
-                out_of += 1
-                messages.append(msg)
 
-        except AttributeError:
+        if not topo.node_coordinates:
             msg = "This mesh has no node coordinate variables"
             out_of += 1
             messages.append(msg)
+            return self.make_result(level, score, out_of, desc, messages)
+
+        if not isinstance(topo.node_coordinates, str):
+            messages.append("node_coordinates must be a string of variable names")
+            out_of += 1
+            return self.make_result(level, score, out_of, desc, messages)
+
+        ncoords = topo.node_coordinates.split(" ")
+        if len(ncoords) == topo.topology_dimension:
+            for nc in ncoords:
+                out_of += 1
+                if nc not in topo.shapes:
+                    msg = f'Node coordinate "{nc}" in mesh but not in variables'
+                    messages.append(msg)
+                else:
+                    score += 1
+        else:
+            msg = "The size of mesh's node coordinates does not match" + f" the topology dimension ({topo.topology_dimension})"
+            out_of += 1
+            messages.append(msg)
 
         return self.make_result(level, score, out_of, desc, messages)
 
+    @registry.check(requires=("nedges", "nfaces"), after=("_check2_connectivity_attrs",))
     def _check4_edge_face_conn(self, mesh):
         """Check edge_face_connectivity.
 
@@ -187,34 +249,42 @@ class UgridChecker(UgridChecker):
 
         :param netCDF4 variable mesh: mesh variable
         """
-        # NB: Check for start_index, _FillValue?
         level = BaseCheck.LOW
         score = 0
         out_of = 0
         messages = []
         desc = "array of faces sharing the same edge (optional)"
 
-        if (not self.meshes[mesh]["nedges"]) or (not self.meshes[mesh]["nfaces"]):
+        topo = self.meshes[mesh]
+        if (not topo.nedges) or (not topo.nfaces):
             return self.make_result(level, score, out_of, desc, messages)
 
-        try:
-            efc = mesh.getncattr("edge_face_connectivity")
-            out_of += 1
-        except AttributeError:
+        efc = topo.edge_face_connectivity
+        if not efc:
             messages.append("No edge_face_connectivity (optional)")
             return self.make_result(level, score, out_of, desc, messages)
+        out_of += 1
+
         # check if efc has the right shape
-        dim1, dim2 = self.ds.variables[efc].shape  # unpack the tuple
+        shape = topo.shapes.get(efc)
         # compare to nedges or # should be equal to 2
-        if dim1 != self.meshes[mesh]["nedges"].size or dim2 != 2:
+        if shape is None:
+            messages.append(f'edge_face_connectivity variable "{efc}" not in dataset')
+        elif shape != (topo.nedges, 2):
             messages.append(
-                f"Incorrect shape ({dim1}, {dim2}) of edge_face_connectivity array",
+                f"Incorrect shape {shape} of edge_face_connectivity array",
             )
+        elif self.validate_data:
+            errors = self._validate_indices(mesh, "edge_face_connectivity", topo.nfaces, padded=False)
+            messages.extend(errors)
+            if not errors:
+                score += 1
         else:
             score += 1
 
         return self.make_result(level, score, out_of, desc, messages)
 
+    @registry.check(requires=("max_nodes_per_face",), after=("_check2_connectivity_attrs",))
     def _check5_face_edge_conn(self, mesh):
         """Check face_edge_connectivity.
 
@@ -248,6 +318,7 @@ class UgridChecker(UgridChecker):
 
         return self.make_result(level, score, out_of, desc, messages)
 
+    @registry.check(requires=("max_nodes_per_face",), after=("_check2_connectivity_attrs",))
     def _check6_face_face_conn(self, mesh):
         """Check face_face_connectivity.
 
@@ -277,11 +348,368 @@ class UgridChecker(UgridChecker):
 
         return self.make_result(level, score, out_of, desc, messages)
 
+    @registry.check(
+        requires=("nnodes", "nedges", "nfaces", "edge_face_connectivity"),
+        options=("validate_data",),
+        after=("_check4_edge_face_conn",),
+    )
+    def _check7_edge_face_topology(self, mesh):
+        """Check edge_face_connectivity against face_node_connectivity.
+
+        Only run when data-level validation is enabled. Every face listed for
+        an edge must have the edge's two nodes as consecutive nodes in
+        face_node_connectivity, and the number of faces listed must equal the
+        number of faces sharing the edge. Edges are matched through a sorted
+        index of packed node pairs (see ``_mesh_edges``), so the check is
+        O(n log n).
+
+        Dependent on edge_node_connectivity and face_node_connectivity having
+        valid shapes, and on the shape verified by _check4_edge_face_conn.
+
+        :param netCDF4 variable mesh: mesh variable
+        """
+        level = BaseCheck.LOW
+        score = 0
+        out_of = 0
+        messages = []
+        desc = "faces sharing an edge match face_node_connectivity (optional)"
+
+        topo = self.meshes[mesh]
+        efc = topo.edge_face_connectivity
+        if (
+            not self.validate_data
+            or not efc
+            or topo.nnodes is None
+            or not topo.orders.get("edge_node_connectivity")
+            or not topo.orders.get("face_node_connectivity")
+            or topo.shapes.get(efc) != (topo.nedges, 2)
+        ):
+            return self.make_result(level, score, out_of, desc, messages)
+        out_of += 1
+
+        edges = self._mesh_edges(mesh)
+        nbad, first = self._mismatches(
+            mesh,
+            ("edge_node_connectivity", "edge_face_connectivity"),
+            lambda _, enc, efc: edges.edge_face_mismatches(enc, efc),
+        )
+        if nbad:
+            messages.append(f"{nbad} edges of edge_face_connectivity do not match face_node_connectivity (first: {first})")
+        else:
+            score += 1
+
+        return self.make_result(level, score, out_of, desc, messages)
+
+    @registry.check(
+        requires=("nnodes", "node_coordinates"),
+        options=("validate_data",),
+        after=("_check3_ncoords_exist",),
+    )
+    def _check8_node_coordinate_values(self, mesh):
+        """Check the values of the node coordinates.
+
+        Only run when data-level validation is enabled. Node coordinates must
+        be finite, latitudes and longitudes (recognized by their
+        standard_name or units) within their valid ranges, and no two nodes
+        may share the same position. The coordinates are read in blocks of
+        at most ``self.chunk_size`` values, and duplicates are searched in
+        hash partitions of at most ``self.partition_size`` nodes, so memory
+        use is bounded whatever the number of nodes.
+
+        Dependent on the node coordinate variables verified by
+        _check3_ncoords_exist.
+
+        :param netCDF4 variable mesh: mesh variable
+        """
+        level = BaseCheck.MEDIUM
+        score = 0
+        out_of = 0
+        messages = []
+        desc = "Node coordinates are finite, within range and unique (optional)"
+
+        topo = self.meshes[mesh]
+        names = self._node_coordinate_names(mesh)
+        if not names or any(topo.shapes.get(name) != (topo.nnodes,) for name in names):
+            return self.make_result(level, score, out_of, desc, messages)
+        variables = [self.reader[name] for name in names]
+
+        out_of += 2
+        errors = coordinates.value_errors(variables, self.chunk_size)
+        nonfinite = [(name, n, first) for name, (n, _, first) in zip(names, errors) if n]
+        out_of_range = [(name, n, first) for name, (_, n, first) in zip(names, errors) if n]
+        for name, n, first in nonfinite:
+            messages.append(f"{n} non-finite values in node coordinate {name} (first in node {first})")
+        for name, n, first in out_of_range:
+            messages.append(f"{n} out of range values in node coordinate {name} (first in node {first})")
+        score += not nonfinite
+        score += not out_of_range
+
+        out_of += 1
+        ndup, pairs = coordinates.duplicate_nodes(variables, self.chunk_size, self.partition_size, self.MAX_REPORTED)
+        if ndup:
+            messages.append(f"{ndup} nodes share their position with another node (first: {pairs})")
+        else:
+            score += 1
+
+        return self.make_result(level, score, out_of, desc, messages)
+
+    @registry.check(after=("_check2_connectivity_attrs",), cacheable=False)
+    def _check9_data_variable_binding(self, mesh):
+        """Check the data variables bound to a mesh.
+
+        Every variable whose ``mesh`` attribute names this mesh must have a
+        ``location`` attribute (node, edge, face or volume) naming an element
+        of the mesh, and must span the dimension of that element, so that its
+        values can be mapped onto the mesh. The bound variables are found
+        once for all meshes by ``find_data_variables`` in ``setup``, and each
+        is checked against the element dimensions of ``MeshTopology``, so the
+        dataset is not scanned again for each mesh.
+
+        Dependent on the connectivity arrays checked by
+        _check2_connectivity_attrs, which define the element dimensions.
+
+        :param netCDF4 variable mesh: mesh variable
+        """
+        level = BaseCheck.MEDIUM
+        score = 0
+        out_of = 0
+        messages = []
+        desc = "Data variables have a location on the mesh and its dimension"
+
+        topo = self.meshes[mesh]
+        errors = []
+        for var in self.bindings.get(mesh.name, ()):
+            out_of += 1
+            if var.location is None:
+                errors.append(f'Variable "{var.name}" has a mesh but no location attribute')
+            elif var.location not in LOCATIONS:
+                errors.append(f'Invalid location "{var.location}" of variable "{var.name}"')
+            elif var.location not in topo.dimensions:
+                errors.append(f'Variable "{var.name}" is located on {var.location}s, which are not defined by the mesh')
+            elif topo.dimensions[var.location][0] not in var.dimensions:
+                errors.append(
+                    f'Variable "{var.name}" is located on {var.location}s but lacks their dimension "{topo.dimensions[var.location][0]}"',
+                )
+            else:
+                score += 1
+        messages.extend(errors[: self.MAX_REPORTED])
+        if len(errors) > self.MAX_REPORTED:
+            messages.append(f"... and {len(errors) - self.MAX_REPORTED} more variables")
+
+        return self.make_result(level, score, out_of, desc, messages)
+
+    @registry.check(
+        requires=("nnodes", "nfaces", "face_node_connectivity"),
+        options=("validate_data",),
+        after=("_check2_connectivity_attrs",),
+    )
+    def _check10_degenerate_faces(self, mesh):
+        """Check the faces are neither degenerate nor duplicated.
+
+        Only run when data-level validation is enabled. A face must not list
+        a node twice, must have at least 3 distinct nodes, and no two faces
+        may have the same set of nodes; padding with _FillValue and indices
+        out of range are not nodes (the range is checked by
+        _check2_connectivity_attrs). The nodes of each face are sorted
+        row-wise in blocks of at most ``self.chunk_size`` values, on
+        ``self.chunk_threads`` threads with at most ``self.memory_budget``
+        bytes of blocks held at once, and duplicates are searched in hash
+        partitions of at most ``self.partition_size`` faces (see
+        ``topology.face_defects``), so the check is O(n log n) in time and
+        memory use is bounded.
+
+        Dependent on face_node_connectivity having a valid shape, verified
+        by _check2_connectivity_attrs.
+
+        :param netCDF4 variable mesh: mesh variable
+        """
+        level = BaseCheck.MEDIUM
+        score = 0
+        out_of = 0
+        messages = []
+        desc = "Faces have distinct nodes and are not duplicated (optional)"
+
+        topo = self.meshes[mesh]
+        order = topo.orders.get("face_node_connectivity")
+        if not order:
+            return self.make_result(level, score, out_of, desc, messages)
+        var = self.reader[topo.face_node_connectivity]
+        axis = 1 if order == "nonstd" else 0
+
+        out_of += 3
+        chunk_size, inflight = parallel.plan(var.dtype.itemsize, self.chunk_size, self.memory_budget)
+        defects = topology.face_defects(
+            lambda: connectivity.iter_indices(var, axis, chunk_size),
+            topo.nfaces,
+            self.partition_size,
+            self.MAX_REPORTED,
+            nnodes=topo.nnodes,
+            workers=self.chunk_threads,
+            inflight=inflight,
+        )
+        for (n, first), m in zip(
+            defects,
+            ("faces list a node more than once", "faces have fewer than 3 distinct nodes", "faces have the same nodes as another face"),
+        ):
+            if n:
+                messages.append(f"{n} {m} (first: {first})")
+            else:
+                score += 1
+
+        return self.make_result(level, score, out_of, desc, messages)
+
+    @registry.check(
+        requires=("nnodes", "nfaces", "face_node_connectivity", "node_coordinates"),
+        options=("validate_data",),
+        after=("_check3_ncoords_exist",),
+    )
+    def _check11_face_winding(self, mesh):
+        """Check the nodes of each face are listed anticlockwise.
+
+        Only run when data-level validation is enabled, on meshes with two
+        node coordinates. The signed area of each face is computed with the
+        shoelace formula from its node coordinates, x being the longitude
+        (or the "X" axis) whatever the order of node_coordinates, with
+        longitude differences wrapped to [-180, 180). It must be positive:
+        faces listed clockwise or with zero area are reported. Faces are read
+        in blocks of at most ``self.chunk_size`` values and processed on
+        ``self.chunk_threads`` threads. The node coordinates are read once if
+        they fit in half of ``self.memory_budget``; otherwise those of the
+        nodes of each block of faces are read with the block (see
+        ``coordinates.gather_nodes``).
+
+        Dependent on the node coordinate variables verified by
+        _check3_ncoords_exist, and on face_node_connectivity having a valid
+        shape.
+
+        :param netCDF4 variable mesh: mesh variable
+        """
+        level = BaseCheck.MEDIUM
+        score = 0
+        out_of = 0
+        messages = []
+        desc = "Face nodes are listed anticlockwise (optional)"
+
+        topo = self.meshes[mesh]
+        order = topo.orders.get("face_node_connectivity")
+        names = self._node_coordinate_names(mesh)
+        if not order or len(names) != 2 or any(topo.shapes.get(name) != (topo.nnodes,) for name in names):
+            return self.make_result(level, score, out_of, desc, messages)
+        variables, wrap = coordinates.horizontal_axes([self.reader[name] for name in names])
+        var = self.reader[topo.face_node_connectivity]
+
+        out_of += 2
+        nbytes = topo.nnodes * 8 * len(variables)
+        if nbytes <= self.memory_budget // 2:  # all the coordinates fit: read them once
+            nodes, budget, itemsize = coordinates.read_nodes(variables, self.chunk_size), self.memory_budget - nbytes, var.dtype.itemsize
+        else:  # gather the coordinates of the nodes of each block of faces
+            nodes, budget, itemsize = variables, self.memory_budget, var.dtype.itemsize + 8 * (1 + len(variables))
+        chunk_size, inflight = parallel.plan(itemsize, self.chunk_size, budget)
+        (nclockwise, clockwise), (nzero, zero) = coordinates.winding_errors(
+            connectivity.iter_indices(var, 1 if order == "nonstd" else 0, chunk_size),
+            nodes,
+            wrap=wrap,
+            max_reported=self.MAX_REPORTED,
+            workers=self.chunk_threads,
+            inflight=inflight,
+            chunk_size=chunk_size,
+        )
+        if nclockwise:
+            messages.append(f"{nclockwise} faces have their nodes listed clockwise (first: {clockwise})")
+        else:
+            score += 1
+        if nzero:
+            messages.append(f"{nzero} faces have zero area (first: {zero})")
+        else:
+            score += 1
+
+        return self.make_result(level, score, out_of, desc, messages)
+
+    @registry.check(requires=("nvolumes",), after=("_check2_connectivity_attrs",))
+    def _check12_volume_topology(self, mesh):
+        """Check the shape types and the face/volume adjacency of volumes.
+
+        The optional volume_shape_type, volume_face_connectivity and
+        volume_volume_connectivity variables must have one row per volume,
+        in either dimension order. With data-level validation enabled:
+
+            - every volume has the number of nodes of its shape type
+              (tetrahedron 4, pyramid 5, wedge 6, hexahedron 8), the shape
+              names being given by the flag_values and flag_meanings of the
+              volume_shape_type variable;
+            - the neighbors listed in volume_volume_connectivity are the
+              volumes sharing a face of volume_face_connectivity, and no face
+              is shared by more than two volumes.
+
+        The arrays are read in blocks of at most ``self.chunk_size`` values,
+        and the adjacency is derived in partitions of at most
+        ``self.partition_size`` volumes (see ``topology.volume_adjacency_errors``),
+        so memory use does not grow with the number of volumes.
+
+        Dependent on volume_node_connectivity having a valid shape, verified
+        by _check2_connectivity_attrs.
+
+        :param netCDF4 variable mesh: mesh variable
+        """
+        level = BaseCheck.MEDIUM
+        desc = "Volume shape types and adjacency are consistent with the volumes (optional)"
+
+        score, out_of, messages = self.__check_volume_shapes__(mesh)
+        _score, _out_of, _messages = self.__check_volume_adjacency__(mesh)
+
+        return self.make_result(level, score + _score, out_of + _out_of, desc, messages + _messages)
+
+    @registry.check(
+        requires=("nnodes",),
+        options=("validate_data",),
+        after=("_check2_connectivity_attrs",),
+    )
+    def _check13_connected_nodes(self, mesh):
+        """Check every node belongs to an element and the mesh is in one piece.
+
+        Only run when data-level validation is enabled. Every node of the
+        node coordinates must be referenced by an edge, face or volume, and
+        the nodes must all be connected through the elements. Both are read
+        from the sparse node adjacency of the mesh (see ``_node_adjacency``):
+        the unreferenced nodes have no neighbor, and the disconnected parts
+        are its connected components, labelled by a vectorized union-find.
+
+        Dependent on a node connectivity having a valid shape, verified by
+        _check2_connectivity_attrs.
+
+        :param netCDF4 variable mesh: mesh variable
+        """
+        level = BaseCheck.MEDIUM
+        score = 0
+        out_of = 0
+        messages = []
+        desc = "Every node belongs to an element and the mesh is connected (optional)"
+
+        adjacency = self._node_adjacency(mesh)
+        if adjacency is None:
+            return self.make_result(level, score, out_of, desc, messages)
+
+        out_of += 2
+        used = adjacency.degrees > 0
+        orphans = np.flatnonzero(~used)
+        if orphans.size:
+            messages.append(f"{orphans.size} nodes are not part of any edge, face or volume (first: {orphans[: self.MAX_REPORTED].tolist()})")
+        else:
+            score += 1
+
+        parts = np.unique(adjacency.components()[used])
+        if parts.size > 1:
+            messages.append(f"The mesh has {parts.size} disconnected parts (first node of each: {parts[: self.MAX_REPORTED].tolist()})")
+        else:
+            score += 1
+
+        return self.make_result(level, score, out_of, desc, messages)
+
     def check_run(self, _):
         """Check run.
 
         Loop through meshes of the dataset and perform the UGRID standard
-        checks on them. Each mesh is a dict of {mesh: {attr: val, ...}}
+        checks on them. Each mesh is a dict of {mesh: MeshTopology}
 
         Parameters
         ----------
@@ -294,35 +722,177 @@ class UgridChecker(UgridChecker):
             but still needs a place to go so this method doesn't break; it is
             'absorbed' by this placeholder.
 
+        With the ``cache`` option, results are looked up in and stored to
+        ``self.cache`` (see ``cc_plugin_ugrid.cache``); a hit returns the
+        stored results without running any check. With the ``incremental``
+        option, the results of each mesh are reused as long as the mesh is
+        unchanged (see ``restore_mesh_results``).
+
         Returns
         -------
         ret_vals : list
             Results of the check methods that have been run
 
         """
+        key = None
+        if self.cache is not None:
+            key = cache.fingerprint(self.ds, self.options)
+            cached = None if key is None or self.refresh_cache else self.cache.get(key)
+            if cached is not None:
+                return cached
+
         level = BaseCheck.HIGH
         score = 0
         out_of = 1
         messages = []
         desc = "Run UGRID checks if mesh variables are present in the data"
         ret_vals = []
+        messages.extend(self.__check_unknown_meshes__())
         if self.meshes:
             score += 1
-            for mesh in self.meshes:
-                for _, check in self.yield_checks():
-                    _ = check(mesh)
-                    ret_vals.append(check(mesh))
+            stored = self.restore_mesh_results() if self.incremental else {}
+            if self.threads:
+                ret_vals.extend(self.run_threaded())
+            else:
+                for mesh in self.meshes:
+                    for name, check in self.yield_checks(mesh):
+                        ret_vals.append(self.run_mesh_check(mesh, name, check))
+                        self._report(mesh.name, name)
+            for mesh, mesh_key in stored.items():
+                self.mesh_cache.put(mesh_key, [self._results[(mesh.name, name)] for name in self.cacheable_checks(mesh)])
         else:
             msg = "No mesh variables are detected in the data; all checks fail."
             messages.append(msg)
         ret_vals.append(self.make_result(level, score, out_of, desc, messages))
+        if key is not None:
+            self.cache.put(key, ret_vals)
         return ret_vals
 
-    def yield_checks(self):
-        """Iterate checks."""
-        for name in sorted(dir(self)):
-            if name.startswith("_check"):
-                yield name, getattr(self, name)
+    def restore_mesh_results(self):
+        """Reuse the results of the meshes unchanged since they were last checked.
+
+        Each mesh is keyed by ``cache.mesh_fingerprint``, which covers the
+        metadata of the variables the mesh points to and of their fixed-size
+        dimensions, but not their values, the other variables nor the size of
+        unlimited dimensions: appending records to a file keeps its mesh
+        results, and the key is computed without reading any array. After
+        rewriting mesh values in place, use ``refresh_cache``.
+
+        :returns dict: {mesh: key} of the meshes whose results were not found
+                       and must be stored once checked
+        """
+        missing = {}
+        for mesh, topo in self.meshes.items():
+            key = cache.mesh_fingerprint(self.ds, topo, self.options)
+            names = self.cacheable_checks(mesh)
+            results = None if self.refresh_cache else self.mesh_cache.get(key)
+            if results is not None and len(results) == len(names):
+                self._results.update({(mesh.name, name): r for name, r in zip(names, results)})
+            else:
+                missing[mesh] = key
+        return missing
+
+    def run_mesh_check(self, mesh, name, check):
+        """Run a single check on a mesh, memoizing the result.
+
+        Each (mesh, check) pair is run at most once per call to ``setup()``;
+        subsequent calls return the cached ``Result``. With the ``profile``
+        option, the run is measured and recorded in ``self.profile``.
+
+        :param netCDF4 variable mesh: mesh variable
+        :param str name             : name of the check method
+        :param callable check       : bound check method
+        """
+        key = (mesh.name, name)
+        if key not in self._results:
+            if self.profile is None:
+                self._results[key] = check(mesh)
+            else:
+                self._results[key] = self.profile.run(mesh.name, name, check, mesh, reader=self.reader)
+        return self._results[key]
+
+    def run_threaded(self):
+        """Run the checks of all meshes on a thread pool.
+
+        A check is submitted as soon as the checks it depends on (see
+        ``cc_plugin_ugrid.registry``) have completed on the same mesh, so
+        the meshes, and the independent checks of a mesh, run concurrently.
+        NumPy and HDF5 release the GIL, and the reads of the shared dataset
+        are serialized by ``self.reader``.
+
+        :returns list: the results, in the same order as a sequential run
+        """
+        order = [(mesh, name, check) for mesh in self.meshes for name, check in self.yield_checks(mesh)]
+        specs = {spec.name: spec for batch in registry.schedule(type(self)) for spec in batch}
+        names = {(mesh.name, name) for mesh, name, _ in order}
+        done = {key for key in names if key in self._results}
+        waiting = []
+        for mesh, name, check in order:
+            if (mesh.name, name) in done:
+                self._report(mesh.name, name)
+            else:
+                waiting.append((mesh, name, check))
+        running = {}
+        with profiling.trace_memory() if self.profile is not None else contextlib.nullcontext(), ThreadPoolExecutor(self.workers) as pool:
+            while waiting or running:
+                for item in list(waiting):
+                    mesh, name, check = item
+                    after = {(mesh.name, dep) for dep in specs[name].after} & names
+                    if after <= done:
+                        waiting.remove(item)
+                        running[pool.submit(self.run_mesh_check, mesh, name, check)] = (mesh.name, name)
+                finished, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    future.result()  # re-raise errors of the check
+                    key = running.pop(future)
+                    done.add(key)
+                    self._report(*key)
+        return [self._results[(mesh.name, name)] for mesh, name, _ in order]
+
+    def _report(self, mesh_name, name):
+        """Pass the result of a mesh check to ``self.on_result``, if set."""
+        if self.on_result is not None:
+            self.on_result(mesh_name, name, self._results[(mesh_name, name)])
+
+    def yield_checks(self, mesh=None):
+        """Iterate checks in dependency order.
+
+        The order is given by the DAG of the checks' declared dependencies
+        (see ``cc_plugin_ugrid.registry``), not by their names.
+
+        :param netCDF4 variable mesh: if given, only the checks whose inputs
+                                      are present in this mesh are yielded
+
+        :returns generator of (str, bound method)
+        """
+        topo = None if mesh is None else self.meshes[mesh]
+        for batch in registry.schedule(type(self)):
+            for spec in batch:
+                if topo is None or spec.applies(self, topo):
+                    yield spec.name, getattr(self, spec.name)
+
+    def __check_unknown_meshes__(self):
+        """Report the data variables whose mesh attribute names no mesh topology.
+
+        :returns list of str: one message per unknown mesh
+        """
+        names = {mesh.name for mesh in self.meshes}
+        messages = []
+        for name, variables in self.bindings.items():
+            if name not in names:
+                listed = ", ".join(var.name for var in variables[: self.MAX_REPORTED])
+                more = len(variables) - self.MAX_REPORTED
+                messages.append(
+                    f'Mesh "{name}" referenced by {listed}{f" and {more} more" if more > 0 else ""} is not a mesh topology variable',
+                )
+        return messages
+
+    def cacheable_checks(self, mesh):
+        """Return the names of the checks of a mesh whose results may be reused.
+
+        :param netCDF4 variable mesh: mesh variable
+        """
+        return [name for name, check in self.yield_checks(mesh) if getattr(check, "check_spec", registry.CheckSpec(name)).cacheable]
 
     def __check_edge_face_coords__(self, mesh, cty):
         """Check the edge[face] coordinates of a given mesh.
@@ -341,12 +911,11 @@ class UgridChecker(UgridChecker):
 
         :param netCDF4 variable mesh: mesh variable
         :param str cty              : node connectivity type; one of
-                                      edge_node_connectivity or
-                                      face_node_connctivity
+                                      edge_node_connectivity,
+                                      face_node_connctivity or
+                                      volume_node_connectivity
 
         """
-        # NB: Implement fully 3D volume checks.
-
         level = BaseCheck.LOW
         score = 0
         out_of = 1
@@ -356,30 +925,33 @@ class UgridChecker(UgridChecker):
         coordmap = {
             "edge_node_connectivity": "edge_coordinates",
             "face_node_connectivity": "face_coordinates",
+            "volume_node_connectivity": "volume_coordinates",
         }
 
         varmap = {
             "edge_coordinates": "nedges",
             "face_coordinates": "nfaces",
+            "volume_coordinates": "nvolumes",
         }
 
+        topo = self.meshes[mesh]
         # do(es) the mesh(es) have appropriate connectivity? If not, pass
-        if not self.meshes[mesh][cty]:
+        if not getattr(topo, cty):
             messages.append(f"No {cty}?")
             return self.make_result(level, score, out_of, desc, messages)
 
         # first ensure the _coordinates variable exists
         _c = coordmap[cty]
-        try:
-            coords = mesh.getncattr(_c)
-        except AttributeError:
+        coords = getattr(topo, _c)
+        if not coords:
             messages.append("Optional attribute, not required")
             return self.make_result(level, score, out_of, desc, messages)
 
         # if it exists, verify its length is equivalent to nedges
         for coord in coords.split(" "):  # split the string
-            _coord_len = len(self.ds.variables[coord])
-            _dim_len = len(self.ds.dimensions[varmap[_c]])
+            shape = topo.shapes.get(coord)
+            _coord_len = shape[0] if shape else None
+            _dim_len = getattr(topo, varmap[_c])
             if _coord_len != _dim_len:
                 m = f"{_c} should have length of {varmap[_c]}"
                 messages.append(m)
@@ -392,7 +964,8 @@ class UgridChecker(UgridChecker):
         """Check for the optional variable/attribute.
 
         Check for the optional of face_edge_connectivity orface_face_connectivity
-        and verifies the shape.
+        and verifies the shape. With data-level validation enabled, the values
+        are also compared with the adjacency derived from face_node_connectivity.
 
         :param netCDF4 variable mesh: mesh variable
         :param str cty              : connectivity type; one of face_edge or
@@ -400,45 +973,193 @@ class UgridChecker(UgridChecker):
 
         :returns bool, int, str
         """
-        # NB: check for start_index, _FillValue?
-
         valid = False
         _out_of = 0
         m = ""
 
-        try:
-            mnpf = self.ds.dimensions.get("maxnumnodesperface")
-        except AttributeError:  # skip
+        topo = self.meshes[mesh]
+        mnpf = topo.max_nodes_per_face
+        if mnpf is None:  # skip
             return valid, _out_of, ""
 
-        if not self.meshes[mesh]["nfaces"]:
+        if not topo.nfaces:
             m += "Number of faces (nfaces) not defined"
             return valid, _out_of, m
 
-        try:
-            _c = mesh.getncattr(cty)
-            _out_of += 1
-        except AttributeError:
+        _c = getattr(topo, cty)
+        if not _c:
             m += f"No {cty} (optional)"
             return valid, _out_of, m
+        _out_of += 1
 
         # check if right shape
-        dim1, dim2 = self.ds.variables[_c].shape  # unpack the tuple
+        shape = topo.shapes.get(_c)
         # compare to nfaces
-        if dim1 != self.meshes[mesh]["nfaces"].size or dim2 != mnpf.size:
-            m += f"Incorrect shape ({dim1}, {dim2}) of {cty} array"
+        if shape is None:
+            m += f'{cty} variable "{_c}" not in dataset'
+        elif shape != (topo.nfaces, mnpf):
+            m += f"Incorrect shape {shape} of {cty} array"
+        elif self.validate_data:
+            nindices = topo.nedges if cty == "face_edge_connectivity" else topo.nfaces
+            errors = self._validate_indices(mesh, cty, nindices, padded=cty == "face_edge_connectivity")
+            valid, msg = self._validate_face_adjacency(mesh, cty)
+            m += "; ".join([*errors, msg] if msg else errors)
+            valid = valid and not errors
         else:
             valid = True
 
         return valid, _out_of, m
 
+    def _volume_axis(self, mesh, name):
+        """Return the axis of a volume variable indexing the volumes.
+
+        :param netCDF4 variable mesh: mesh variable
+        :param str name             : name of a volume_face_connectivity or
+                                      volume_volume_connectivity variable
+
+        :returns int: 0 or 1, None if the variable has no volume dimension
+        """
+        dim, _ = self.meshes[mesh].dimensions["volume"]
+        var = self.ds.variables.get(name)
+        if var is None or var.ndim != 2 or dim not in var.dimensions:
+            return None
+        return var.dimensions.index(dim)
+
+    def __check_volume_shapes__(self, mesh):
+        """Check the volume_shape_type of a mesh against its volumes.
+
+        :param netCDF4 variable mesh: mesh variable
+
+        :returns int, int, list: score, out_of and messages
+        """
+        score = 0
+        out_of = 0
+        messages = []
+
+        topo = self.meshes[mesh]
+        name = topo.volume_shape_type
+        if not name:
+            return score, out_of, messages
+        out_of += 1
+        shape = topo.shapes.get(name)
+        if shape != (topo.nvolumes,):
+            messages.append(f'volume_shape_type variable "{name}" must have shape ({topo.nvolumes},), not {shape}')
+            return score, out_of, messages
+        score += 1
+        if not self.validate_data:
+            return score, out_of, messages
+
+        out_of += 1
+        var = self.reader[name]
+        attrs = var.ncattrs()
+        nodes, unknown = topology.volume_shape_nodes(
+            var.getncattr("flag_values") if "flag_values" in attrs else [],
+            var.getncattr("flag_meanings") if "flag_meanings" in attrs else "",
+        )
+        if unknown:
+            messages.append(f"Unknown volume shapes in flag_meanings of {name}: {', '.join(unknown)}")
+        volumes = self.reader[topo.volume_node_connectivity]
+        axis = 1 if topo.orders["volume_node_connectivity"] == "nonstd" else 0
+        chunk_size, inflight = parallel.plan(volumes.dtype.itemsize, self.chunk_size, self.memory_budget)
+
+        def blocks():
+            for offset, block in connectivity.iter_indices(volumes, axis, chunk_size):
+                yield offset, (block, np.asarray(var[offset : offset + len(block)]))
+
+        (nwrong, wrong), (nunknown, first) = topology.node_count_errors(
+            blocks(),
+            nodes,
+            max_reported=self.MAX_REPORTED,
+            workers=self.chunk_threads,
+            inflight=inflight,
+        )
+        if nwrong:
+            messages.append(f"{nwrong} volumes do not have the number of nodes of their shape type (first: {wrong})")
+        if nunknown:
+            messages.append(f"{nunknown} volumes have a shape type not listed in the flag_meanings of {name} (first: {first})")
+        if not (nwrong or nunknown or unknown):
+            score += 1
+        return score, out_of, messages
+
+    def __check_volume_adjacency__(self, mesh):
+        """Check the volume_face_connectivity and volume_volume_connectivity of a mesh.
+
+        :param netCDF4 variable mesh: mesh variable
+
+        :returns int, int, list: score, out_of and messages
+        """
+        score = 0
+        out_of = 0
+        messages = []
+
+        topo = self.meshes[mesh]
+        axes = {}
+        for cty in ("volume_face_connectivity", "volume_volume_connectivity"):
+            name = getattr(topo, cty)
+            if not name:
+                continue
+            out_of += 1
+            axes[cty] = self._volume_axis(mesh, name)
+            if axes[cty] is None:
+                messages.append(f'{cty} variable "{name}" must have the volume dimension, shape {topo.shapes.get(name)}')
+            else:
+                score += 1
+        if not self.validate_data or None in axes.values() or not axes:
+            return score, out_of, messages
+
+        out_of += 1
+        valid, _messages = self._validate_volume_adjacency(mesh, axes)
+        messages.extend(_messages)
+        if valid:
+            score += 1
+        return score, out_of, messages
+
+    def _validate_volume_adjacency(self, mesh, axes):
+        """Validate the values of the volume face and volume volume connectivities.
+
+        Only run when data-level validation is enabled (``validate_data``).
+        The indices must be in range (faces only if the number of faces is
+        known, see ``_validate_indices``), and if both variables are given, the listed neighbors must
+        be the volumes sharing a face.
+
+        :param netCDF4 variable mesh: mesh variable
+        :param dict axes            : {connectivity type: axis indexing the volumes}
+
+        :returns bool, list: indicator if valid and messages
+        """
+        topo = self.meshes[mesh]
+        variables = {cty: self.reader[getattr(topo, cty)] for cty in axes}
+        sizes = {"volume_face_connectivity": topo.nfaces, "volume_volume_connectivity": topo.nvolumes}
+        messages = []
+        for cty in variables:
+            messages.extend(self._validate_indices(mesh, cty, sizes[cty], padded=cty == "volume_face_connectivity", axis=axes[cty]))
+        valid = not messages
+
+        if len(variables) < len(sizes):
+            return valid, messages
+        faces, neighbors = variables["volume_face_connectivity"], variables["volume_volume_connectivity"]
+        (nshared, shared), (nmismatched, mismatched) = topology.volume_adjacency_errors(
+            lambda start, stop: connectivity.read_rows(faces, start, stop, axes["volume_face_connectivity"]),
+            lambda start, stop: connectivity.read_rows(neighbors, start, stop, axes["volume_volume_connectivity"]),
+            topo.nvolumes,
+            self.partition_size,
+            chunk_size=self.chunk_size,
+            max_reported=self.MAX_REPORTED,
+        )
+        if nshared:
+            messages.append(f"{nshared} faces are shared by more than two volumes (first: {shared})")
+        if nmismatched:
+            messages.append(f"{nmismatched} volumes do not list the volumes sharing their faces as neighbors (first: {mismatched})")
+        return valid and not (nshared or nmismatched), messages
+
     def __check_nonstd_order_dims__(self, mesh, cty):
         """Check nonstd order dims.
 
         If a connectivity variable pointed to by edge_node_connectivity,
-        face_node_connectivity has dimensions listed in non-standard order,
-        the appropriate dimension variable must also exist. Respectively
-        edge_dimension and face_dimension.
+        face_node_connectivity or volume_node_connectivity has dimensions
+        listed in non-standard order, the appropriate dimension variable must
+        also exist. Respectively edge_dimension, face_dimension and
+        volume_dimension.
 
         :param netCDF4 variable mesh: mesh variable being checked
         :param str cty              : node connectivity type
@@ -451,6 +1172,7 @@ class UgridChecker(UgridChecker):
         dim_map = {  # map to correct dimension requirement
             "edge_node_connectivity": "edge_dimension",
             "face_node_connectivity": "face_dimension",
+            "volume_node_connectivity": "volume_dimension",
         }
 
         desc = f"{dim_map[cty]} required when dimension orderomg of {cty} vars is non-standard order."
@@ -484,17 +1206,14 @@ class UgridChecker(UgridChecker):
         # TODO: Find an example of non-standard face_edge_connectivity
 
         """
-        try:
-            # assign the value of *_dimension, as described above
-            self.meshes[mesh][dim_var] = self.ds.dimensions[mesh.getncattr(dim_var)]
-        except AttributeError:
+        dim = getattr(self.meshes[mesh], dim_var)
+        if dim is None:
             msg = f"Mesh does not contain {dim_var}, required when connectivity in non-standard order."
             return False, msg
-        except KeyError:
+        if dim not in self.ds.dimensions:
             msg = "Edge dimension defined in mesh, not defined in dataset dimensions."
             return False, msg
-        else:
-            return True, None
+        return True, None
 
     def _validate_nc_shape(self, mesh, cty):
         """Validate shape of the nc object.
@@ -502,10 +1221,12 @@ class UgridChecker(UgridChecker):
         For each mesh ensure the array that the edge/face/node_connectivity variable
         points to has shape of:
             (nEdges, 2) or (2, nEdges) if irregularly ordered # edge_node
-            (nFaces, 3) or (3, nFaces) # face_node_conn
+            (nFaces, MaxNumNodesPerFace) or (MaxNumNodesPerFace, nFaces) # face_node_conn
             (nVolumes, MaxNumNodesPerVolume) or (MaxNumNodesPerVolume, nVolumes)
-        This assumes that the dataset has dimensions defined for the number of
-        edges, faces, volumes, and max number of nodes per volume.
+        The element dimensions are the ones named by edge_dimension,
+        face_dimension and volume_dimension (nedges, nfaces and nvolumes by
+        default). A face has at least 3 nodes and a volume at least 4; rows of
+        smaller elements are padded with _FillValue.
 
 
         :param netCDF4 object mesh: mesh variable
@@ -516,47 +1237,314 @@ class UgridChecker(UgridChecker):
 
         :returns bool: indicator if valid shape and if 'regular' ordering
         """
-        try:
-            if cty not in (
-                "edge_node_connectivity",
-                "face_node_connectivity",
-                "volume_node_connectivity",
-            ):
-                return False, None  # should never get this, right?
-            conn_array_name = mesh.getncattr(cty)
-        except AttributeError:
-            return False, None
-
-        # use name of array to get that variable from the dataset
-        _array = self.ds.variables.get(conn_array_name)
-        _d1name, _d2name = _array.dimensions  # tuple of strings
-        dim1 = self.ds.dimensions[_d1name]  # access the dimension objects
-        dim2 = self.ds.dimensions[_d2name]
-
-        # check against dimensions of dataset
-        if dim1.name not in self.ds.dimensions or dim2.name not in self.ds.dimensions:
-            return False, None
-
-        # determine ordering
-        # NOTE how I check dim2.size; if dim2 does happen to be the "3" variable,
-        # it could be called literally whatever the modeler wants. What's important is
-        # the size. This could be said for the n(Edges)Faces dimension, but this is not
-        # assumed as some sort of standard must be applied
-
-        if cty == "edge_node_connectivity":
-            _dim1 = "nedges"
-            _dim2size = 2
-        elif cty == "face_node_connectivity":
-            _dim1 = "nfaces"
-            _dim2size = 3
+        if cty not in (
+            "edge_node_connectivity",
+            "face_node_connectivity",
+            "volume_node_connectivity",
+        ):
+            return False, None  # should never get this, right?
+
+        # the ordering was determined when the mesh topology was built;
+        # see cc_plugin_ugrid.mesh.connectivity_order and volume_order
+        order = self.meshes[mesh].orders.get(cty)
+        return order is not None, order
+
+    def _validate_nc_values(self, mesh, cty, order):
+        """Validate the values of a connectivity array.
+
+        Only run when data-level validation is enabled (``validate_data``).
+        Every entry must lie within ``[start_index, start_index + nNodes)`` or
+        equal ``_FillValue``, fill values may only pad the end of each row,
+        and the attributes must be valid (see ``_validate_indices``).
+
+        :param netCDF4 object mesh: mesh variable
+        :param str cty            : node connectivity type
+        :param str order          : "regular" or "nonstd", as returned by
+                                    _validate_nc_shape
+
+        :returns bool, str: indicator if valid and a message (None if valid)
+        """
+        topo = self.meshes[mesh]
+        if topo.nnodes is None:
+            return True, f"Number of nodes unknown, values of {cty} not validated"
+
+        errors = self._validate_indices(mesh, cty, topo.nnodes, axis=0 if order == "regular" else 1)
+        return not errors, "; ".join(errors) or None
+
+    def _validate_indices(self, mesh, cty, nindices, *, padded=True, axis=None):
+        """Validate the values and the attributes of a connectivity array.
+
+        ``start_index`` must be 0 or 1 and ``_FillValue`` must not be a valid
+        index; every entry must be in range or equal ``_FillValue``, and
+        with ``padded``, fill values may only form a trailing run in each
+        row (as for faces with fewer nodes than the maximum). The values are
+        checked in a single pass (see ``_index_summary``).
+
+        :param netCDF4 variable mesh: mesh variable
+        :param str cty              : connectivity attribute of the mesh
+        :param int nindices         : number of elements being indexed, None
+                                      if unknown (the range is then unbounded)
+        :param bool padded          : check the fill values pad the rows
+        :param int axis             : axis indexing the elements, by default
+                                      from the dimension order of the mesh
+
+        :returns list of str: the problems found
+        """
+        var = self.reader[getattr(self.meshes[mesh], cty)]
+        errors = connectivity.attribute_errors(var, nindices)
+        summary = self._index_summary(mesh, cty, nindices, axis=axis)
+        nbad, first = summary.invalid
+        if nbad:
+            errors.append(f"{nbad} out of range indices in {cty} (first in element {first})")
+        npadded, first = summary.padding
+        if padded and npadded:
+            errors.append(f"{npadded} elements of {cty} have fill values before an index (first: {first})")
+        return errors
+
+    def _index_summary(self, mesh, cty, nindices, *, axis=None):
+        """Summarize the values of a connectivity array of a mesh.
+
+        The array is read once, in blocks of at most ``self.chunk_size``
+        values, counted on ``self.chunk_threads`` threads with at most
+        ``self.memory_budget`` bytes of blocks held at once (see
+        ``connectivity.summarize``). The summary is cached (see ``_derive``).
+
+        :param netCDF4 variable mesh: mesh variable
+        :param str cty              : connectivity attribute of the mesh
+        :param int nindices         : number of elements being indexed
+        :param int axis             : axis indexing the elements, by default
+                                      from the dimension order of the mesh
+
+        :returns connectivity.IndexSummary
+        """
+        topo = self.meshes[mesh]
+        if axis is None:
+            axis = 1 if topo.orders.get(cty) == "nonstd" else 0
+        return self._derive(
+            mesh,
+            ("summary", cty),
+            connectivity.IndexSummary,
+            (cty,),
+            build=lambda: connectivity.summarize(
+                self.reader[getattr(topo, cty)],
+                nindices,
+                axis=axis,
+                chunk_size=self.chunk_size,
+                workers=self.chunk_threads,
+                memory_budget=self.memory_budget,
+            ),
+            params=(nindices, axis),
+        )
+
+    def nodes_per_element(self, mesh, cty="face_node_connectivity"):
+        """Count the elements of a mesh by their number of nodes.
+
+        Fill values are not nodes, so for mixed meshes this is the number of
+        triangles, quadrilaterals... The counts come from the same pass over
+        the array as its data-level validation.
+
+        :param netCDF4 variable mesh: mesh variable
+        :param str cty              : node connectivity type
+
+        :returns dict: {number of nodes: number of elements}, None if the
+                       connectivity is missing or has an invalid shape
+        """
+        topo = self.meshes[mesh]
+        if not topo.orders.get(cty):
+            return None
+        histogram = self._index_summary(mesh, cty, topo.nnodes).histogram
+        return {n: int(count) for n, count in enumerate(histogram) if count}
+
+    def _read_indices(self, mesh, cty):
+        """Read a connectivity array of a mesh as zero-based indices.
+
+        Fill values are replaced by -1 and the array is returned with the
+        elements along the first axis, whatever its dimension order.
+
+        :param netCDF4 variable mesh: mesh variable
+        :param str cty              : connectivity attribute of the mesh
+        """
+        topo = self.meshes[mesh]
+        var = self.reader[getattr(topo, cty)]
+        axis = 1 if topo.orders.get(cty) == "nonstd" else 0
+        return connectivity.read_indices(
+            var,
+            axis=axis,
+            chunk_size=self.chunk_size,
+            workers=self.chunk_threads,
+            memory_budget=self.memory_budget,
+        )
+
+    def _node_coordinate_names(self, mesh):
+        """Return the names of the node coordinate variables of a mesh.
+
+        :param netCDF4 variable mesh: mesh variable
+
+        :returns list of str: empty if node_coordinates is missing or not a
+                              string (reported by _check3_ncoords_exist)
+        """
+        node_coordinates = self.meshes[mesh].node_coordinates
+        return node_coordinates.split() if isinstance(node_coordinates, str) else []
+
+    def _iter_indices(self, mesh, cty, chunk_size=None):
+        """Iterate over a connectivity array of a mesh in blocks of zero-based indices.
+
+        :param netCDF4 variable mesh: mesh variable
+        :param str cty              : connectivity attribute of the mesh
+        :param int chunk_size       : maximum number of values per block,
+                                      ``self.chunk_size`` by default
+        """
+        topo = self.meshes[mesh]
+        axis = 1 if topo.orders.get(cty) == "nonstd" else 0
+        return connectivity.iter_indices(self.reader[getattr(topo, cty)], axis, chunk_size or self.chunk_size)
+
+    def _mismatches(self, mesh, ctys, find):
+        """Count the elements of connectivity arrays not matching a derived structure.
+
+        The arrays are read together in blocks of elements, processed on
+        ``self.chunk_threads`` threads with at most ``self.memory_budget``
+        bytes of blocks held at once.
+
+        :param netCDF4 variable mesh: mesh variable
+        :param tuple ctys           : connectivity attributes of the mesh,
+                                      indexing the same elements
+        :param callable find        : called with the offset of a block and
+                                      its indices of each array, returns the
+                                      inconsistent elements of the block
+
+        :returns int, list: the number of inconsistent elements and the first of them
+        """
+        topo = self.meshes[mesh]
+        ncols = [topo.shapes[getattr(topo, cty)][0 if topo.orders.get(cty) == "nonstd" else 1] for cty in ctys]
+        rows, inflight = parallel.plan(8 * sum(ncols), max(1, self.chunk_size // max(ncols)), self.memory_budget)
+        blocks = zip(*(self._iter_indices(mesh, cty, rows * n) for cty, n in zip(ctys, ncols)))
+        return topology.mismatches(
+            ((parts[0][0], [block for _, block in parts]) for parts in blocks),
+            find,
+            max_reported=self.MAX_REPORTED,
+            workers=self.chunk_threads,
+            inflight=inflight,
+        )
+
+    def _mesh_edges(self, mesh):
+        """Return the edges derived from the face_node_connectivity of a mesh.
+
+        The edges are derived with a single vectorized hashing pass and cached
+        (see ``_derive``), so all the topology checks share them.
+
+        :param netCDF4 variable mesh: mesh variable
+
+        :returns topology.MeshEdges: None if face_node_connectivity has an
+                                     invalid shape or the number of nodes is unknown
+        """
+        topo = self.meshes[mesh]
+        if not topo.orders.get("face_node_connectivity") or topo.nnodes is None:
+            return None
+        return self._derive(
+            mesh,
+            ("edges",),
+            topology.MeshEdges,
+            ("face_node_connectivity",),
+            build=lambda: topology.MeshEdges.from_faces(self._read_indices(mesh, "face_node_connectivity"), topo.nnodes),
+            params=(topo.nnodes, topo.orders["face_node_connectivity"]),
+        )
+
+    def _node_adjacency(self, mesh):
+        """Return the adjacency of the nodes of a mesh through its elements.
+
+        Built from every node connectivity of the mesh with a valid shape,
+        and cached (see ``_derive``), so all the topology checks share it.
+
+        :param netCDF4 variable mesh: mesh variable
+
+        :returns topology.NodeAdjacency: None if the number of nodes is
+                                         unknown or no node connectivity has a
+                                         valid shape
+        """
+        topo = self.meshes[mesh]
+        ctys = [cty for cty in ("edge_node_connectivity", "face_node_connectivity", "volume_node_connectivity") if topo.orders.get(cty)]
+        if not ctys or topo.nnodes is None:
+            return None
+        return self._derive(
+            mesh,
+            ("adjacency",),
+            topology.NodeAdjacency,
+            tuple(ctys),
+            build=lambda: topology.NodeAdjacency.from_elements([self._read_indices(mesh, cty) for cty in ctys], topo.nnodes),
+            params=(topo.nnodes, *(topo.orders[cty] for cty in ctys)),
+        )
+
+    def _derive(self, mesh, kind, cls, ctys, *, build, params):  # noqa: PLR0913
+        """Derive a structure from connectivity arrays of a mesh, once.
+
+        The structure is cached until the next ``setup()``, and derived only
+        once when the checks are threaded. With the ``derived_cache`` option,
+        it is also stored on disk, keyed by a hash of the contents of the
+        arrays it derives from (see ``cache.derived_key``), so later runs on
+        a mesh with the same arrays, e.g. other files on the same grid, load
+        it instead of deriving it again.
+
+        :param netCDF4 variable mesh: mesh variable
+        :param tuple kind           : kind of the structure, e.g. ("edges",)
+        :param type cls             : NamedTuple class of the structure
+        :param tuple ctys           : connectivity attributes of the mesh it
+                                      derives from
+        :param callable build       : derives the structure
+        :param tuple params         : other inputs of the derivation
+
+        :returns cls
+        """
+        key = (mesh.name, *kind)
+        with self._derived_locks.setdefault(key, threading.Lock()):  # derive once when threaded
+            if key not in self._derived:
+                if self.derived_cache is None:
+                    self._derived[key] = build()
+                else:
+                    fingerprints = [self._fingerprint(mesh, cty) for cty in ctys]
+                    disk_key = cache.derived_key(kind[0], fingerprints, *params)
+                    value = self.derived_cache.get(disk_key, cls)
+                    if value is None:
+                        value = build()
+                        self.derived_cache.put(disk_key, value)
+                    self._derived[key] = value
+        return self._derived[key]
+
+    def _fingerprint(self, mesh, cty):
+        """Return the hash of a connectivity array of a mesh, computed once per ``setup()``.
+
+        :param netCDF4 variable mesh: mesh variable
+        :param str cty              : connectivity attribute of the mesh
+        """
+        name = getattr(self.meshes[mesh], cty)
+        key = (mesh.name, "fingerprint", name)
+        with self._derived_locks.setdefault(key, threading.Lock()):
+            if key not in self._derived:
+                self._derived[key] = cache.array_fingerprint(self.reader[name], self.chunk_size)
+        return self._derived[key]
+
+    def _validate_face_adjacency(self, mesh, cty):
+        """Compare face_edge or face_face_connectivity with the derived adjacency.
+
+        The order of the edges (neighbors) within each face is not compared.
+
+        :param netCDF4 variable mesh: mesh variable
+        :param str cty              : connectivity type; one of face_edge or
+                                      face_face_connectivity
+
+        :returns bool, str: indicator if valid and a message ("" if valid)
+        """
+        edges = self._mesh_edges(mesh)
+        if edges is None:
+            return True, f"face_node_connectivity unavailable, values of {cty} not validated"
+
+        if cty == "face_edge_connectivity":
+            if not self.meshes[mesh].orders.get("edge_node_connectivity"):
+                return True, f"edge_node_connectivity unavailable, values of {cty} not validated"
+            edge_ids = np.concatenate([edges.edge_ids(enc) for _, enc in self._iter_indices(mesh, "edge_node_connectivity")])
+            nbad, first = self._mismatches(mesh, (cty,), lambda offset, fec: edges.face_edge_mismatches(fec, edge_ids, offset))
         else:
-            raise NotImplementedError  # haven't dealt with real 3D grids yet
-
-        if (dim1.name == _dim1) and (dim2.size == _dim2size):
-            # set the attr in the meshes dict
-            self.meshes[mesh][_dim1] = self.ds.dimensions[_dim1]
-            return True, "regular"
-        if (dim1.size == _dim2size) and (dim2.name == _dim1):
-            self.meshes[mesh][_dim1] = self.ds.dimensions[_dim1]
-            return True, "nonstd"
-        return False, None
+            nbad, first = self._mismatches(mesh, (cty,), lambda offset, ffc: edges.face_face_mismatches(ffc, offset))
+
+        if nbad:
+            return False, f"{nbad} faces of {cty} do not match face_node_connectivity (first: {first})"
+        return True, ""
@@ -0,0 +1,261 @@
+"""Data-level helpers for UGRID connectivity arrays.
+
+These functions read connectivity variables in bounded-size blocks and
+validate them with vectorized NumPy reductions, so memory use does not grow
+with the number of mesh elements. With several ``workers``, the blocks are
+processed on a thread pool within a memory budget (see
+``cc_plugin_ugrid.parallel``). Variables backed by dask (see
+``cc_plugin_ugrid.adapter``) are reduced chunk-parallel by dask instead.
+"""
+
+import contextlib
+import typing
+
+import numpy as np
+
+from cc_plugin_ugrid import adapter, parallel
+
+CHUNK_SIZE = 2**20  # number of array elements read per block
+
+# markers in the zero-based index arrays returned by read_indices
+FILL = -1
+INVALID = -2
+
+
+@contextlib.contextmanager
+def raw_values(var):
+    """Temporarily disable netCDF4 auto-masking so fill values are returned as-is.
+
+    :param netCDF4 variable var: variable to read
+    """
+    mask = getattr(var, "mask", None)
+    if mask is None:  # not a netCDF4 variable, nothing to toggle
+        yield var
+        return
+    var.set_auto_mask(False)
+    try:
+        yield var
+    finally:
+        var.set_auto_mask(mask)
+
+
+def iter_blocks(var, axis=0, chunk_size=CHUNK_SIZE):
+    """Iterate over a 2D variable in blocks along its element axis.
+
+    Each block holds at most ``chunk_size`` values (but always at least one
+    element) and is returned as an ``(nelements, ncols)`` array regardless of
+    the on-disk dimension order.
+
+    :param netCDF4 variable var: 2D variable to read
+    :param int axis            : axis indexing the mesh elements (0 or 1)
+    :param int chunk_size      : maximum number of values per block
+
+    :returns generator of (int, numpy.ndarray): offset of the block and its values
+    """
+    nelements = var.shape[axis]
+    ncols = var.shape[1 - axis]
+    step = max(1, chunk_size // max(1, ncols))
+    for start in range(0, nelements, step):
+        stop = min(start + step, nelements)
+        block = var[start:stop, :] if axis == 0 else var[:, start:stop].T
+        yield start, np.asarray(block)
+
+
+def fill_value(var):
+    """Return the ``_FillValue`` of a variable, or None if it has none.
+
+    :param netCDF4 variable var: connectivity variable
+    """
+    try:
+        return var.getncattr("_FillValue")
+    except AttributeError:
+        return None
+
+
+def start_index(var):
+    """Return the ``start_index`` of a connectivity variable (default 0).
+
+    :param netCDF4 variable var: connectivity variable
+    """
+    try:
+        return int(var.getncattr("start_index"))
+    except AttributeError:
+        return 0
+
+
+class IndexSummary(typing.NamedTuple):
+    """Summary of the values of a connectivity array, from a single pass.
+
+    Attributes:
+        invalid  : (number of entries, first element) of the entries neither
+                   in range nor equal to ``_FillValue``
+        padding  : (number of elements, first element) of the elements with a
+                   fill value before an index, i.e. not padded at the end
+        histogram: (ncols + 1,) number of elements by number of entries
+                   other than ``_FillValue``
+
+    """
+
+    invalid: tuple
+    padding: tuple
+    histogram: np.ndarray
+
+
+def summarize(var, nindices, axis=0, chunk_size=CHUNK_SIZE, *, workers=1, memory_budget=parallel.MEMORY_BUDGET):  # noqa: PLR0913
+    """Validate the indices and the padding of a connectivity array.
+
+    Valid entries are within ``[start_index, start_index + nindices)`` or
+    equal to the variable's ``_FillValue``, and fill values may only pad
+    the end of each element's row. The number of entries of each element
+    is counted into a histogram, e.g. of the nodes per face of mixed
+    meshes. Each block is summarized with vectorized reductions and the
+    summaries are then reduced, so the array is read once and the blocks
+    may be processed in parallel.
+
+    :param netCDF4 variable var: connectivity variable
+    :param int nindices        : number of elements being indexed (e.g.
+                                 nodes), None if unknown
+    :param int axis            : axis indexing the mesh elements
+    :param int chunk_size      : maximum number of values read at once
+    :param int workers         : number of threads processing the blocks
+    :param int memory_budget   : bytes of blocks held at once
+
+    :returns IndexSummary
+    """
+    low = start_index(var)
+    high = np.iinfo(np.int64).max if nindices is None else low + nindices
+    fill = fill_value(var)
+    lazy = getattr(var, "dask_array", None)
+    if lazy is not None:
+        return IndexSummary(*adapter.summarize(lazy, low, high, fill, axis))
+
+    def count(offset, block):
+        filled = block == fill if fill is not None else np.zeros(block.shape, dtype=bool)
+        ok = ((block >= low) & (block < high)) | filled
+        bad_rows = ~ok.all(axis=1)
+        padded = (filled[:, :-1] & ~filled[:, 1:]).any(axis=1)
+        entries = block.shape[1] - np.count_nonzero(filled, axis=1)
+        return IndexSummary(
+            (int(ok.size - np.count_nonzero(ok)), _first(offset, bad_rows)),
+            (int(np.count_nonzero(padded)), _first(offset, padded)),
+            np.bincount(entries, minlength=block.shape[1] + 1),
+        )
+
+    chunk_size, inflight = parallel.plan(var.dtype.itemsize, chunk_size, memory_budget)
+    with raw_values(var):
+        summaries = list(parallel.map_blocks(count, iter_blocks(var, axis, chunk_size), workers=workers, inflight=inflight))
+    empty = IndexSummary((0, None), (0, None), np.zeros(var.shape[1 - axis] + 1, dtype=np.int64))
+    return parallel.tree_reduce(_add_summaries, summaries, empty)
+
+
+def _first(offset, mask):
+    """Return the first element of a block selected by a mask, None if none is."""
+    return offset + int(np.argmax(mask)) if mask.any() else None
+
+
+def _add_summaries(a, b):
+    """Combine the summaries of two consecutive ranges of elements."""
+    return IndexSummary(_add_errors(a.invalid, b.invalid), _add_errors(a.padding, b.padding), a.histogram + b.histogram)
+
+
+def attribute_errors(var, nindices):
+    """Check the ``start_index`` and ``_FillValue`` attributes of a connectivity variable.
+
+    ``start_index`` must be 0 or 1, and ``_FillValue`` must not be a valid
+    index, which would make it ambiguous.
+
+    :param netCDF4 variable var: connectivity variable
+    :param int nindices        : number of elements being indexed, None if unknown
+
+    :returns list of str: the problems found
+    """
+    errors = []
+    low = start_index(var)
+    if low not in (0, 1):
+        errors.append(f"start_index of {var.name} must be 0 or 1, not {low}")
+    fill = fill_value(var)
+    if fill is not None and nindices is not None and low <= fill < low + nindices:
+        errors.append(f"_FillValue {fill} of {var.name} is a valid index")
+    return errors
+
+
+def _add_errors(a, b):
+    """Combine the (count, first element) of two consecutive ranges of elements."""
+    return a[0] + b[0], a[1] if a[1] is not None else b[1]
+
+
+def read_indices(var, axis=0, chunk_size=CHUNK_SIZE, *, workers=1, memory_budget=parallel.MEMORY_BUDGET):
+    """Read a connectivity array as zero-based indices.
+
+    The values are shifted by the variable's ``start_index``, fill values are
+    replaced by ``FILL`` (-1) and other values below ``start_index`` by
+    ``INVALID`` (-2). The array is read block by block into a single
+    ``(nelements, ncols)`` int64 array; with several ``workers``, the
+    blocks are converted in parallel. Only ``memory_budget`` bytes of
+    blocks are held at once, but the returned array is as large as the
+    whole connectivity: use ``iter_indices`` where the elements can be
+    processed block by block.
+
+    :param netCDF4 variable var: connectivity variable
+    :param int axis            : axis indexing the mesh elements
+    :param int chunk_size      : maximum number of values read at once
+    :param int workers         : number of threads converting the blocks
+    :param int memory_budget   : bytes of blocks held at once, besides the
+                                 returned array
+    """
+    low = start_index(var)
+    fill = fill_value(var)
+    out = np.empty((var.shape[axis], var.shape[1 - axis]), dtype=np.int64)
+
+    def convert(offset, block):
+        _to_indices(block, low, fill, out[offset : offset + block.shape[0]])
+
+    chunk_size, inflight = parallel.plan(var.dtype.itemsize, chunk_size, memory_budget)
+    with raw_values(var):
+        for _ in parallel.map_blocks(convert, iter_blocks(var, axis, chunk_size), workers=workers, inflight=inflight):
+            pass
+    return out
+
+
+def iter_indices(var, axis=0, chunk_size=CHUNK_SIZE):
+    """Iterate over a connectivity array in blocks of zero-based indices.
+
+    The blocks hold the values of ``read_indices``, with the same markers,
+    so arrays larger than memory can be processed one block at a time.
+
+    :param netCDF4 variable var: connectivity variable
+    :param int axis            : axis indexing the mesh elements
+    :param int chunk_size      : maximum number of values read at once
+
+    :returns generator of (int, numpy.ndarray): offset of the block and its
+             ``(nelements, ncols)`` int64 indices
+    """
+    low = start_index(var)
+    fill = fill_value(var)
+    with raw_values(var):
+        for offset, block in iter_blocks(var, axis, chunk_size):
+            yield offset, _to_indices(block, low, fill, np.empty(block.shape, dtype=np.int64))
+
+
+def read_rows(var, start, stop, axis=0):
+    """Read the elements ``[start, stop)`` of a connectivity array as zero-based indices.
+
+    :param netCDF4 variable var: connectivity variable
+    :param int start, stop     : range of elements to read
+    :param int axis            : axis indexing the mesh elements
+
+    :returns numpy.ndarray: ``(stop - start, ncols)`` int64 indices, with
+             the markers of ``read_indices``
+    """
+    with raw_values(var):
+        block = np.asarray(var[start:stop, :] if axis == 0 else var[:, start:stop].T)
+    return _to_indices(block, start_index(var), fill_value(var), np.empty(block.shape, dtype=np.int64))
+
+
+def _to_indices(block, low, fill, out):
+    """Convert a block of raw values into zero-based indices, written to ``out``."""
+    np.subtract(block, low, out=out, casting="unsafe")
+    out[out < 0] = INVALID
+    if fill is not None:
+        out[block == fill] = FILL
+    return out
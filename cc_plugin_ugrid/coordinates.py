@@ -0,0 +1,290 @@
+"""Data-level helpers for UGRID node coordinates.
+
+The coordinate variables of a mesh are read together in bounded-size blocks
+of nodes. Duplicate node positions are found by sorting (see
+``topology.duplicate_rows``); when the mesh has more nodes than fit in one
+partition, nodes are split by a hash of their position and each partition is
+sorted in turn, re-reading the coordinates, so memory use does not grow with
+the number of nodes.
+
+Face winding is checked from the signed area of each face (shoelace formula),
+computed for blocks of faces of any number of nodes in a single vectorized
+pass over the node coordinates gathered by fancy indexing. The coordinates of
+the nodes of each block are read on their own (see ``gather_nodes``), so the
+coordinates of the whole mesh need not fit in memory.
+"""
+
+import netCDF4
+import numpy as np
+
+from cc_plugin_ugrid import parallel
+from cc_plugin_ugrid.connectivity import CHUNK_SIZE, fill_value
+from cc_plugin_ugrid.topology import duplicate_rows
+
+PARTITION_SIZE = 2**24  # number of nodes sorted at once for duplicate detection
+ZERO_AREA = 8 * np.finfo(np.float64).eps  # relative area below which a face is flat
+
+# valid ranges of geographic coordinates; longitudes may be in [-180, 180] or [0, 360]
+RANGES = {
+    "latitude": (-90.0, 90.0),
+    "longitude": (-180.0, 360.0),
+}
+_UNITS = {
+    "degrees_north": "latitude",
+    "degree_north": "latitude",
+    "degrees_n": "latitude",
+    "degree_n": "latitude",
+    "degrees_east": "longitude",
+    "degree_east": "longitude",
+    "degrees_e": "longitude",
+    "degree_e": "longitude",
+}
+
+
+def coordinate_kind(var):
+    """Return "latitude", "longitude" or None from the attributes of a variable.
+
+    :param netCDF4 variable var: coordinate variable
+    """
+    attrs = var.ncattrs()
+    if "standard_name" in attrs and var.getncattr("standard_name") in RANGES:
+        return var.getncattr("standard_name")
+    if "units" in attrs:
+        return _UNITS.get(str(var.getncattr("units")).lower())
+    return None
+
+
+def _fill_value(var):
+    """Return the ``_FillValue`` of a variable, or the netCDF default fill."""
+    fill = fill_value(var)
+    if fill is None:
+        fill = netCDF4.default_fillvals.get(var.dtype.str[1:])
+    return fill
+
+
+def horizontal_axes(variables):
+    """Order two node coordinate variables as x (longitude) and y (latitude).
+
+    The kind of each variable is told by ``coordinate_kind`` or by its
+    ``axis`` attribute ("X" or "Y"); variables of unknown kind keep the order
+    of the ``node_coordinates`` attribute.
+
+    :param list variables: the two coordinate variables
+
+    :returns list, bool: the x and y variables, and True if x is a longitude
+    """
+    axes = []
+    for var in variables:
+        kind = coordinate_kind(var)
+        if kind is None and "axis" in var.ncattrs():
+            kind = {"X": "longitude", "Y": "latitude"}.get(str(var.getncattr("axis")).upper())
+        axes.append(kind)
+    if axes[0] == "latitude" or axes[1] == "longitude":
+        variables = variables[::-1]
+    return list(variables), coordinate_kind(variables[0]) == "longitude"
+
+
+def _read_block(variables, fills, start, stop):
+    """Read the coordinates of nodes ``start`` to ``stop``, fill values as NaN."""
+    block = np.empty((stop - start, len(variables)), dtype=np.float64)
+    for i, (var, fill) in enumerate(zip(variables, fills)):
+        values = var[start:stop]
+        if np.ma.isMaskedArray(values):
+            block[:, i] = values.astype(np.float64).filled(np.nan)
+        else:
+            block[:, i] = values
+            if fill is not None:
+                block[values == fill, i] = np.nan
+    return block
+
+
+def iter_nodes(variables, chunk_size=CHUNK_SIZE):
+    """Iterate over the node coordinates in blocks of nodes.
+
+    Masked and fill values (``_FillValue`` or the netCDF default) are
+    returned as NaN, for netCDF4 and memory-mapped variables alike.
+
+    :param list variables: 1D coordinate variables of the same length
+    :param int chunk_size: maximum number of values per block
+
+    :returns generator of (int, numpy.ndarray): offset of the block and its
+             (nnodes, ncoords) float64 values
+    """
+    nnodes = len(variables[0])
+    fills = [_fill_value(var) for var in variables]
+    step = max(1, chunk_size // len(variables))
+    for start in range(0, nnodes, step):
+        yield start, _read_block(variables, fills, start, min(start + step, nnodes))
+
+
+def value_errors(variables, chunk_size=CHUNK_SIZE):
+    """Count the non-finite and out-of-range node coordinates.
+
+    Ranges are only checked for variables recognized as latitude or
+    longitude, see ``coordinate_kind``.
+
+    :param list variables: 1D coordinate variables of the same length
+    :param int chunk_size: maximum number of values read at once
+
+    :returns list of (int, int, int or None): for each variable, the number
+             of non-finite values, of out-of-range values, and the first node
+             holding either
+    """
+    ranges = [RANGES.get(coordinate_kind(var)) for var in variables]
+    counts = [[0, 0, None] for _ in variables]
+    for offset, block in iter_nodes(variables, chunk_size):
+        finite = np.isfinite(block)
+        for i, valid in enumerate(ranges):
+            bad = ~finite[:, i]
+            counts[i][0] += int(np.count_nonzero(bad))
+            if valid is not None:
+                out = finite[:, i] & ((block[:, i] < valid[0]) | (block[:, i] > valid[1]))
+                counts[i][1] += int(np.count_nonzero(out))
+                bad |= out
+            if counts[i][2] is None and bad.any():
+                counts[i][2] = offset + int(np.argmax(bad))
+    return [tuple(c) for c in counts]
+
+
+def duplicate_nodes(variables, chunk_size=CHUNK_SIZE, partition_size=PARTITION_SIZE, max_reported=10):
+    """Find the nodes sharing their position with a previous node.
+
+    Non-finite positions are ignored; -0.0 and 0.0 are the same position.
+
+    :param list variables   : 1D coordinate variables of the same length
+    :param int chunk_size   : maximum number of values read at once
+    :param int partition_size: maximum number of nodes sorted at once; the
+                               coordinates are read once per partition
+    :param int max_reported : number of duplicates returned
+
+    :returns int, list of (int, int): the number of duplicate nodes and the
+             (duplicate, first node) pairs of the first duplicates
+    """
+
+    def positions():
+        for offset, block in iter_nodes(variables, chunk_size):
+            yield offset, block + 0.0, np.isfinite(block).all(axis=1)  # adding 0.0 turns -0.0 into 0.0
+
+    return duplicate_rows(positions, len(variables[0]), partition_size, max_reported)
+
+
+def read_nodes(variables, chunk_size=CHUNK_SIZE):
+    """Read the node coordinates into a single array, fill values as NaN.
+
+    :param list variables: 1D coordinate variables of the same length
+    :param int chunk_size: maximum number of values read at once
+
+    :returns numpy.ndarray: (nnodes, ncoords) float64 coordinates
+    """
+    nodes = np.empty((len(variables[0]), len(variables)), dtype=np.float64)
+    for offset, block in iter_nodes(variables, chunk_size):
+        nodes[offset : offset + len(block)] = block
+    return nodes
+
+
+def gather_nodes(variables, faces, chunk_size=CHUNK_SIZE):
+    """Read the coordinates of the nodes of a block of faces.
+
+    The coordinates are read in blocks of nodes, skipping the blocks without
+    any node of the faces, so that memory use is bounded by the number of
+    nodes of the faces (and a block) rather than by the size of the mesh.
+
+    :param list variables     : 1D coordinate variables of the same length
+    :param numpy.ndarray faces: (nfaces, maxnodes) zero-based node indices,
+                                padded with negative values
+    :param int chunk_size     : maximum number of values read at once
+
+    :returns numpy.ndarray, numpy.ndarray: the faces renumbered into the
+             gathered nodes (-1 for invalid indices) and the (nnodes, ncoords)
+             float64 coordinates of these nodes
+    """
+    nnodes = len(variables[0])
+    valid = (faces >= 0) & (faces < nnodes)
+    needed, inverse = np.unique(faces[valid], return_inverse=True)
+    local = np.full(faces.shape, -1, dtype=np.int64)
+    local[valid] = inverse
+    fills = [_fill_value(var) for var in variables]
+    step = max(1, chunk_size // len(variables))
+    nodes = np.empty((len(needed), len(variables)), dtype=np.float64)
+    for start in np.unique(needed // step) * step:
+        stop = min(int(start) + step, nnodes)
+        lo, hi = np.searchsorted(needed, [start, stop])
+        nodes[lo:hi] = _read_block(variables, fills, int(start), stop)[needed[lo:hi] - start]
+    return local, nodes
+
+
+def signed_areas(faces, nodes, *, wrap=False):
+    """Compute the signed area of faces with any number of nodes.
+
+    The area is positive for nodes listed anticlockwise. Coordinates are
+    taken relative to the first node of each face, and with ``wrap`` the x
+    (longitude) differences are wrapped into [-180, 180), so faces crossing
+    the antimeridian keep their orientation.
+
+    :param numpy.ndarray faces: (nfaces, maxnodes) zero-based node indices,
+                                padded with trailing negative values
+    :param numpy.ndarray nodes: (nnodes, 2) node x and y coordinates
+    :param bool wrap          : x is a longitude in degrees
+
+    :returns numpy.ndarray, numpy.ndarray: the signed area of each face (NaN
+             if it has fewer than 3 nodes, invalid indices or padding before
+             its last node) and the sum of the magnitudes of the shoelace
+             terms, which scales the rounding error of the area
+    """
+    valid = (faces >= 0) & (faces < len(nodes))
+    counts = valid.sum(axis=1)
+    cols = np.arange(faces.shape[1])
+    inside = cols < counts[:, None]
+    gathered = np.where(inside & valid, faces, 0)  # invalid indices among the first nodes make the area NaN below
+    x = nodes[gathered, 0]
+    y = nodes[gathered, 1]
+    x = x - x[:, :1]
+    y = y - y[:, :1]
+    if wrap:
+        x = (x + 180.0) % 360.0 - 180.0
+    following = (cols + 1) % np.maximum(counts, 1)[:, None]
+    terms = x * np.take_along_axis(y, following, axis=1) - np.take_along_axis(x, following, axis=1) * y
+    terms[~inside] = 0.0
+    area = terms.sum(axis=1) / 2
+    area[(valid != inside).any(axis=1) | (counts < 3)] = np.nan
+    return area, np.abs(terms).sum(axis=1) / 2
+
+
+def winding_errors(blocks, nodes, *, wrap=False, max_reported=10, workers=1, inflight=1, chunk_size=CHUNK_SIZE):  # noqa: PLR0913
+    """Find the clockwise and zero-area faces.
+
+    Faces whose area cannot be computed (see ``signed_areas``) or with
+    non-finite coordinates are skipped.
+
+    :param iterable blocks  : (offset, faces) blocks of zero-based indices,
+                              see ``connectivity.iter_indices``
+    :param nodes            : (nnodes, 2) node x and y coordinates, or the x
+                              and y coordinate variables, whose values are
+                              then read for each block (see ``gather_nodes``)
+                              as the blocks are, in the calling thread
+    :param bool wrap        : x is a longitude in degrees
+    :param int max_reported : number of faces returned for each error
+    :param int workers      : number of threads processing the blocks
+    :param int inflight     : maximum number of blocks held at once
+    :param int chunk_size   : maximum number of coordinates read at once,
+                              when gathered for each block
+
+    :returns (int, list), (int, list): the number of clockwise faces and the
+             first of them, and the same for zero-area faces
+    """
+    if isinstance(nodes, np.ndarray):
+        blocks = ((offset, (faces, nodes)) for offset, faces in blocks)
+    else:  # the coordinates are read with the blocks, in the calling thread (see ``parallel``)
+        blocks = ((offset, gather_nodes(nodes, faces, chunk_size)) for offset, faces in blocks)
+
+    def find(offset, block):
+        area, scale = signed_areas(*block, wrap=wrap)
+        zero = np.abs(area) <= ZERO_AREA * scale
+        clockwise = (area < 0) & ~zero
+        return tuple((int(np.count_nonzero(m)), (offset + np.flatnonzero(m)[:max_reported]).tolist()) for m in (clockwise, zero))
+
+    def combine(a, b):
+        return tuple((n + m, (first + other)[:max_reported]) for (n, first), (m, other) in zip(a, b))
+
+    found = parallel.map_blocks(find, blocks, workers=workers, inflight=inflight)
+    return parallel.tree_reduce(combine, found, ((0, []), (0, [])))
@@ -0,0 +1,379 @@
+"""Discovery and metadata of UGRID mesh topology variables."""
+
+from __future__ import annotations
+
+import functools
+import math
+import types
+import typing
+
+MESH_ATTRIBUTES = (
+    "boundary_node_connectivity",
+    "boundary_node_coordinates",
+    "edge_coordinates",
+    "edge_dimension",
+    "edge_face_connectivity",
+    "edge_node_connectivity",
+    "face_coordinates",
+    "face_dimension",
+    "face_edge_connectivity",
+    "face_edge_coordinates",
+    "face_face_connectivity",
+    "face_node_connectivity",
+    "node_coordinates",
+    "topology_dimension",
+    "volume_dimension",
+    "volume_edge_connectivity",
+    "volume_edge_coordinates",
+    "volume_face_connectivity",
+    "volume_node_connectivity",
+    "volume_coordinates",
+    "volume_shape_type",
+    "volume_volume_connectivity",
+)
+
+# cf_role of the UGRID variables that are not data: the mesh and its connectivity arrays
+UGRID_ROLES = frozenset(("mesh_topology", *(name for name in MESH_ATTRIBUTES if name.endswith("_connectivity"))))
+
+# node connectivities: (element dimension attribute, default element dimension,
+# fewest and most nodes per element; None if unbounded, as for padded mixed faces)
+CONNECTIVITY = {
+    "edge_node_connectivity": ("edge_dimension", "nedges", 2, 2),
+    "face_node_connectivity": ("face_dimension", "nfaces", 3, None),
+}
+
+# default element dimension of volume_node_connectivity, and the fewest nodes of a volume
+VOLUME_DIMENSION = "nvolumes"
+MIN_NODES_PER_VOLUME = 4
+
+
+# element location of data variables: (element dimension attribute, node connectivity)
+LOCATIONS = {
+    "node": (None, None),
+    "edge": ("edge_dimension", "edge_node_connectivity"),
+    "face": ("face_dimension", "face_node_connectivity"),
+    "volume": ("volume_dimension", "volume_node_connectivity"),
+}
+
+
+class DataVariable(typing.NamedTuple):
+    """A data variable bound to a mesh by its ``mesh`` attribute.
+
+    Attributes:
+        name      : name of the variable
+        mesh      : value of the ``mesh`` attribute
+        location  : value of the ``location`` attribute, None if missing
+        dimensions: dimension names of the variable
+
+    """
+
+    name: str
+    mesh: str
+    location: str | None
+    dimensions: tuple
+
+
+def find_data_variables(ds):
+    """Group the data variables of a dataset by the mesh they point to.
+
+    The attributes of each variable are listed once, in a single pass over
+    the variables, whatever the number of meshes. Meshes and connectivity
+    arrays (by their UGRID ``cf_role``) are not data variables; variables
+    with other roles, e.g. CF ``timeseries_id``, are.
+
+    :param netCDF4 dataset ds: dataset to search
+
+    :returns dict: {mesh name: tuple of DataVariable}, in variable order
+    """
+    found = {}
+    for var in ds.variables.values():
+        names = var.ncattrs()
+        if "mesh" not in names or ("cf_role" in names and var.getncattr("cf_role") in UGRID_ROLES):
+            continue
+        location = var.getncattr("location") if "location" in names else None
+        mesh = str(var.getncattr("mesh"))
+        found.setdefault(mesh, []).append(DataVariable(var.name, mesh, location, tuple(var.dimensions)))
+    return {mesh: tuple(variables) for mesh, variables in found.items()}
+
+
+def element_dimensions(ds, values, orders):
+    """Find the dimension of each element location of a mesh.
+
+    The dimension is the one named by the ``<location>_dimension`` attribute
+    if any, otherwise the element dimension of the node connectivity (or of
+    the node coordinates for nodes).
+
+    :param netCDF4 dataset ds: dataset holding the mesh
+    :param dict values       : {attribute: value} of the mesh attributes
+    :param dict orders       : {node connectivity: ordering}, see
+                               ``connectivity_order``
+
+    :returns dict: {location: (dimension name, size)}
+    """
+    dims = {}
+    coords = values["node_coordinates"].split() if isinstance(values["node_coordinates"], str) else []
+    var = ds.variables.get(coords[0]) if coords else None
+    if var is not None and var.ndim == 1:
+        dims["node"] = var.dimensions[0]
+    for location, (dim_att, cty) in LOCATIONS.items():
+        if location == "node":
+            continue
+        var = ds.variables.get(values[cty]) if isinstance(values[cty], str) else None
+        if isinstance(values[dim_att], str):
+            dims[location] = values[dim_att]
+        elif var is not None and var.ndim == 2:
+            dims[location] = var.dimensions[1 if orders.get(cty) == "nonstd" else 0]
+    return {loc: (name, int(ds.dimensions[name].size)) for loc, name in dims.items() if name in ds.dimensions}
+
+
+def is_mesh_topology(var):
+    """Return True if the variable has ``cf_role = "mesh_topology"``.
+
+    :param netCDF4 variable var: variable to test
+    """
+    return "cf_role" in var.ncattrs() and var.getncattr("cf_role") == "mesh_topology"
+
+
+def find_meshes(ds):
+    """Return the mesh topology variables of a dataset.
+
+    Mesh topology variables should be scalars, but variables with
+    dimensions are not ruled out, so every variable is looked at.
+
+    :param netCDF4 dataset ds: dataset to search
+
+    :returns list of netCDF4 variables, in variable order
+    """
+    return [var for var in ds.variables.values() if is_mesh_topology(var)]
+
+
+def connectivity_order(ds, name, cty, element_dimension=None):
+    """Determine the dimension ordering of a node connectivity variable.
+
+    The element dimension is the one named by the mesh's ``edge_dimension``
+    or ``face_dimension`` attribute, by default named after the element type
+    (e.g. ``nedges``); the other dimension is identified by its size only,
+    since it could be called whatever the modeler wants. Edges have exactly
+    2 nodes, faces at least 3 (rows of faces with fewer nodes than the
+    maximum are padded with ``_FillValue``).
+
+    :param netCDF4 dataset ds    : dataset holding the variable
+    :param str name              : name of the connectivity variable
+    :param str cty               : connectivity type; edge_node_connectivity or
+                                   face_node_connectivity
+    :param str element_dimension : value of the ``edge_dimension`` or
+                                   ``face_dimension`` attribute
+
+    :returns str: "regular", "nonstd" or None if the shape is invalid
+    """
+    var = ds.variables.get(name)
+    if var is None or var.ndim != 2:
+        return None
+    _, default, low, high = CONNECTIVITY[cty]
+    elem_dim = element_dimension if isinstance(element_dimension, str) else default
+
+    def nodes(size):
+        return low <= size and (high is None or size <= high)
+
+    (d1, d2), (s1, s2) = var.dimensions, var.shape
+    if d1 == elem_dim and nodes(s2):
+        return "regular"
+    if nodes(s1) and d2 == elem_dim:
+        return "nonstd"
+    return None
+
+
+def volume_order(ds, name, volume_dimension=None):
+    """Determine the dimension ordering of a volume node connectivity variable.
+
+    Volumes have varying numbers of nodes, so the element dimension is the
+    one named by the mesh's ``volume_dimension`` attribute, ``nvolumes`` by
+    default, and the other dimension must hold at least 4 nodes.
+
+    :param netCDF4 dataset ds    : dataset holding the variable
+    :param str name              : name of the volume_node_connectivity variable
+    :param str volume_dimension  : value of the ``volume_dimension`` attribute
+
+    :returns str: "regular", "nonstd" or None if the shape is invalid
+    """
+    var = ds.variables.get(name)
+    if var is None or var.ndim != 2:
+        return None
+    elem_dim = volume_dimension if isinstance(volume_dimension, str) else VOLUME_DIMENSION
+    (d1, d2), (s1, s2) = var.dimensions, var.shape
+    if d1 == elem_dim and s2 >= MIN_NODES_PER_VOLUME:
+        return "regular"
+    if s1 >= MIN_NODES_PER_VOLUME and d2 == elem_dim:
+        return "nonstd"
+    return None
+
+
+def connectivity_orders(ds, values):
+    """Determine the dimension ordering of the node connectivities of a mesh.
+
+    :param netCDF4 dataset ds: dataset holding the mesh
+    :param dict values       : {attribute: value} of the mesh attributes
+
+    :returns dict: {node connectivity type: "regular", "nonstd" or None}
+    """
+    orders = {cty: connectivity_order(ds, values[cty], cty, values[dim_att]) for cty, (dim_att, *_) in CONNECTIVITY.items() if values[cty]}
+    if isinstance(values["volume_node_connectivity"], str):
+        orders["volume_node_connectivity"] = volume_order(ds, values["volume_node_connectivity"], values["volume_dimension"])
+    return orders
+
+
+def element_sizes(ds, values, shapes, orders):
+    """Count the elements of a mesh, and their most nodes, from its node connectivities.
+
+    :param netCDF4 dataset ds: dataset holding the mesh
+    :param dict values       : {attribute: value} of the mesh attributes
+    :param dict shapes       : {variable name: shape} of the mesh variables
+    :param dict orders       : {node connectivity: ordering}, see
+                               ``connectivity_orders``
+
+    :returns dict: values of the nedges, nfaces, nvolumes, max_nodes_per_face
+                   and max_nodes_per_volume fields that are known
+    """
+    sizes = {}
+    for cty, (_, slot, _, _) in CONNECTIVITY.items():
+        if orders.get(cty):
+            shape = shapes[values[cty]]
+            sizes[slot] = shape[0] if orders[cty] == "regular" else shape[1]
+    vnc = values["volume_node_connectivity"]
+    if orders.get("volume_node_connectivity"):
+        shape = shapes[vnc] if orders["volume_node_connectivity"] == "regular" else shapes[vnc][::-1]
+        sizes["nvolumes"], sizes["max_nodes_per_volume"] = shape
+
+    # the maxnumnodesperface dimension, else the number of columns of face_node_connectivity
+    mnpf = ds.dimensions.get("maxnumnodesperface")
+    if mnpf is not None:
+        sizes["max_nodes_per_face"] = int(mnpf.size)
+    elif orders.get("face_node_connectivity"):
+        shape = shapes[values["face_node_connectivity"]]
+        sizes["max_nodes_per_face"] = shape[1] if orders["face_node_connectivity"] == "regular" else shape[0]
+    return sizes
+
+
+class MeshTopology:
+    """Read-only description of a mesh topology variable.
+
+    Built once per mesh by ``UgridChecker.setup``. Each of ``MESH_ATTRIBUTES``
+    holds the value of the mesh attribute (None if undefined). Dimensions and
+    the variables the mesh points to are resolved up front and stored as
+    plain ints and tuples, so the checks can share the descriptor without
+    further netCDF lookups and it holds no reference to the dataset.
+
+    Attributes:
+        name                : name of the mesh variable
+        shapes              : {variable name: shape} of the variables named by
+                              the connectivity, coordinate and shape type
+                              attributes
+        orders              : {node connectivity type: "regular", "nonstd" or
+                              None} dimension ordering of the node connectivities
+        nnodes              : number of nodes (length of the node coordinates)
+        nedges, nfaces      : number of edges/faces, if the corresponding node
+                              connectivity has a valid shape
+        nvolumes            : number of volumes, if volume_node_connectivity
+                              has a valid shape
+        max_nodes_per_face  : size of the ``maxnumnodesperface`` dimension, or
+                              number of nodes per row of face_node_connectivity
+        max_nodes_per_volume: number of nodes per row of volume_node_connectivity
+        dimensions          : {location: (dimension name, size)} of the node,
+                              edge, face and volume elements of the mesh
+
+    """
+
+    __slots__ = (
+        "dimensions",
+        "max_nodes_per_face",
+        "max_nodes_per_volume",
+        "name",
+        "nedges",
+        "nfaces",
+        "nnodes",
+        "nvolumes",
+        "orders",
+        "shapes",
+        *MESH_ATTRIBUTES,
+    )
+
+    def __init__(self, name, **values):
+        values["name"] = name
+        for slot in self.__slots__:
+            object.__setattr__(self, slot, values.pop(slot, None))
+        if values:
+            msg = f"Unknown mesh topology fields: {', '.join(sorted(values))}"
+            raise TypeError(msg)
+        for slot in ("dimensions", "orders", "shapes"):
+            object.__setattr__(self, slot, types.MappingProxyType(dict(getattr(self, slot) or {})))
+
+    def __setattr__(self, name, value):
+        """Refuse to modify the descriptor."""
+        msg = f"MeshTopology is read-only, use replace() to change {name!r}"
+        raise AttributeError(msg)
+
+    def __delattr__(self, name):
+        """Refuse to modify the descriptor."""
+        msg = f"MeshTopology is read-only, cannot delete {name!r}"
+        raise AttributeError(msg)
+
+    def __repr__(self):
+        """Representation with the defined attributes."""
+        fields = ", ".join(f"{s}={getattr(self, s)!r}" for s in self.__slots__ if getattr(self, s) is not None)
+        return f"{type(self).__name__}({fields})"
+
+    def __reduce__(self):
+        """Support pickling, e.g. to send descriptors between processes."""
+        return functools.partial(type(self), **self.as_dict()), ()
+
+    def as_dict(self):
+        """Return the fields of the descriptor as a plain dict."""
+        values = {s: getattr(self, s) for s in self.__slots__}
+        values["dimensions"] = dict(self.dimensions)
+        values["orders"] = dict(self.orders)
+        values["shapes"] = dict(self.shapes)
+        return values
+
+    def replace(self, **changes):
+        """Return a copy of the descriptor with some fields replaced."""
+        values = self.as_dict()
+        values.update(changes)
+        return type(self)(**values)
+
+    @classmethod
+    def from_variable(cls, ds, mesh):
+        """Build the descriptor of a mesh topology variable.
+
+        The mesh attributes are read with a single ``ncattrs()`` snapshot.
+
+        :param netCDF4 dataset ds    : dataset holding the mesh
+        :param netCDF4 variable mesh : mesh topology variable
+        """
+        names = mesh.ncattrs()
+        values = {att: mesh.getncattr(att) if att in names else None for att in MESH_ATTRIBUTES}
+
+        shapes = {}
+        for att in MESH_ATTRIBUTES:
+            if att.endswith(("_connectivity", "_coordinates", "_shape_type")) and isinstance(values[att], str):
+                for name in values[att].split():
+                    var = ds.variables.get(name)
+                    if var is not None:
+                        shapes[name] = tuple(int(n) for n in var.shape)
+
+        orders = connectivity_orders(ds, values)
+
+        nnodes = None
+        if isinstance(values["node_coordinates"], str):
+            ncoords = values["node_coordinates"].split()
+            if ncoords and ncoords[0] in shapes:
+                nnodes = math.prod(shapes[ncoords[0]])
+
+        return cls(
+            mesh.name,
+            dimensions=element_dimensions(ds, values, orders),
+            nnodes=nnodes,
+            orders=orders,
+            shapes=shapes,
+            **element_sizes(ds, values, shapes, orders),
+            **values,
+        )
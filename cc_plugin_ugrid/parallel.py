@@ -0,0 +1,90 @@
+"""Chunk-parallel map/reduce over the blocks of large arrays.
+
+Data-level checks process arrays that may not fit in memory block by block.
+``map_blocks`` hands the blocks to a thread pool as they are read: reading
+stays in the calling thread, in order (netCDF4 and HDF5 reads are not
+thread-safe, and are serialized anyway), while the NumPy work on the blocks,
+which releases the GIL, runs on all the workers. At most ``inflight`` blocks
+are held at once, so memory use stays within the budget given to ``plan``.
+``tree_reduce`` then combines the partial results of the blocks pairwise.
+"""
+
+import collections
+import re
+from concurrent.futures import ThreadPoolExecutor
+
+MEMORY_BUDGET = 2**28  # default bytes of blocks held at once
+OVERHEAD = 4  # working memory of a block (copies, masks), as a multiple of its size
+
+_UNITS = {"": 1, "k": 2**10, "m": 2**20, "g": 2**30, "t": 2**40}
+
+
+def parse_size(text):
+    """Parse a size in bytes, with an optional K, M, G or T suffix.
+
+    :param str text: size, e.g. "4096" or "512M"
+    """
+    match = re.fullmatch(r"\s*(\d+)\s*([kmgt]?)i?b?\s*", str(text), re.IGNORECASE)
+    if match is None:
+        msg = f"Invalid size: {text!r}"
+        raise ValueError(msg)
+    return int(match.group(1)) * _UNITS[match.group(2).lower()]
+
+
+def plan(itemsize, chunk_size, memory_budget=MEMORY_BUDGET):
+    """Size the blocks of an array and the number held at once to fit a budget.
+
+    :param int itemsize     : bytes per value of the array
+    :param int chunk_size   : maximum number of values per block
+    :param int memory_budget: bytes of blocks held at once, including their
+                              working memory (see ``OVERHEAD``)
+
+    :returns int, int: number of values per block and number of blocks in flight
+    """
+    chunk_size = max(1, min(chunk_size, memory_budget // (itemsize * OVERHEAD)))
+    return chunk_size, max(1, memory_budget // (chunk_size * itemsize * OVERHEAD))
+
+
+def map_blocks(func, blocks, *, workers=1, inflight=1):
+    """Apply a function to blocks on a thread pool, yielding results in order.
+
+    The next block is only read once fewer than ``inflight`` blocks are
+    waiting or being processed.
+
+    :param callable func  : called with (offset, block) of each block
+    :param iterable blocks: (offset, block) pairs, e.g. from
+                            ``connectivity.iter_blocks``
+    :param int workers    : number of threads; with 1, the blocks are
+                            processed in the calling thread
+    :param int inflight   : maximum number of blocks held at once
+
+    :returns generator: the results of ``func``, in block order
+    """
+    if workers == 1 or inflight == 1:
+        for offset, block in blocks:
+            yield func(offset, block)
+        return
+    with ThreadPoolExecutor(min(workers, inflight)) as pool:
+        pending = collections.deque()
+        for offset, block in blocks:
+            pending.append(pool.submit(func, offset, block))
+            if len(pending) >= inflight:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+
+def tree_reduce(combine, values, initial=None):
+    """Combine values pairwise, in order, until one is left.
+
+    :param callable combine: called with two adjacent values (or partial
+                             results), returns their combination
+    :param iterable values : values to combine
+    :param initial         : returned if there are no values
+    """
+    values = list(values)
+    if not values:
+        return initial
+    while len(values) > 1:
+        values = [combine(*values[i : i + 2]) if i + 1 < len(values) else values[i] for i in range(0, len(values), 2)]
+    return values[0]
@@ -0,0 +1,146 @@
+"""Timing and memory instrumentation of the UGRID checks.
+
+Enabled with the ``profile`` checker option. Each check run on each mesh is
+measured for its wall time, CPU time, the bytes it read from the dataset
+(through ``UgridChecker.reader``) and its peak Python/NumPy allocation (with
+``tracemalloc``). The measurements are collected in ``UgridChecker.profile``
+and logged to ``cc_plugin_ugrid.logger`` at INFO level.
+
+Times and bytes read are those of the thread running the check. Memory is
+traced for the whole process, so when checks run concurrently (``threads``
+option) their peaks include each other's allocations.
+"""
+
+import contextlib
+import time
+import tracemalloc
+import typing
+
+
+@contextlib.contextmanager
+def trace_memory():
+    """Trace memory allocations for the duration of the block.
+
+    Used around concurrent checks, so that a check finishing does not stop
+    the tracing of the others. Does nothing if tracing is already on.
+    """
+    if tracemalloc.is_tracing():
+        yield
+        return
+    tracemalloc.start()
+    try:
+        yield
+    finally:
+        tracemalloc.stop()
+
+
+class CheckTiming(typing.NamedTuple):
+    """Measurements of a single check on a single mesh.
+
+    Attributes:
+        mesh      : name of the mesh variable
+        check     : name of the check method
+        wall      : wall-clock time, in seconds
+        cpu       : CPU time of the thread running the check, in seconds
+        bytes_read: bytes of array values read from the dataset
+        peak_bytes: peak memory allocated while the check ran, above the
+                    memory allocated when it started
+
+    """
+
+    mesh: str
+    check: str
+    wall: float
+    cpu: float
+    bytes_read: int
+    peak_bytes: int
+
+
+class Profile:
+    """Measurements of the checks run on a dataset, in the order they ran.
+
+    :param logging.Logger logger: logger the measurements are emitted to, or
+                                  None to only collect them
+    """
+
+    def __init__(self, logger=None):
+        self.logger = logger
+        self.timings = []
+
+    def __iter__(self):
+        """Iterate over the CheckTiming records."""
+        return iter(self.timings)
+
+    def __len__(self):
+        """Return the number of checks measured."""
+        return len(self.timings)
+
+    def run(self, mesh, check, func, *args, reader=None):
+        """Call a check and record its measurements.
+
+        :param str mesh          : name of the mesh variable
+        :param str check         : name of the check method
+        :param callable func     : check to call with ``args``
+        :param ArrayReader reader: reader whose ``bytes_read`` is counted
+
+        :returns: the result of the check
+        """
+        tracing = tracemalloc.is_tracing()
+        if tracing:
+            tracemalloc.reset_peak()
+        else:
+            tracemalloc.start()
+        base, _ = tracemalloc.get_traced_memory()
+        read = reader.thread_bytes_read() if reader is not None else 0
+        wall, cpu = time.perf_counter(), time.thread_time()
+        try:
+            return func(*args)
+        finally:
+            wall, cpu = time.perf_counter() - wall, time.thread_time() - cpu
+            _, peak = tracemalloc.get_traced_memory()
+            if not tracing:
+                tracemalloc.stop()
+            read = reader.thread_bytes_read() - read if reader is not None else 0
+            self.add(CheckTiming(mesh, check, wall, cpu, read, max(0, peak - base)))
+
+    def add(self, timing):
+        """Record a CheckTiming, logging it if a logger was given."""
+        self.timings.append(timing)
+        if self.logger is not None:
+            self.logger.info(
+                "%s %s: %.4fs wall, %.4fs cpu, %d bytes read, %d bytes peak",
+                timing.mesh,
+                timing.check,
+                timing.wall,
+                timing.cpu,
+                timing.bytes_read,
+                timing.peak_bytes,
+            )
+
+    def by_check(self):
+        """Aggregate the measurements of each check over all meshes.
+
+        :returns dict: {check name: CheckTiming} with times and bytes read
+                       summed and the largest peak allocation
+        """
+        totals = {}
+        for t in self.timings:
+            prev = totals.get(t.check)
+            if prev is None:
+                totals[t.check] = t._replace(mesh="*")
+            else:
+                totals[t.check] = prev._replace(
+                    wall=prev.wall + t.wall,
+                    cpu=prev.cpu + t.cpu,
+                    bytes_read=prev.bytes_read + t.bytes_read,
+                    peak_bytes=max(prev.peak_bytes, t.peak_bytes),
+                )
+        return totals
+
+    def slowest(self, n=5):
+        """Return the ``n`` measurements with the largest wall time."""
+        return sorted(self.timings, key=lambda t: t.wall, reverse=True)[:n]
+
+    def as_dicts(self):
+        """Return the measurements as a list of plain dicts, e.g. for JSON."""
+        return [t._asdict() for t in self.timings]
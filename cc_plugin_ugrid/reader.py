@@ -0,0 +1,352 @@
+"""Zero-copy access to the arrays of uncompressed netCDF files.
+
+Fixed-size variables of netCDF3 (classic, 64-bit offset and 64-bit data)
+files, and contiguous, unfiltered variables of netCDF4 files (if ``h5py`` is
+installed), are stored as a single contiguous block. ``ArrayReader`` hands
+them out as ``numpy.memmap`` views at their offset in the file, bypassing the
+per-slice copies of netCDF4. Any other variable, and any variable whose
+values netCDF4 would mask or unpack (``missing_value``, valid range,
+``scale_factor``/``add_offset``), is read through netCDF4.
+
+netCDF4 and HDF5 are not thread-safe: when the dataset is shared by several
+threads, ``ArrayReader`` hands out ``LockedVariable`` views that serialize
+the reads.
+"""
+
+import struct
+import threading
+from pathlib import Path
+
+import numpy as np
+
+try:
+    import h5py
+except ImportError:
+    h5py = None
+
+# attributes netCDF4 applies to the values read, which memory maps do not
+UNPACKING_ATTRIBUTES = frozenset(("add_offset", "missing_value", "scale_factor", "valid_max", "valid_min", "valid_range"))
+
+# netCDF3 external types
+_NC3_TYPES = {
+    1: "i1",
+    2: "S1",
+    3: ">i2",
+    4: ">i4",
+    5: ">f4",
+    6: ">f8",
+    7: "u1",
+    8: ">u2",
+    9: ">u4",
+    10: ">i8",
+    11: ">u8",
+}
+
+
+class _Header:
+    """Sequential reader of a netCDF3 header."""
+
+    def __init__(self, fp):
+        magic = fp.read(4)
+        if magic[:3] != b"CDF" or magic[3] not in (1, 2, 5):
+            msg = "not a netCDF3 file"
+            raise ValueError(msg)
+        self.fp = fp
+        self.version = magic[3]
+        self.size = 8 if self.version == 5 else 4  # size of counts and lengths
+
+    def int(self, size=4):
+        """Read a big-endian unsigned integer."""
+        return struct.unpack(">Q" if size == 8 else ">I", self.fp.read(size))[0]
+
+    def count(self):
+        """Read a non-negative count or length."""
+        return self.int(self.size)
+
+    def name(self):
+        """Read a padded name."""
+        n = self.count()
+        name = self.fp.read(n).decode("utf-8")
+        self.fp.read(-n % 4)
+        return name
+
+    def skip_attributes(self):
+        """Skip an attribute list."""
+        self.int()  # tag (NC_ATTRIBUTE or ABSENT)
+        for _ in range(self.count()):
+            self.name()
+            nc_type = self.int()
+            nbytes = self.count() * np.dtype(_NC3_TYPES[nc_type]).itemsize
+            self.fp.read(nbytes + -nbytes % 4)
+
+
+def netcdf3_layout(path):
+    """Locate the fixed-size variables of a netCDF3 file.
+
+    Record variables are interleaved on disk and therefore not included.
+
+    :param str path: path of the netCDF3 file
+
+    :returns dict: {variable name: (offset, dtype, shape)}
+    """
+    with Path(path).open("rb") as fp:
+        header = _Header(fp)
+        header.count()  # numrecs
+
+        dims = []
+        header.int()  # tag (NC_DIMENSION or ABSENT)
+        for _ in range(header.count()):
+            header.name()
+            dims.append(header.count())  # 0 for the record dimension
+
+        header.skip_attributes()  # global attributes
+
+        layout = {}
+        header.int()  # tag (NC_VARIABLE or ABSENT)
+        for _ in range(header.count()):
+            name = header.name()
+            dimids = [header.count() for _ in range(header.count())]
+            header.skip_attributes()
+            dtype = np.dtype(_NC3_TYPES[header.int()])
+            header.count()  # vsize
+            offset = header.int(4 if header.version == 1 else 8)
+            shape = tuple(dims[d] for d in dimids)
+            if 0 not in shape or not shape:  # not a record variable
+                layout[name] = (offset, dtype, shape)
+    return layout
+
+
+def hdf5_layout(path, names):
+    """Locate contiguous, unfiltered variables of a netCDF4 (HDF5) file.
+
+    Requires ``h5py``; returns an empty dict without it.
+
+    :param str path    : path of the netCDF4 file
+    :param iterable names: names of the variables of the root group
+
+    :returns dict: {variable name: (offset, dtype, shape)}
+    """
+    layout = {}
+    if h5py is None:
+        return layout
+    with h5py.File(path, "r") as f:
+        for name in names:
+            dset = f.get(name)
+            if not isinstance(dset, h5py.Dataset) or dset.chunks is not None or dset.compression:
+                continue
+            offset = dset.id.get_offset()
+            if offset is not None:
+                layout[name] = (offset, dset.dtype, dset.shape)
+    return layout
+
+
+class MappedVariable:
+    """A netCDF4 variable whose values are read from a memory map.
+
+    Slicing returns views of the file; attributes are those of the netCDF4
+    variable. Values are returned raw, without masking or scaling, so
+    variables with any of ``UNPACKING_ATTRIBUTES`` are not memory-mapped;
+    ``_FillValue`` is left to the callers, which read connectivity arrays
+    raw anyway.
+    """
+
+    __slots__ = ("data", "variable")
+
+    def __init__(self, variable, data):
+        self.variable = variable
+        self.data = data
+
+    @property
+    def name(self):
+        """Name of the variable."""
+        return self.variable.name
+
+    @property
+    def shape(self):
+        """Shape of the variable."""
+        return self.data.shape
+
+    @property
+    def ndim(self):
+        """Number of dimensions of the variable."""
+        return self.data.ndim
+
+    @property
+    def dtype(self):
+        """Data type of the variable."""
+        return self.data.dtype
+
+    def __len__(self):
+        """Length of the first dimension."""
+        return len(self.data)
+
+    def __getitem__(self, key):
+        """Return a view of the values."""
+        return self.data[key]
+
+    def ncattrs(self):
+        """Attribute names of the variable."""
+        return self.variable.ncattrs()
+
+    def getncattr(self, name):
+        """Attribute value of the variable."""
+        return self.variable.getncattr(name)
+
+
+class LockedVariable:
+    """A netCDF4 variable read under a lock, for datasets shared by threads.
+
+    The auto-masking state is held by the view and applied for the duration
+    of each read, so threads toggling it (see
+    ``cc_plugin_ugrid.connectivity.raw_values``) on their own views of the
+    same variable do not interfere. Every other attribute is read from the
+    wrapped variable under the lock.
+    """
+
+    __slots__ = ("lock", "mask", "variable")
+
+    def __init__(self, variable, lock):
+        self.variable = variable
+        self.lock = lock
+        self.mask = variable.mask
+
+    def __getattr__(self, name):
+        """Delegate to the wrapped variable."""
+        with self.lock:
+            return getattr(self.variable, name)
+
+    def __len__(self):
+        """Length of the first dimension."""
+        with self.lock:
+            return len(self.variable)
+
+    def set_auto_mask(self, mask):
+        """Set the auto-masking of the reads through this view."""
+        self.mask = mask
+
+    def ncattrs(self):
+        """Attribute names of the variable."""
+        with self.lock:
+            return self.variable.ncattrs()
+
+    def getncattr(self, name):
+        """Attribute value of the variable."""
+        with self.lock:
+            return self.variable.getncattr(name)
+
+    def __getitem__(self, key):
+        """Return the values, masked according to this view."""
+        with self.lock:
+            mask = self.variable.mask
+            self.variable.set_auto_mask(self.mask)
+            try:
+                return self.variable[key]
+            finally:
+                self.variable.set_auto_mask(mask)
+
+
+class CountedVariable:
+    """A variable counting the bytes of the values sliced from it.
+
+    Every other attribute is delegated to the wrapped variable, so it can be
+    used wherever a netCDF4 variable or ``MappedVariable`` is expected.
+    """
+
+    __slots__ = ("reader", "variable")
+
+    def __init__(self, variable, reader):
+        self.variable = variable
+        self.reader = reader
+
+    def __getattr__(self, name):
+        """Delegate to the wrapped variable."""
+        return getattr(self.variable, name)
+
+    def __len__(self):
+        """Length of the first dimension."""
+        return len(self.variable)
+
+    def __getitem__(self, key):
+        """Return the values, adding their size to the reader's counts."""
+        values = self.variable[key]
+        self.reader.add_bytes_read(getattr(values, "nbytes", 0))
+        return values
+
+
+class ArrayReader:
+    """Hand out the variables of a dataset, memory-mapped when possible.
+
+    The memory-mapped path reads the file on disk, so it must only be enabled
+    for datasets opened read-only from a file (not diskless or in-memory
+    datasets, whose contents may differ from the file).
+
+    :param netCDF4 dataset ds: dataset to read from
+    :param bool memmap       : enable the memory-mapped fast path
+    :param bool count        : count the bytes read in ``bytes_read``
+    :param bool threads      : the dataset is shared by threads; netCDF4
+                               reads are serialized with ``lock``
+    """
+
+    def __init__(self, ds, *, memmap=False, count=False, threads=False):
+        self.ds = ds
+        self.memmap = memmap
+        self.count = count
+        self.threads = threads
+        self.lock = threading.RLock()
+        self.bytes_read = 0
+        self._local = threading.local()
+        self._layout = None
+        self._cache = {}
+
+    def add_bytes_read(self, nbytes):
+        """Add to the bytes read, in total and by the current thread."""
+        with self.lock:
+            self.bytes_read += nbytes
+        self._local.bytes_read = self.thread_bytes_read() + nbytes
+
+    def thread_bytes_read(self):
+        """Return the bytes read by the current thread."""
+        return getattr(self._local, "bytes_read", 0)
+
+    def layout(self):
+        """Return the {name: (offset, dtype, shape)} of the mappable variables."""
+        with self.lock:
+            if self._layout is None:
+                self._layout = {}
+                if self.memmap:
+                    try:
+                        path = self.ds.filepath()
+                        if self.ds.data_model.startswith("NETCDF3"):
+                            self._layout = netcdf3_layout(path)
+                        else:
+                            self._layout = hdf5_layout(path, self.ds.variables)
+                    except (OSError, ValueError, KeyError, struct.error):
+                        self._layout = {}
+            return self._layout
+
+    def __getitem__(self, name):
+        """Return a variable, as a MappedVariable if it can be memory-mapped."""
+        with self.lock:
+            if name not in self._cache:
+                self._cache[name] = self._map(name)
+            var = self._cache[name]
+        if self.threads and not isinstance(var, MappedVariable):
+            var = LockedVariable(var, self.lock)
+        if self.count:
+            var = CountedVariable(var, self)
+        return var
+
+    def _map(self, name):
+        """Memory-map a variable, falling back to the netCDF4 variable."""
+        var = self.ds.variables[name]
+        found = self.layout().get(name)
+        if found is None or UNPACKING_ATTRIBUTES.intersection(var.ncattrs()):
+            return var
+        offset, dtype, shape = found
+        if tuple(shape) != tuple(var.shape):
+            return var
+        path = self.ds.filepath()
+        nbytes = int(np.prod(shape, dtype=np.int64)) * dtype.itemsize
+        if nbytes == 0 or offset + nbytes > Path(path).stat().st_size:
+            return var
+        return MappedVariable(var, np.memmap(path, dtype=dtype, mode="r", offset=offset, shape=shape))
@@ -0,0 +1,98 @@
+"""Declarative registry and scheduler of the UGRID checks.
+
+Each check method declares, with the ``check`` decorator, the mesh fields it
+needs (``MeshTopology`` attributes such as ``nfaces`` or
+``edge_face_connectivity``), the checker options it needs (e.g.
+``validate_data``) and the checks it builds upon. ``schedule`` orders the
+checks of a class into a DAG; ``CheckSpec.applies`` tells whether a check has
+anything to do for a given mesh, so checks whose inputs are missing are not
+run at all.
+
+Methods named ``_check*`` without the decorator are still picked up, with no
+requirements and no dependencies.
+"""
+
+import functools
+import graphlib
+import typing
+
+PREFIX = "_check"
+
+
+class CheckSpec(typing.NamedTuple):
+    """Declaration of a check method.
+
+    Attributes:
+        name    : name of the check method
+        requires: MeshTopology fields that must be set (not None, empty or 0)
+        options : checker attributes that must be true, e.g. "validate_data"
+        after   : names of the checks that must run before this one
+        cacheable: whether the result only depends on the mesh variables, so
+                   it may be reused while the mesh is unchanged (see
+                   ``cache.mesh_fingerprint``)
+
+    """
+
+    name: str
+    requires: tuple = ()
+    options: tuple = ()
+    after: tuple = ()
+    cacheable: bool = True
+
+    def applies(self, checker, topo):
+        """Return True if the inputs of the check are present.
+
+        :param UgridChecker checker: checker holding the options
+        :param MeshTopology topo   : descriptor of the mesh to check
+        """
+        return all(getattr(checker, o, False) for o in self.options) and all(getattr(topo, r, None) for r in self.requires)
+
+
+def check(*, requires=(), options=(), after=(), cacheable=True):
+    """Declare the inputs and dependencies of a check method.
+
+    :param iterable requires: MeshTopology fields the check needs
+    :param iterable options : checker options the check needs
+    :param iterable after   : names of the checks it builds upon
+    :param bool cacheable   : False if the check reads variables other than
+                              those of the mesh
+    """
+
+    def decorate(func):
+        func.check_spec = CheckSpec(func.__name__, tuple(requires), tuple(options), tuple(after), cacheable)
+        return func
+
+    return decorate
+
+
+@functools.cache
+def schedule(cls):
+    """Order the checks of a checker class.
+
+    :param type cls: checker class
+
+    :returns tuple of tuple of CheckSpec: batches of checks in dependency
+             order; the checks of a batch only depend on earlier batches, so
+             they may run in any order or concurrently. Each batch is sorted
+             by name.
+    """
+    specs = {}
+    for name in dir(cls):
+        if name.startswith(PREFIX):
+            specs[name] = getattr(getattr(cls, name), "check_spec", None) or CheckSpec(name)
+
+    sorter = graphlib.TopologicalSorter()
+    for name, spec in specs.items():
+        unknown = set(spec.after) - set(specs)
+        if unknown:
+            msg = f"{name} depends on unknown checks: {', '.join(sorted(unknown))}"
+            raise ValueError(msg)
+        sorter.add(name, *spec.after)
+
+    batches = []
+    sorter.prepare()
+    while sorter.is_active():
+        ready = sorted(sorter.get_ready())
+        batches.append(tuple(specs[name] for name in ready))
+        sorter.done(*ready)
+    return tuple(batches)
@@ -0,0 +1,94 @@
+"""Tests for checking xarray datasets."""
+
+from pathlib import Path
+
+import numpy as np
+import pytest
+from netCDF4 import Dataset, default_fillvals
+
+from cc_plugin_ugrid import connectivity
+from cc_plugin_ugrid.batch import check_file
+from cc_plugin_ugrid.checker import UgridChecker
+
+xr = pytest.importorskip("xarray")
+adapter = pytest.importorskip("cc_plugin_ugrid.adapter")
+
+ugridnc = Path(__file__).absolute().parent.parent.joinpath("resources", "ugrid.nc")
+
+
+def run(ds, options=frozenset({"validate_data"})):
+    """Run the checks on a dataset."""
+    uchecker = UgridChecker(options=set(options))
+    uchecker.setup(ds)
+    return [(r.name, r.value, r.msgs) for r in uchecker.check_run(ds)]
+
+
+@pytest.fixture
+def expected():
+    """Results of the checks through netCDF4."""
+    with Dataset(ugridnc) as ds:
+        return run(ds)
+
+
+def test_netcdf(expected):
+    """A netCDF file opened with xarray gives the same results as with netCDF4."""
+    with adapter.open_dataset(ugridnc) as ds:
+        assert run(ds) == expected
+
+
+def test_zarr(tmp_path, expected):
+    """A Zarr store gives the same results as the netCDF file it was made from."""
+    pytest.importorskip("zarr")
+    store = tmp_path.joinpath("ugrid.zarr")
+    with xr.open_dataset(ugridnc, decode_cf=False, mask_and_scale=False) as ds:
+        for var in ds.variables.values():  # make the implicit netCDF fill explicit
+            if var.dtype.kind == "f":
+                var.attrs["_FillValue"] = default_fillvals[var.dtype.str[1:]]
+        ds.to_zarr(store)
+    with adapter.open_dataset(store) as ds:
+        assert run(ds) == expected
+    report = check_file(store, {"validate_data"})
+    assert report.error is None
+    assert [(r.name, r.value, r.msgs) for r in report.results] == expected
+
+
+def test_dataset_api():
+    """Dimensions, attributes and attribute queries follow netCDF4."""
+    with Dataset(ugridnc) as nc, adapter.open_dataset(ugridnc) as ds:
+        wrapped = adapter.as_dataset(ds)
+        assert adapter.as_dataset(nc) is nc
+        assert {d.name: d.size for d in wrapped.dimensions.values()} == {d.name: d.size for d in nc.dimensions.values()}
+        assert [v.name for v in wrapped.get_variables_by_attributes(cf_role="mesh_topology")] == ["mesh_topology", "mesh_topology2"]
+        assert [v.name for v in wrapped.get_variables_by_attributes(location=lambda v: v == "edge")] == ["late", "flux"]
+        var = wrapped.variables["nv"]
+        assert (var.dimensions, var.shape) == (nc["nv"].dimensions, nc["nv"].shape)
+        assert var.getncattr("cf_role") == "face_node_connectivity"
+        with pytest.raises(AttributeError):
+            var.getncattr("missing")
+        np.testing.assert_array_equal(var[:, 2:4], nc["nv"][:, 2:4])
+        assert wrapped.filepath() == str(ugridnc)
+
+
+@pytest.mark.parametrize("axis", [0, 1])
+def test_summarize(axis):
+    """The dask summary matches the blockwise NumPy summary, in either dimension order."""
+    da = pytest.importorskip("dask.array")
+    values = np.arange(4000).reshape(1000, 4) % 90 + 1
+    values[::2, 3] = -999
+    values[[5, 7], 0] = -999
+    values[9, 1] = 0
+    if axis == 1:
+        values = values.T.copy()
+    with Dataset("conn.nc", "w", diskless=True, persist=False) as nc:
+        nc.createDimension("a", values.shape[0])
+        nc.createDimension("b", values.shape[1])
+        var = nc.createVariable("conn", "i4", ("a", "b"), fill_value=-999)
+        var.start_index = 1
+        var[:] = values
+        expected = connectivity.summarize(var, 100, axis=axis, chunk_size=64)
+    assert expected[:2] == ((1, 9), (2, 5))
+    lazy = da.from_array(values, chunks=(97, 4) if axis == 0 else (4, 97))
+    invalid, padding, histogram = adapter.summarize(lazy, 1, 101, -999, axis)
+    assert (invalid, padding) == expected[:2]
+    np.testing.assert_array_equal(histogram, expected.histogram)
+    assert adapter.summarize(lazy, 0, 1001, -999, axis)[0] == (0, None)
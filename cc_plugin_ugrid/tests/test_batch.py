@@ -0,0 +1,148 @@
+"""Tests for the batch UGRID checking engine."""
+
+import json
+from pathlib import Path
+
+import pytest
+
+from cc_plugin_ugrid.batch import JsonLinesWriter, check_file, check_files, expand_paths, main, make_record, stream_files, summarize
+
+resources = Path(__file__).absolute().parent.parent.joinpath("resources")
+ugridnc = str(resources.joinpath("ugrid.nc"))
+
+
+def test_expand_paths():
+    """Globs are expanded and duplicates removed; plain paths pass through."""
+    paths = expand_paths([str(resources.joinpath("*.nc")), ugridnc, "missing.nc"])
+    assert paths == [str(resources.joinpath("fvcom.nc")), ugridnc, "missing.nc"]
+
+
+def test_check_file():
+    """A single file is checked as by the compliance checker."""
+    report = check_file(ugridnc)
+    assert report.error is None
+    assert report.passed
+    assert report.score == (25, 25)
+
+
+def test_check_file_error():
+    """A file that cannot be opened is reported, not raised."""
+    report = check_file("missing.nc")
+    assert report.error.startswith("FileNotFoundError")
+    assert not report.passed
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_check_files(workers):
+    """Serial and process-pool runs produce the same reports."""
+    reports = list(check_files([ugridnc, ugridnc + "*", "missing.nc"], workers=workers))
+    assert sorted(r.path for r in reports) == sorted([ugridnc, "missing.nc"])
+
+    summary = summarize(reports)
+    assert summary["files"] == 2
+    assert summary["passed"] == 1
+    assert summary["errors"] == 1
+    assert (summary["score"], summary["out_of"]) == (25, 25)
+
+
+def test_main(capsys):
+    """The CLI prints one line per file and a summary, and sets the exit code."""
+    assert main(["-j", "1", ugridnc]) == 0
+    out = capsys.readouterr().out.splitlines()
+    assert out == [f"{ugridnc}: 25/25", "1 files: 1 passed, 0 failed, 0 errors (25/25)"]
+
+    assert main(["-j", "1", ugridnc, "missing.nc"]) == 1
+
+
+def read_records(path):
+    """Read the records of a JSON-lines file."""
+    return [json.loads(line) for line in Path(path).read_text().splitlines()]
+
+
+@pytest.mark.parametrize(("workers", "options"), [(1, set()), (1, {"threads"}), (2, set())])
+def test_stream_files(tmp_path, workers, options):
+    """One record per (file, mesh, check), with the same keys, as in the reports."""
+    output = tmp_path.joinpath("results.jsonl")
+    reports = list(stream_files([ugridnc, "missing.nc"], output, workers=workers, options=options))
+    records = read_records(output)
+    assert {tuple(r) for r in records} == {tuple(make_record(ugridnc))}
+
+    results = check_file(ugridnc).results
+    checked = [r for r in records if r["file"] == ugridnc]
+    assert len(checked) == len(results)
+    assert sorted((r["name"], r["score"], r["out_of"]) for r in checked) == sorted((r.name, *r.value) for r in results)
+    assert {(r["mesh"], r["check"]) for r in checked} >= {
+        ("mesh_topology", "_check1_topology_dim"),
+        ("mesh_topology2", "_check1_topology_dim"),
+        (None, None),  # file-level result
+    }
+    assert all(r["passed"] and r["error"] is None for r in checked)
+    assert [r["error"] for r in records if r["file"] == "missing.nc"] == [reports[-1].error or reports[0].error]
+    assert summarize(reports)["files"] == 2
+
+
+def test_stream_files_resume(tmp_path):
+    """A resumed scan skips the files done and drops the records of an interrupted file."""
+    output = tmp_path.joinpath("results.jsonl")
+    checkpoint = tmp_path.joinpath("results.done")
+    fvcomnc = str(resources.joinpath("fvcom.nc"))
+    assert [r.path for r in stream_files([ugridnc], output, workers=1, checkpoint=checkpoint)] == [ugridnc]
+    first = output.read_text()
+    with output.open("a") as fp:  # interrupted while writing the records of fvcom.nc
+        fp.write(json.dumps(make_record(fvcomnc)) + "\n{")
+    with checkpoint.open("a") as fp:
+        fp.write('{"file": ')
+
+    reports = list(stream_files([ugridnc, fvcomnc], output, workers=1, checkpoint=checkpoint))
+    assert [r.path for r in reports] == [fvcomnc]
+    records = read_records(output)
+    assert output.read_text().startswith(first)
+    assert len([r for r in records if r["file"] == fvcomnc]) == len(check_file(fvcomnc).results)
+    assert list(stream_files([ugridnc, fvcomnc], output, workers=1, checkpoint=checkpoint)) == []
+    assert read_records(output) == records
+
+
+def test_resume_interleaved(tmp_path):
+    """The records of a file interrupted among the records of others are dropped on resume."""
+    output = tmp_path.joinpath("results.jsonl")
+    checkpoint = tmp_path.joinpath("results.done")
+    writer = JsonLinesWriter(output, checkpoint)
+    writer.write(make_record("a.nc", check="1"))
+    writer.write(make_record("b.nc", check="1"))
+    writer.write(make_record("a.nc", check="2"))
+    writer.commit("a.nc")
+    writer.write(make_record("c.nc", check="1"))
+    writer.write(make_record("b.nc", check="2"))
+    writer.commit("c.nc")
+    writer.write(make_record("b.nc", check="3"))
+    writer.close()  # interrupted while checking b.nc
+
+    for _ in range(2):  # resuming twice without progress changes nothing
+        with JsonLinesWriter(output, checkpoint) as writer:
+            assert writer.done == {"a.nc", "c.nc"}
+        assert [(r["file"], r["check"]) for r in read_records(output)] == [("a.nc", "1"), ("a.nc", "2"), ("c.nc", "1")]
+
+
+def test_resume_missing_output(tmp_path):
+    """A checkpoint whose output was removed or truncated is discarded."""
+    output = tmp_path.joinpath("results.jsonl")
+    checkpoint = tmp_path.joinpath("results.done")
+    assert len(list(stream_files([ugridnc], output, workers=1, checkpoint=checkpoint))) == 1
+    first = output.read_bytes()
+    output.unlink()
+    assert len(list(stream_files([ugridnc], output, workers=1, checkpoint=checkpoint))) == 1
+    assert output.read_bytes() == first
+
+    output.write_bytes(first[:10])
+    with JsonLinesWriter(output, checkpoint) as writer:
+        assert writer.done == set()
+    assert output.read_bytes() == b""
+    assert checkpoint.read_text() == ""
+
+
+def test_main_jsonl(tmp_path, capsys):
+    """With --jsonl, the records go to the file and only the summary is printed."""
+    output = tmp_path.joinpath("results.jsonl")
+    assert main(["-j", "1", "--jsonl", str(output), ugridnc]) == 0
+    assert capsys.readouterr().out.splitlines() == ["1 files: 1 passed, 0 failed, 0 errors (25/25)"]
+    assert len(read_records(output)) == len(check_file(ugridnc).results)
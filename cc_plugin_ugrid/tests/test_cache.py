@@ -0,0 +1,213 @@
+"""Tests for the on-disk result cache."""
+
+import os
+import shutil
+from pathlib import Path
+
+import numpy as np
+import pytest
+from netCDF4 import Dataset
+
+from cc_plugin_ugrid import cache, connectivity, topology
+from cc_plugin_ugrid.checker import UgridChecker
+
+ugridnc = Path(__file__).absolute().parent.parent.joinpath("resources", "ugrid.nc")
+
+
+@pytest.fixture
+def ncfile(tmp_path):
+    """Copy of the test file."""
+    return Path(shutil.copy(ugridnc, tmp_path.joinpath("ugrid.nc")))
+
+
+def run(path, options):
+    """Run the checks on a file."""
+    with Dataset(path) as ds:
+        uchecker = UgridChecker(options=options)
+        uchecker.setup(ds)
+        return uchecker, uchecker.check_run(ds)
+
+
+def test_hit(ncfile, tmp_path, monkeypatch):
+    """A cache hit returns the stored results without running any check."""
+    options = {f"cache={tmp_path / 'cache'}", "validate_data"}
+    _, first = run(ncfile, options)
+    assert len(list(tmp_path.joinpath("cache").glob("*.json"))) == 1
+
+    def fail(*_):
+        raise AssertionError
+
+    monkeypatch.setattr(UgridChecker, "run_mesh_check", fail)
+    _, second = run(ncfile, options)
+    assert second == first
+    assert [r.value for r in second] == [r.value for r in first]
+    # runtime options share the entry
+    assert run(ncfile, {*options, "threads", "memmap"})[1] == first
+
+    with pytest.raises(AssertionError):
+        run(ncfile, {*options, "refresh_cache"})
+    with pytest.raises(AssertionError):
+        run(ncfile, options - {"validate_data"})
+
+
+def test_fingerprint(ncfile):
+    """The key changes with the file's metadata, modification time and options."""
+    with Dataset(ncfile) as ds:
+        key = cache.fingerprint(ds, {"validate_data"})
+        assert cache.fingerprint(ds, {"validate_data", "profile", "cache=x"}) == key
+        assert cache.fingerprint(ds) != key
+
+    with Dataset(ncfile, "a") as ds:
+        ds.comment = "changed"
+    with Dataset(ncfile) as ds:
+        changed = cache.fingerprint(ds, {"validate_data"})
+        assert changed != key
+    stat = ncfile.stat()
+    os.utime(ncfile, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+    with Dataset(ncfile) as ds:
+        assert cache.fingerprint(ds, {"validate_data"}) != changed
+
+    with Dataset("notondisk.nc", "w", diskless=True, persist=False) as ds:
+        assert cache.fingerprint(ds) is None
+
+
+def test_lru_eviction(ncfile, tmp_path):
+    """The least recently used entries are evicted over the size limit."""
+    _, results = run(ncfile, set())
+    store = cache.ResultCache(tmp_path / "cache", max_bytes=10**9)
+    for i, key in enumerate("abc"):
+        store.put(key, results)
+        path = store.directory / f"{key}.json"
+        os.utime(path, ns=(i * 10**9, i * 10**9))
+    assert store.get("a") == results  # "a" becomes the most recently used
+    store.max_bytes = 2 * path.stat().st_size
+    store.evict()
+    assert store.get("b") is None
+    assert store.get("a") == results
+    assert store.get("c") == results
+    store.clear()
+    assert store.get("a") is None
+
+
+def test_incremental(tmp_path, monkeypatch):
+    """Appending records or other variables reuses the mesh results; changing the mesh does not."""
+    path = tmp_path.joinpath("mesh.nc")
+    with Dataset(path, "w") as ds:
+        ds.createDimension("nnodes", 4)
+        ds.createDimension("nfaces", 2)
+        ds.createDimension("three", 3)
+        ds.createDimension("time", None)
+        mesh = ds.createVariable("mesh", "i4")
+        mesh.cf_role = "mesh_topology"
+        mesh.topology_dimension = 2
+        mesh.node_coordinates = "lon lat"
+        mesh.face_node_connectivity = "fnc"
+        ds.createVariable("lon", "f8", ("nnodes",))[:] = [0, 1, 1, 0]
+        ds.createVariable("lat", "f8", ("nnodes",))[:] = [0, 0, 1, 1]
+        ds.createVariable("fnc", "i4", ("nfaces", "three"))[:] = [[0, 1, 2], [0, 2, 3]]
+        ds.createVariable("zeta", "f4", ("time", "nnodes"))
+
+    def fail(*_, **__):
+        raise AssertionError
+
+    options = {f"cache={tmp_path / 'cache'}", "incremental", "validate_data", "profile"}
+    runs = []
+    for step in range(5):
+        with Dataset(path, "a") as ds:
+            ds["zeta"][step] = [step] * 4
+            if step == 2:
+                ds.createDimension("nlevels", 5)
+                ds.createVariable("depth", "f8", ("nlevels",))[:] = range(5)
+            elif step == 3:
+                ds["fnc"].long_name = "faces"
+            elif step == 4:
+                ds["fnc"][1] = [0, 3, 2]
+        with monkeypatch.context() as patch:
+            if step in (1, 2):
+                patch.setattr(cache, "_hash_values", fail)  # the mesh key reads no value
+            uchecker, results = run(path, options | {"refresh_cache"} if step == 4 else options)
+        runs.append((len(uchecker.profile), [(r.value, r.msgs) for r in results]))
+
+    nchecks = runs[0][0]
+    assert nchecks > 0
+    assert runs[1] == (1, runs[0][1])  # time step appended: only the data variables are re-checked
+    assert runs[2][0] == 1  # unrelated dimension and variable added
+    assert runs[3][0] == nchecks  # connectivity metadata changed: re-run
+    assert runs[4][0] == nchecks  # values rewritten in place: re-run on request
+    # whole-file results are cached too
+    assert len(list(tmp_path.joinpath("cache").glob("*.json"))) == 7
+
+
+def test_derived_cache(tmp_path, monkeypatch):
+    """Files with the same mesh load the derived structures instead of deriving them."""
+    for name in ("a.nc", "b.nc"):
+        with Dataset(tmp_path.joinpath(name), "w") as ds:
+            ds.createDimension("nnodes", 4)
+            ds.createDimension("nfaces", 2)
+            ds.createDimension("maxnumnodesperface", 3)
+            mesh = ds.createVariable("mesh", "i4")
+            mesh.cf_role = "mesh_topology"
+            mesh.topology_dimension = 2
+            mesh.node_coordinates = "lon lat"
+            mesh.face_node_connectivity = "fnc"
+            mesh.face_face_connectivity = "ffc"
+            mesh.face_dimension = "nfaces"
+            ds.createVariable("lon", "f8", ("nnodes",))[:] = [0, 1, 1, 0]
+            ds.createVariable("lat", "f8", ("nnodes",))[:] = [0, 0, 1, 1]
+            ds.createVariable("fnc", "i4", ("nfaces", "maxnumnodesperface"))[:] = [[0, 1, 2], [0, 2, 3]]
+            ds.createVariable("ffc", "i4", ("nfaces", "maxnumnodesperface"), fill_value=-1)[:] = [[-1, -1, 1], [0, -1, -1]]
+
+    options = {f"derived_cache={tmp_path / 'derived'}", "validate_data"}
+    _, first = run(tmp_path.joinpath("a.nc"), options)
+    assert len(list(tmp_path.joinpath("derived").glob("*.npz"))) == 4  # summaries of fnc and ffc, node adjacency, edges
+
+    def fail(*_, **__):
+        raise AssertionError
+
+    monkeypatch.setattr(topology.MeshEdges, "from_faces", fail)
+    monkeypatch.setattr(topology.NodeAdjacency, "from_elements", fail)
+    monkeypatch.setattr(connectivity, "summarize", fail)
+    _, second = run(tmp_path.joinpath("b.nc"), options)
+    assert [(r.value, r.msgs) for r in second] == [(r.value, r.msgs) for r in first]
+
+    with Dataset(tmp_path.joinpath("b.nc"), "a") as ds:
+        ds["fnc"][1] = [0, 3, 2]
+    with pytest.raises(AssertionError):
+        run(tmp_path.joinpath("b.nc"), options)
+
+
+def test_derived_round_trip(tmp_path):
+    """Structures are stored as arrays and read back as the same NamedTuples, within the size limit."""
+    store = cache.DerivedCache(tmp_path, max_bytes=10**9)
+    summary = connectivity.IndexSummary((0, None), (2, 5), np.array([0, 0, 0, 7]))
+    store.put("a", summary)
+    loaded = store.get("a", connectivity.IndexSummary)
+    assert loaded[:2] == summary[:2]
+    np.testing.assert_array_equal(loaded.histogram, summary.histogram)
+    assert store.get("b", connectivity.IndexSummary) is None
+
+    edges = topology.MeshEdges.from_faces(np.array([[0, 1, 2], [0, 2, 3]]), 4)
+    store.put("b", edges)
+    loaded = store.get("b", topology.MeshEdges)
+    assert loaded.nnodes == 4
+    for name in edges._fields[1:]:
+        np.testing.assert_array_equal(getattr(loaded, name), getattr(edges, name))
+
+    store.max_bytes = tmp_path.joinpath("b.npz").stat().st_size
+    os.utime(tmp_path.joinpath("a.npz"), ns=(0, 0))
+    store.evict()
+    assert store.get("a", connectivity.IndexSummary) is None
+    assert store.get("b", topology.MeshEdges) is not None
+
+
+def test_caches_share_directory(tmp_path):
+    """Result and derived caches in one directory only evict and clear their own entries."""
+    results = cache.ResultCache(tmp_path, max_bytes=0)
+    derived = cache.DerivedCache(tmp_path)
+    assert not isinstance(derived, cache.ResultCache)
+    derived.put("a", connectivity.IndexSummary((0, None), (2, 5), np.array([0, 3])))
+    results.put("b", [])
+    assert results.get("b") is None  # over max_bytes
+    assert derived.get("a", connectivity.IndexSummary) is not None
+    derived.clear()
+    assert derived.get("a", connectivity.IndexSummary) is None
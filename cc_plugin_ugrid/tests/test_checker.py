@@ -3,11 +3,13 @@
 import logging
 from pathlib import Path
 
+import numpy as np
 import pytest
 from netCDF4 import Dataset
 
-from cc_plugin_ugrid import logger
+from cc_plugin_ugrid import coordinates, logger, parallel
 from cc_plugin_ugrid.checker import UgridChecker
+from cc_plugin_ugrid.reader import MappedVariable
 
 logger.addHandler(logging.NullHandler())
 logger.addHandler(logging.StreamHandler())
@@ -32,6 +34,107 @@ def checker():
     dset.close()
 
 
+def make_mesh(*, nonstd=False, fill=False, path=None, fmt="NETCDF4"):
+    """Build a two-triangle 2D mesh with real connectivity values.
+
+    The dataset is in memory unless a path is given.
+
+    3---2
+    | / |
+    0---1
+    """
+    ds = Dataset("mesh.nc", "w", diskless=True, persist=False, format=fmt) if path is None else Dataset(path, "w", format=fmt)
+    ds.createDimension("nnodes", 4)
+    ds.createDimension("nedges", 5)
+    ds.createDimension("nfaces", 2)
+    ds.createDimension("two", 2)
+    ds.createDimension("three", 3)
+    ds.createDimension("maxnumnodesperface", 4)
+    mesh = ds.createVariable("mesh", "i4")
+    mesh.cf_role = "mesh_topology"
+    mesh.topology_dimension = 2
+    mesh.node_coordinates = "lon lat"
+    mesh.edge_node_connectivity = "enc"
+    mesh.face_node_connectivity = "fnc"
+    mesh.edge_dimension = "nedges"
+    mesh.face_dimension = "nfaces"
+    mesh.edge_face_connectivity = "efc"
+    mesh.face_edge_connectivity = "fec"
+    mesh.face_face_connectivity = "ffc"
+    ds.createVariable("lon", "f8", ("nnodes",))[:] = [0, 1, 1, 0]
+    ds.createVariable("lat", "f8", ("nnodes",))[:] = [0, 0, 1, 1]
+    ds["lon"].units = "degrees_east"
+    ds["lat"].standard_name = "latitude"
+    enc = ds.createVariable("enc", "i4", ("nedges", "two"))
+    enc[:] = [[0, 1], [1, 2], [2, 3], [3, 0], [0, 2]]
+    enc.start_index = 0
+    efc = ds.createVariable("efc", "i4", ("nedges", "two"), fill_value=-999)
+    efc[:] = [[0, -999], [0, -999], [1, -999], [1, -999], [1, 0]]
+    efc.start_index = 0
+    fec = ds.createVariable("fec", "i4", ("nfaces", "maxnumnodesperface"), fill_value=-999)
+    fec[:] = [[1, 2, 5, -999], [5, 3, 4, -999]]
+    fec.start_index = 1
+    ffc = ds.createVariable("ffc", "i4", ("nfaces", "maxnumnodesperface"), fill_value=-999)
+    ffc[:] = [[-999, -999, 1, -999], [0, -999, -999, -999]]
+    ffc.start_index = 0
+    faces = np.array([[0, 1, 2], [0, 2, 3]])
+    if nonstd:
+        fnc = ds.createVariable("fnc", "i4", ("three", "nfaces"), fill_value=-1 if fill else None)
+        fnc[:] = faces.T
+    else:
+        fnc = ds.createVariable("fnc", "i4", ("nfaces", "three"), fill_value=-1 if fill else None)
+        fnc[:] = faces
+    fnc.start_index = 0
+    return ds
+
+
+def make_mixed_mesh(*, nonstd=False, faces=None):
+    """Build a mixed 2D mesh of a quadrilateral and two triangles.
+
+    face_node_connectivity has a column per node of the largest face, and
+    the rows of the triangles are padded with _FillValue. With ``nonstd``,
+    face_node_connectivity is in non-standard order. Other ``faces`` of 4
+    columns may be given, without face_face_connectivity.
+
+    3---4---5
+    |   | / |
+    0---1---2
+    """
+    ds = Dataset("mixed.nc", "w", diskless=True, persist=False)
+    ds.createDimension("nnodes", 6)
+    ds.createDimension("nfaces", 3 if faces is None else len(faces))
+    ds.createDimension("nmax_face", 4)
+    mesh = ds.createVariable("mesh", "i4")
+    mesh.cf_role = "mesh_topology"
+    mesh.topology_dimension = 2
+    mesh.node_coordinates = "lon lat"
+    mesh.face_node_connectivity = "fnc"
+    mesh.face_dimension = "nfaces"
+    ds.createVariable("lon", "f8", ("nnodes",))[:] = [0, 1, 2, 0, 1, 2]
+    ds.createVariable("lat", "f8", ("nnodes",))[:] = [0, 0, 0, 1, 1, 1]
+    if faces is None:
+        faces = np.array([[0, 1, 4, 3], [1, 2, 5, -1], [1, 5, 4, -1]])
+        mesh.face_face_connectivity = "ffc"
+        ffc = ds.createVariable("ffc", "i4", ("nfaces", "nmax_face"), fill_value=-1)
+        ffc[:] = [[-1, 2, -1, -1], [-1, -1, 2, -1], [1, -1, 0, -1]]
+        ffc.start_index = 0
+    fnc = ds.createVariable("fnc", "i4", ("nmax_face", "nfaces") if nonstd else ("nfaces", "nmax_face"), fill_value=-1)
+    fnc[:] = faces.T if nonstd else faces
+    fnc.start_index = 0
+    return ds
+
+
+@pytest.fixture
+def mesh_checker():
+    """Checker on a small synthetic mesh with data-level validation enabled."""
+    ds = make_mesh()
+    uchecker = UgridChecker(options={"validate_data"})
+    uchecker.setup(ds)
+
+    yield uchecker
+    ds.close()
+
+
 def test_expected_pass(checker):
     """The UgridChecker is set up to loop through the mesh variables inside a
     dataset, and then loop through the tests for each of these meshes. We
@@ -57,13 +160,16 @@ def test_expected_pass(checker):
         r = checker._check6_face_face_conn(mt)
         assert r.value[0] == r.value[1]
 
+        r = checker._check9_data_variable_binding(mt)
+        assert r.value[0] == r.value[1]
+
 
 # testing for correct failure behavior
 def test_fail_check1_topology_dim(checker):
     """Test that _check1_topology_dim fails without the wrong variable and without a topology variable."""
     # set wrong value for topo dimension for each mesh
     for mt in checker.meshes:
-        checker.meshes[mt]["topology_dimension"] = "NotMyProblem"
+        checker.meshes[mt] = checker.meshes[mt].replace(topology_dimension="NotMyProblem")
         r = checker._check1_topology_dim(mt)
         assert r.value[0] != r.value[1]
 
@@ -78,8 +184,10 @@ def test_fail_check2_connectivity_attrs(checker):
     """Test _check2_connectivity_attrs fails when the given topology dimensions do not match."""
     for mesh in checker.meshes:
         # remove the attrs
-        checker.meshes[mesh]["edge_node_connectivity"] = None
-        checker.meshes[mesh]["face_node_connectivity"] = None
+        checker.meshes[mesh] = checker.meshes[mesh].replace(
+            edge_node_connectivity=None,
+            face_node_connectivity=None,
+        )
         r = checker._check2_connectivity_attrs(mesh)
         assert r.value[0] != r.value[1]
 
@@ -89,6 +197,8 @@ def test_fail_check2_connectivity_attrs_bad_point(checker):
     for mesh in checker.meshes:
         mesh.setncattr("edge_node_connectivity", "fec")
         mesh.setncattr("face_node_connectivity", "fec")
+    checker.setup(checker.ds)  # rebuild the mesh topologies
+    for mesh in checker.meshes:
         r = checker._check2_connectivity_attrs(mesh)
         assert r.value[0] != r.value[1]
 
@@ -102,6 +212,8 @@ def test_fail_check_edge_face_coords(checker):
         # change the face_coordinates variable; this essentially
         #   changes the lengths of the vars
         mesh.setncattr("face_coordinates", "lon lat")
+    checker.setup(checker.ds)
+    for mesh in checker.meshes:
         r = checker.__check_edge_face_coords__(
             mesh,
             "face_node_connectivity",
@@ -117,6 +229,8 @@ def test_fail_check_nonstd_order_dims(checker):
     for mesh in checker.meshes:
         # remove edge_dimension
         mesh.delncattr("edge_dimension")
+    checker.setup(checker.ds)
+    for mesh in checker.meshes:
         r = checker.__check_nonstd_order_dims__(
             mesh,
             "edge_node_connectivity",
@@ -128,6 +242,8 @@ def test_fail_check_nonstd_order_dims_no_face_dim(checker):
     """Remove face_dimension."""
     for mesh in checker.meshes:
         mesh.delncattr("face_dimension")
+    checker.setup(checker.ds)
+    for mesh in checker.meshes:
         r = checker.__check_nonstd_order_dims__(
             mesh,
             "face_node_connectivity",
@@ -139,7 +255,7 @@ def test_fail_check3_ncoords_exist(checker):
     """Test _check3_ncoords_exist fails appropriately."""
     # remove topology dimension
     for mesh in checker.meshes:
-        checker.meshes[mesh]["topology_dimension"] = None
+        checker.meshes[mesh] = checker.meshes[mesh].replace(topology_dimension=None)
         r = checker._check3_ncoords_exist(mesh)
         assert r.value[0] != r.value[1]
 
@@ -148,6 +264,8 @@ def test_fail_check3_ncoords_exist_no_node_coords(checker):
     """Remove node coordinates."""
     for mesh in checker.meshes:
         del mesh.node_coordinates
+    checker.setup(checker.ds)
+    for mesh in checker.meshes:
         r = checker._check3_ncoords_exist(mesh)
         assert r.value[0] != r.value[1]
 
@@ -156,12 +274,16 @@ def test_fail_check3_ncoords_exist_diff_arr_len(checker):
     """Change the array length (2 to 3)."""
     for mesh in checker.meshes:
         mesh.setncattr("node_coordinates", "['lat', 'lon', 'both']")
+    checker.setup(checker.ds)
+    for mesh in checker.meshes:
         r = checker._check3_ncoords_exist(mesh)
         assert r.value[0] != r.value[1]
 
     # change the vars themselves
     for mesh in checker.meshes:
         mesh.setncattr("node_coordinates", "['notacoord', 'nope']")
+    checker.setup(checker.ds)
+    for mesh in checker.meshes:
         r = checker._check3_ncoords_exist(mesh)
         assert r.value[0] != r.value[1]
 
@@ -171,6 +293,8 @@ def test_fail_check4_edge_face_conn(checker):
     for mesh in checker.meshes:
         # change the edge_face_connectivity array
         mesh.setncattr("edge_face_connectivity", "nv")
+    checker.setup(checker.ds)
+    for mesh in checker.meshes:
         checker._check2_connectivity_attrs(mesh)  # run the dependency
         r = checker._check4_edge_face_conn(mesh)
         assert r.value[0] != r.value[1]
@@ -181,6 +305,8 @@ def test_fail_check5_face_edge_conn(checker):
     for mesh in checker.meshes:
         # change the face_edge_connectivity array
         mesh.setncattr("face_edge_connectivity", "nv")
+    checker.setup(checker.ds)
+    for mesh in checker.meshes:
         checker._check2_connectivity_attrs(mesh)  # run the dependency
         r = checker._check5_face_edge_conn(mesh)
         assert r.value[0] != r.value[1]
@@ -191,6 +317,576 @@ def test_fail_check6_face_face_conn(checker):
     for mesh in checker.meshes:
         # change the face_face_connectivity array
         mesh.setncattr("face_face_connectivity", "nv")
+    checker.setup(checker.ds)
+    for mesh in checker.meshes:
         checker._check2_connectivity_attrs(mesh)  # run the dependency
         r = checker._check6_face_face_conn(mesh)
         assert r.value[0] != r.value[1]
+
+
+def test_check_run_runs_each_check_once(checker):
+    """Every check runs exactly once per mesh, and again only after a new setup()."""
+    calls = {}
+
+    def counted(name, check):
+        def wrapper(mesh):
+            calls[(mesh.name, name)] = calls.get((mesh.name, name), 0) + 1
+            return check(mesh)
+
+        return wrapper
+
+    for name, check in list(checker.yield_checks()):
+        setattr(checker, name, counted(name, check))
+
+    first = checker.check_run(None)
+    second = checker.check_run(None)
+    assert [r.value for r in first] == [r.value for r in second]
+
+    names = [name for name, _ in checker.yield_checks()]
+    assert len(names) == 13
+    assert calls == {(mesh.name, name): 1 for mesh in checker.meshes for name, _ in checker.yield_checks(mesh)}
+
+    # a new setup() invalidates the cached results
+    checker.setup(checker.ds)
+    checker.check_run(None)
+    assert set(calls.values()) == {2}
+
+
+def test_validate_data_pass(mesh_checker):
+    """Valid connectivity values pass, whatever the chunk size."""
+    for chunk_size in (1, 4, 2**20):
+        mesh_checker.chunk_size = chunk_size
+        for mesh in mesh_checker.meshes:
+            r = mesh_checker._check2_connectivity_attrs(mesh)
+            assert r.value == (2, 2)
+
+
+@pytest.mark.parametrize("nonstd", [False, True])
+def test_validate_data_fill_value(nonstd):
+    """Entries equal to _FillValue are accepted, others out of range are not."""
+    ds = make_mesh(nonstd=nonstd, fill=True)
+    fnc = ds.variables["fnc"]
+    uchecker = UgridChecker(options={"validate_data"})
+    uchecker.chunk_size = 3
+    uchecker.setup(ds)
+    (mesh,) = uchecker.meshes
+
+    faces = np.array([[0, 1, 2], [0, 2, -1]])
+    fnc[:] = faces.T if nonstd else faces
+    assert uchecker._validate_nc_values(mesh, "face_node_connectivity", "nonstd" if nonstd else "regular") == (True, None)
+
+    faces[1, 2] = 4  # only 4 nodes, zero-based
+    fnc[:] = faces.T if nonstd else faces
+    uchecker.setup(ds)
+    valid, msg = uchecker._validate_nc_values(mesh, "face_node_connectivity", "nonstd" if nonstd else "regular")
+    assert not valid
+    assert msg.startswith("1 out of range")
+    assert "element 1" in msg
+    ds.close()
+
+
+def test_validate_data_padding():
+    """Fill values only pad the end of rows, and start_index and _FillValue are valid."""
+    ds = make_mesh(fill=True)
+    mesh = ds["mesh"]
+    mesh_checker = UgridChecker(options={"validate_data"})
+    mesh_checker.setup(ds)
+    assert mesh_checker.nodes_per_element(mesh) == {3: 2}
+    assert mesh_checker.nodes_per_element(mesh, "volume_node_connectivity") is None
+
+    ds["fnc"][:] = [[0, 1, 2], [0, -1, 3]]
+    ds["efc"].start_index = 2
+    mesh_checker.setup(ds)
+    assert mesh_checker.nodes_per_element(mesh) == {2: 1, 3: 1}
+    r = mesh_checker._check2_connectivity_attrs(mesh)
+    assert r.value == (1, 2)
+    assert r.msgs == [
+        "1 elements of face_node_connectivity have fill values before an index (first: 1)",
+        'Dataset contains invalid "face_node_connectivity" array',
+    ]
+    r = mesh_checker._check4_edge_face_conn(mesh)
+    assert r.value == (0, 1)
+    assert r.msgs[0] == "start_index of efc must be 0 or 1, not 2"
+    ds.close()
+
+
+def test_validate_data_fail_start_index(mesh_checker):
+    """A one-based start_index makes the zero-based values invalid."""
+    mesh_checker.ds.variables["enc"].start_index = 1
+    for mesh in mesh_checker.meshes:
+        r = mesh_checker._check2_connectivity_attrs(mesh)
+        assert r.value == (1, 2)
+
+
+def test_validate_data_is_opt_in(mesh_checker):
+    """Without the option, connectivity values are not read."""
+    mesh_checker.ds.variables["enc"][0, 0] = 99
+    mesh_checker.validate_data = False
+    for mesh in mesh_checker.meshes:
+        r = mesh_checker._check2_connectivity_attrs(mesh)
+        assert r.value == (2, 2)
+
+
+def test_check7_edge_face_topology(mesh_checker):
+    """edge_face_connectivity is consistent with face_node_connectivity."""
+    for mesh in mesh_checker.meshes:
+        r = mesh_checker._check7_edge_face_topology(mesh)
+        assert r.value == (1, 1)
+
+
+@pytest.mark.parametrize(("chunk_size", "chunk_threads"), [(2**20, 1), (2, 3)])
+def test_fail_check7_edge_face_topology(mesh_checker, chunk_size, chunk_threads):
+    """A face that does not contain the edge, or a missing neighbor, is reported, whatever the blocks."""
+    mesh_checker.chunk_size, mesh_checker.chunk_threads = chunk_size, chunk_threads
+    efc = mesh_checker.ds.variables["efc"]
+    efc[0, 0] = 1  # face 1 does not have edge (0, 1)
+    efc[4, 1] = -999  # edge (0, 2) is shared by both faces
+    for mesh in mesh_checker.meshes:
+        r = mesh_checker._check7_edge_face_topology(mesh)
+        assert r.value == (0, 1)
+        assert r.msgs == ["2 edges of edge_face_connectivity do not match face_node_connectivity (first: [0, 4])"]
+
+    # without data-level validation the check is skipped
+    mesh_checker.validate_data = False
+    for mesh in mesh_checker.meshes:
+        r = mesh_checker._check7_edge_face_topology(mesh)
+        assert r.value == (0, 0)
+
+
+def test_face_adjacency(mesh_checker):
+    """face_edge and face_face_connectivity match face_node_connectivity."""
+    for mesh in mesh_checker.meshes:
+        assert mesh_checker._check5_face_edge_conn(mesh).value == (1, 1)
+        assert mesh_checker._check6_face_face_conn(mesh).value == (1, 1)
+        # the derived edges are built once and shared
+        assert [key for key in mesh_checker._derived if key[1] == "edges"] == [(mesh.name, "edges")]
+
+
+@pytest.mark.parametrize(("chunk_size", "chunk_threads"), [(2**20, 1), (3, 2)])
+def test_fail_face_adjacency(mesh_checker, chunk_size, chunk_threads):
+    """Faces with wrong edges or neighbors are counted and listed, whatever the blocks."""
+    mesh_checker.chunk_size, mesh_checker.chunk_threads = chunk_size, chunk_threads
+    mesh_checker.ds.variables["fec"][1, 0] = 2  # edge (1, 2) is not in face 1
+    mesh_checker.ds.variables["ffc"][0, 0] = 0  # face 0 is not its own neighbor
+    for mesh in mesh_checker.meshes:
+        r = mesh_checker._check5_face_edge_conn(mesh)
+        assert r.value == (0, 1)
+        assert r.msgs == ["1 faces of face_edge_connectivity do not match face_node_connectivity (first: [1])"]
+
+        r = mesh_checker._check6_face_face_conn(mesh)
+        assert r.value == (0, 1)
+        assert r.msgs == ["1 faces of face_face_connectivity do not match face_node_connectivity (first: [0])"]
+
+
+@pytest.mark.parametrize("fmt", ["NETCDF3_CLASSIC", "NETCDF3_64BIT_DATA", "NETCDF4"])
+def test_memmap(tmp_path, fmt):
+    """Memory-mapped and netCDF4 reads give the same results."""
+    path = tmp_path.joinpath("mesh.nc")
+    make_mesh(path=path, fmt=fmt).close()
+
+    results = {}
+    with Dataset(path) as ds:
+        for options in ({"validate_data"}, {"validate_data", "memmap"}):
+            uchecker = UgridChecker(options=options)
+            uchecker.setup(ds)
+            results[len(options)] = [(r.value, r.msgs) for r in uchecker.check_run(ds)]
+            if fmt.startswith("NETCDF3"):
+                assert isinstance(uchecker.reader["fnc"], MappedVariable) == uchecker.memmap
+    assert results[1] == results[2]
+
+
+def test_profile(caplog):
+    """The profile option records every check run on every mesh."""
+    ds = make_mesh()
+    uchecker = UgridChecker(options={"validate_data", "profile"})
+    uchecker.setup(ds)
+    with caplog.at_level(logging.INFO, logger=logger.name):
+        results = uchecker.check_run(ds)
+    names = [name for mesh in uchecker.meshes for name, _ in uchecker.yield_checks(mesh)]
+    assert [t.check for t in uchecker.profile] == names
+    assert len(results) == len(names) + 1
+    timings = {t.check: t for t in uchecker.profile}
+    assert timings["_check1_topology_dim"].bytes_read == 0
+    assert timings["_check7_edge_face_topology"].bytes_read > 0
+    assert all(t.wall >= 0 and t.cpu >= 0 and t.peak_bytes >= 0 for t in uchecker.profile)
+    assert set(uchecker.profile.by_check()) == set(names)
+    assert "_check7_edge_face_topology" in caplog.text
+    # results are cached, so checks are measured once
+    uchecker.check_run(ds)
+    assert len(uchecker.profile) == len(names)
+    ds.close()
+
+    assert UgridChecker().profiling is False
+
+
+@pytest.mark.parametrize("options", [{"threads"}, {"threads=2", "profile"}, {"threads=1", "memmap"}])
+def test_threads(tmp_path, options):
+    """Checks run on a thread pool give the results of a sequential run, in the same order."""
+    path = tmp_path.joinpath("mesh.nc")
+    make_mesh(path=path, fill=True).close()
+    for dataset in (path, ugridnc):
+        with Dataset(dataset) as ds:
+            results = {}
+            for opts in ({"validate_data"}, {"validate_data", *options}):
+                uchecker = UgridChecker(options=opts)
+                uchecker.setup(ds)
+                results[uchecker.threads] = [(r.name, r.value, r.msgs) for r in uchecker.check_run(ds)]
+            assert results[True] == results[False]
+    workers = int(next(iter(o for o in options if o.startswith("threads"))).partition("=")[2] or 0) or None
+    assert uchecker.workers == workers
+
+
+def test_chunk_threads(tmp_path):
+    """Data-level checks on several threads within a memory budget give the same results."""
+    path = tmp_path.joinpath("mesh.nc")
+    make_mesh(path=path, fill=True).close()
+    with Dataset(path) as ds:
+        results = []
+        for opts in ({"validate_data"}, {"validate_data", "chunk_threads=3", "memory_budget=64"}, {"validate_data", "chunk_threads"}):
+            uchecker = UgridChecker(options=opts)
+            uchecker.setup(ds)
+            results.append([(r.name, r.value, r.msgs) for r in uchecker.check_run(ds)])
+        assert results[1] == results[0]
+        assert results[2] == results[0]
+    assert uchecker.chunk_threads >= 1
+    assert UgridChecker({"memory_budget=1M"}).memory_budget == 2**20
+
+
+def test_check8_node_coordinate_values(mesh_checker):
+    """Finite, in-range and distinct node coordinates pass."""
+    for mesh in mesh_checker.meshes:
+        r = mesh_checker._check8_node_coordinate_values(mesh)
+        assert r.value == (3, 3)
+        assert not r.msgs
+
+
+def test_fail_check8_node_coordinate_values(mesh_checker):
+    """Non-finite, out-of-range and duplicate nodes are reported."""
+    ds = mesh_checker.ds
+    ds["lon"][:] = [0, 1, 400, 0]
+    ds["lat"][:] = [0, np.nan, 1, 0]
+    mesh_checker.setup(ds)
+    for mesh in mesh_checker.meshes:
+        r = mesh_checker._check8_node_coordinate_values(mesh)
+        assert r.value == (0, 3)
+        assert r.msgs == [
+            "1 non-finite values in node coordinate lat (first in node 1)",
+            "1 out of range values in node coordinate lon (first in node 2)",
+            "1 nodes share their position with another node (first: [(3, 0)])",
+        ]
+
+
+@pytest.mark.parametrize("node_coordinates", [None, 7])
+def test_check8_node_coordinate_values_invalid_attribute(mesh_checker, node_coordinates):
+    """A missing or non-string node_coordinates skips the check instead of raising."""
+    for mesh in mesh_checker.meshes:
+        if node_coordinates is None:
+            mesh.delncattr("node_coordinates")
+        else:
+            mesh.node_coordinates = node_coordinates
+    mesh_checker.setup(mesh_checker.ds)
+    for mesh in mesh_checker.meshes:
+        assert mesh_checker._check8_node_coordinate_values(mesh).value == (0, 0)
+        assert mesh_checker._check11_face_winding(mesh).value == (0, 0)
+        assert mesh_checker._check3_ncoords_exist(mesh).value == (0, 1)
+    mesh_checker.check_run(mesh_checker.ds)
+
+
+def test_fail_check9_data_variable_binding(checker):
+    """Variables without a valid location, or lacking its dimension, are reported."""
+    ds = checker.ds
+    ds["temperature"].delncattr("location")
+    ds["flux"].location = "cell"
+    ds["lat"].location = "face"
+    ds["lon"].mesh = "missing"
+    ds["late"].mesh = "missing"
+    checker.setup(ds)
+    mesh = ds["mesh_topology"]
+    r = checker._check9_data_variable_binding(mesh)
+    assert r.value == (5, 8)
+    assert r.msgs == [
+        'Variable "lat" is located on faces but lacks their dimension "nfaces"',
+        'Variable "temperature" has a mesh but no location attribute',
+        'Invalid location "cell" of variable "flux"',
+    ]
+    checker.MAX_REPORTED = 1
+    assert checker._check9_data_variable_binding(mesh).msgs[-1] == "... and 2 more variables"
+    assert checker.check_run(None)[-1].msgs == ['Mesh "missing" referenced by late and 1 more is not a mesh topology variable']
+
+    ds["flux"].location = "edge"
+    ds["mesh_topology"].delncattr("edge_node_connectivity")
+    ds["mesh_topology"].delncattr("edge_dimension")
+    checker.setup(ds)
+    checker.MAX_REPORTED = 10
+    assert 'Variable "flux" is located on edges, which are not defined by the mesh' in checker._check9_data_variable_binding(mesh).msgs
+
+
+def test_check10_degenerate_faces(mesh_checker):
+    """Faces with distinct nodes and distinct node sets pass."""
+    for mesh in mesh_checker.meshes:
+        r = mesh_checker._check10_degenerate_faces(mesh)
+        assert r.value == (3, 3)
+        assert not r.msgs
+
+
+@pytest.mark.parametrize("nonstd", [False, True])
+def test_fail_check10_degenerate_faces(nonstd):
+    """Repeated nodes, collapsed faces and duplicate faces are reported; padding is not a node."""
+    faces = np.array([[0, 1, 2], [2, 0, 3], [0, 0, 1], [3, 3, -1], [3, 2, 0], [1, 2, 0], [1, 3, -1], [0, 1, 1]])
+    with Dataset("faces.nc", "w", diskless=True, persist=False) as ds:
+        ds.createDimension("nnodes", 4)
+        ds.createDimension("nfaces", len(faces))
+        ds.createDimension("three", 3)
+        mesh = ds.createVariable("mesh", "i4")
+        mesh.cf_role = "mesh_topology"
+        mesh.topology_dimension = 2
+        mesh.node_coordinates = "lon lat"
+        mesh.face_node_connectivity = "fnc"
+        ds.createVariable("lon", "f8", ("nnodes",))[:] = [0, 1, 1, 0]
+        ds.createVariable("lat", "f8", ("nnodes",))[:] = [0, 0, 1, 1]
+        if nonstd:
+            ds.createVariable("fnc", "i4", ("three", "nfaces"), fill_value=-1)[:] = faces.T
+        else:
+            ds.createVariable("fnc", "i4", ("nfaces", "three"), fill_value=-1)[:] = faces
+        uchecker = UgridChecker(options={"validate_data"})
+        uchecker.setup(ds)
+        uchecker.chunk_size = 6
+        uchecker.partition_size = 3
+        r = uchecker._check10_degenerate_faces(mesh)
+    assert r.value == (0, 3)
+    assert r.msgs == [
+        "3 faces list a node more than once (first: [2, 3, 7])",
+        "4 faces have fewer than 3 distinct nodes (first: [2, 3, 6, 7])",
+        "3 faces have the same nodes as another face (first: [(4, 1), (5, 0), (7, 2)])",
+    ]
+
+
+def test_check11_face_winding(mesh_checker):
+    """Faces listed anticlockwise pass."""
+    for mesh in mesh_checker.meshes:
+        r = mesh_checker._check11_face_winding(mesh)
+        assert r.value == (2, 2)
+        assert not r.msgs
+
+
+def test_fail_check11_face_winding(mesh_checker):
+    """Clockwise and flat faces are reported; faces across the antimeridian are not clockwise."""
+    ds = mesh_checker.ds
+    ds["fnc"][:] = [[0, 2, 1], [0, 1, 1]]
+    mesh_checker.setup(ds)
+    mesh = ds["mesh"]
+    r = mesh_checker._check11_face_winding(mesh)
+    assert r.value == (0, 2)
+    assert r.msgs == [
+        "1 faces have their nodes listed clockwise (first: [0])",
+        "1 faces have zero area (first: [1])",
+    ]
+
+    ds["lon"][:] = [179, -179, -179, 179]
+    ds["fnc"][:] = [[0, 1, 2], [0, 2, 3]]
+    mesh_checker.setup(ds)
+    assert mesh_checker._check11_face_winding(mesh).value == (2, 2)
+
+
+@pytest.mark.parametrize("memory_budget", [parallel.MEMORY_BUDGET, 64])
+def test_check11_face_winding_axes(mesh_checker, memory_budget):
+    """The longitude is x whatever the order of node_coordinates, and the nodes need not fit in the budget."""
+    ds = mesh_checker.ds
+    mesh = ds["mesh"]
+    mesh.node_coordinates = "lat lon"
+    mesh_checker.memory_budget = memory_budget
+    mesh_checker.chunk_size = 2
+    mesh_checker.setup(ds)
+    r = mesh_checker._check11_face_winding(mesh)
+    assert r.value == (2, 2)
+    assert not r.msgs
+
+    ds["fnc"][:] = [[0, 2, 1], [0, 2, 3]]
+    mesh_checker.setup(ds)
+    assert mesh_checker._check11_face_winding(mesh).msgs == ["1 faces have their nodes listed clockwise (first: [0])"]
+
+
+def test_signed_areas():
+    """Mixed polygons padded with fill values have their shoelace area; invalid faces are NaN."""
+    nodes = np.array([[0, 0], [2, 0], [2, 1], [0, 1], [1, 2]], dtype=np.float64)
+    faces = np.array(
+        [[0, 1, 2, 4, 3], [0, 1, 2, -1, -1], [3, 2, 1, 0, -1], [0, 1, -1, -1, -1], [0, -1, 1, 2, -1], [0, 1, 9, -1, -1], [0, 9, 1, 2, -1]],
+    )
+    area, _ = coordinates.signed_areas(faces, nodes)
+    np.testing.assert_allclose(area, [3, 1, -2, np.nan, np.nan, np.nan, np.nan])
+
+
+@pytest.mark.parametrize("memory_budget", [parallel.MEMORY_BUDGET, 64])
+def test_check11_face_winding_out_of_range(mesh_checker, memory_budget):
+    """An out-of-range node before the last node of a face skips the face instead of raising."""
+    ds = mesh_checker.ds
+    ds["fnc"][1, 1] = 99
+    mesh_checker.memory_budget = memory_budget
+    mesh_checker.chunk_threads = 2
+    mesh_checker.setup(ds)
+    assert mesh_checker._check11_face_winding(ds["mesh"]).value == (2, 2)
+    mesh_checker.check_run(ds)
+
+
+def hexahedra(ds, *, nonstd=False):
+    """Write a row of 3 hexahedra, with their shape types, faces and neighbors."""
+    nodes = np.arange(16).reshape(2, 2, 4)  # node index by z, y, x
+    volumes = np.array([[*nodes[z, 0, i : i + 2], *nodes[z, 1, i : i + 2][::-1]] for i in range(3) for z in (0, 1)]).reshape(3, 8)
+    faces = np.array([[0, 1, 2, 3, 4, 5], [5, 6, 7, 8, 9, 10], [10, 11, 12, 13, 14, 15]])
+    neighbors = np.array([[1, -1], [0, 2], [1, -1]])
+    ds.createDimension("nnodes", 16)
+    ds.createDimension("nvolumes", 3)
+    ds.createDimension("eight", 8)
+    ds.createDimension("six", 6)
+    ds.createDimension("two", 2)
+    mesh = ds.createVariable("mesh", "i4")
+    mesh.cf_role = "mesh_topology"
+    mesh.topology_dimension = 3
+    mesh.node_coordinates = "x y z"
+    mesh.volume_node_connectivity = "vnc"
+    mesh.volume_shape_type = "shape"
+    mesh.volume_face_connectivity = "vfc"
+    mesh.volume_volume_connectivity = "vvc"
+    for axis, name in enumerate("zyx"):
+        ds.createVariable(name, "f8", ("nnodes",))[:] = np.indices(nodes.shape)[axis].ravel()
+    shape = ds.createVariable("shape", "i1", ("nvolumes",))
+    shape.flag_values = np.array([0, 1, 2], dtype="i1")
+    shape.flag_meanings = "tetrahedron wedge hexahedron"
+    shape[:] = 2
+    for name, values, dim in (("vnc", volumes, "eight"), ("vfc", faces, "six"), ("vvc", neighbors, "two")):
+        if nonstd:
+            mesh.volume_dimension = "nvolumes"
+            ds.createVariable(name, "i4", (dim, "nvolumes"), fill_value=-1)[:] = values.T
+        else:
+            ds.createVariable(name, "i4", ("nvolumes", dim), fill_value=-1)[:] = values
+    return mesh
+
+
+@pytest.mark.parametrize("nonstd", [False, True])
+def test_check12_volume_topology(nonstd):
+    """Volume meshes pass the connectivity checks, in either dimension order."""
+    with Dataset("volumes.nc", "w", diskless=True, persist=False) as ds:
+        mesh = hexahedra(ds, nonstd=nonstd)
+        uchecker = UgridChecker(options={"validate_data"})
+        uchecker.setup(ds)
+        topo = uchecker.meshes[mesh]
+        assert topo.orders["volume_node_connectivity"] == ("nonstd" if nonstd else "regular")
+        assert (topo.nvolumes, topo.max_nodes_per_volume) == (3, 8)
+        assert topo.dimensions["volume"] == ("nvolumes", 3)
+        assert uchecker._check2_connectivity_attrs(mesh).value == (1, 1)
+        r = uchecker._check12_volume_topology(mesh)
+        assert r.value == (5, 5)
+        assert not r.msgs
+        assert uchecker._check13_connected_nodes(mesh).value == (2, 2)
+
+
+def test_fail_check12_volume_topology():
+    """Volumes not matching their shape type and inconsistent neighbors are reported."""
+    with Dataset("volumes.nc", "w", diskless=True, persist=False) as ds:
+        mesh = hexahedra(ds)
+        ds["shape"][:] = [2, 1, 7]
+        ds["vvc"][2] = [0, -1]
+        uchecker = UgridChecker(options={"validate_data"})
+        uchecker.setup(ds)
+        uchecker.chunk_size = 6
+        uchecker.partition_size = 2
+        r = uchecker._check12_volume_topology(mesh)
+        assert r.value == (3, 5)
+        assert r.msgs == [
+            "1 volumes do not have the number of nodes of their shape type (first: [1])",
+            "1 volumes have a shape type not listed in the flag_meanings of shape (first: [2])",
+            "1 volumes do not list the volumes sharing their faces as neighbors (first: [2])",
+        ]
+
+        ds["shape"][:] = 2
+        ds["vvc"][2] = [1, -1]
+        ds["vvc"][0] = [1, 3]
+        ds["vfc"][2, 0] = 5
+        uchecker.setup(ds)
+        r = uchecker._check12_volume_topology(mesh)
+        assert r.value == (4, 5)
+        assert r.msgs == [
+            "1 out of range indices in volume_volume_connectivity (first in element 0)",
+            "1 faces are shared by more than two volumes (first: [5])",
+            "3 volumes do not list the volumes sharing their faces as neighbors (first: [0, 1, 2])",
+        ]
+
+
+def test_check13_connected_nodes(mesh_checker):
+    """All the nodes of a connected mesh are used."""
+    for mesh in mesh_checker.meshes:
+        r = mesh_checker._check13_connected_nodes(mesh)
+        assert r.value == (2, 2)
+        assert not r.msgs
+        assert (mesh.name, "adjacency") in mesh_checker._derived
+
+
+def test_fail_check13_connected_nodes():
+    """Nodes of no element and disconnected parts are reported."""
+    faces = np.array([[0, 1, 2], [2, 1, 3], [3, 1, 4], [5, 6, 7], [9, 8, 7]])
+    with Dataset("islands.nc", "w", diskless=True, persist=False) as ds:
+        ds.createDimension("nnodes", 12)
+        ds.createDimension("nfaces", len(faces))
+        ds.createDimension("three", 3)
+        mesh = ds.createVariable("mesh", "i4")
+        mesh.cf_role = "mesh_topology"
+        mesh.topology_dimension = 2
+        mesh.node_coordinates = "lon lat"
+        mesh.face_node_connectivity = "fnc"
+        mesh.face_dimension = "nfaces"
+        ds.createVariable("lon", "f8", ("nnodes",))[:] = np.arange(12)
+        ds.createVariable("lat", "f8", ("nnodes",))[:] = np.arange(12) % 3
+        ds.createVariable("fnc", "i4", ("three", "nfaces"))[:] = faces.T
+        uchecker = UgridChecker(options={"validate_data"})
+        uchecker.setup(ds)
+        r = uchecker._check13_connected_nodes(mesh)
+    assert r.value == (0, 2)
+    assert r.msgs == [
+        "2 nodes are not part of any edge, face or volume (first: [10, 11])",
+        "The mesh has 2 disconnected parts (first node of each: [0, 5])",
+    ]
+
+
+@pytest.mark.parametrize("nonstd", [False, True])
+def test_mixed_mesh(nonstd):
+    """Faces padded with fill values up to the largest face are valid, and checked as such."""
+    ds = make_mixed_mesh(nonstd=nonstd)
+    mesh = ds["mesh"]
+    uchecker = UgridChecker(options={"validate_data"})
+    uchecker.setup(ds)
+    topo = uchecker.meshes[mesh]
+    assert (topo.nfaces, topo.max_nodes_per_face) == (3, 4)
+    assert topo.orders["face_node_connectivity"] == ("nonstd" if nonstd else "regular")
+    assert uchecker.nodes_per_element(mesh) == {3: 2, 4: 1}
+    for result in uchecker.check_run(ds):
+        assert result.value[0] == result.value[1], (result.name, result.msgs)
+    assert uchecker._check6_face_face_conn(mesh).value == (1, 1)
+    assert uchecker._check10_degenerate_faces(mesh).value == (3, 3)
+
+    faces = np.array([[0, 1, 4, 3], [1, -1, 2, 5], [1, 4, 4, -1]])
+    ds["fnc"][:] = faces.T if nonstd else faces
+    uchecker.setup(ds)
+    r = uchecker._check2_connectivity_attrs(mesh)
+    assert r.value == (0, 1)
+    assert r.msgs[0] == "1 elements of face_node_connectivity have fill values before an index (first: 1)"
+    assert uchecker._check10_degenerate_faces(mesh).msgs[0] == "1 faces list a node more than once (first: [2])"
+    ds.close()
+
+
+@pytest.mark.parametrize("nonstd", [False, True])
+def test_fail_check10_degenerate_mixed_faces(nonstd):
+    """Degenerate quadrilaterals and triangles are found in parallel blocks; indices out of range are not nodes."""
+    faces = np.array([[0, 1, 4, 3], [1, 2, 5, -1], [1, 5, 4, -1], [0, 1, 1, 4], [3, 4, 1, 0], [2, 5, 9, -1], [5, 9, 9, 2]])
+    ds = make_mixed_mesh(nonstd=nonstd, faces=faces)
+    uchecker = UgridChecker(options={"validate_data", "chunk_threads=2"})
+    uchecker.setup(ds)
+    uchecker.chunk_size = 8
+    uchecker.partition_size = 3
+    r = uchecker._check10_degenerate_faces(ds["mesh"])
+    assert r.value == (0, 3)
+    assert r.msgs == [
+        "1 faces list a node more than once (first: [3])",
+        "2 faces have fewer than 3 distinct nodes (first: [5, 6])",
+        "2 faces have the same nodes as another face (first: [(4, 0), (6, 5)])",
+    ]
+    ds.close()
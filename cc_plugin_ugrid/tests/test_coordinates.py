@@ -0,0 +1,104 @@
+"""Tests for the node coordinate helpers."""
+
+import threading
+
+import numpy as np
+import pytest
+from netCDF4 import Dataset
+
+from cc_plugin_ugrid import coordinates
+
+
+@pytest.fixture
+def nodes():
+    """Node coordinate variables with masked values and duplicates."""
+    rng = np.random.default_rng(0)
+    lon = rng.uniform(-180, 180, 1000).round(1)
+    lat = rng.uniform(-90, 90, 1000).round(1)
+    lon[[10, 20, 30]] = lon[5]
+    lat[[10, 20, 30]] = lat[5]
+    lon[40], lat[40] = -0.0, 0.0
+    lon[50], lat[50] = 0.0, -0.0
+    lon[60] = np.nan
+    lat[70] = 95
+    with Dataset("nodes.nc", "w", diskless=True, persist=False) as ds:
+        ds.createDimension("nnodes", len(lon))
+        x = ds.createVariable("x", "f8", ("nnodes",), fill_value=-999.0)
+        x.standard_name = "longitude"
+        x[:] = lon
+        x[80] = np.ma.masked
+        y = ds.createVariable("y", "f4", ("nnodes",))
+        y.units = "degrees_north"
+        y[:] = lat
+        yield [x, y]
+
+
+def test_coordinate_kind(nodes):
+    """Latitude and longitude are recognized by standard_name or units."""
+    assert [coordinates.coordinate_kind(var) for var in nodes] == ["longitude", "latitude"]
+
+
+def test_horizontal_axes(nodes):
+    """Longitude is x whatever the order; the axis attribute tells unknown variables apart."""
+    x, y = nodes
+    assert coordinates.horizontal_axes([y, x]) == ([x, y], True)
+    assert coordinates.horizontal_axes([x, y]) == ([x, y], True)
+    y.delncattr("units")
+    y.axis = "X"
+    x.delncattr("standard_name")
+    assert coordinates.horizontal_axes([x, y]) == ([y, x], False)
+
+
+@pytest.mark.parametrize("chunk_size", [7, 2**20])
+def test_gather_nodes(nodes, chunk_size):
+    """Only the nodes of the faces are read, in the order of the renumbered faces."""
+    faces = np.array([[999, 5, 60, -1], [5, 1000, 3, 80]])
+    local, gathered = coordinates.gather_nodes(nodes, faces, chunk_size)
+    assert local.tolist() == [[4, 1, 2, -1], [1, -1, 0, 3]]
+    np.testing.assert_array_equal(gathered, coordinates.read_nodes(nodes)[[3, 5, 60, 80, 999]])
+
+
+class ThreadRecorder:
+    """A variable recording the threads reading it."""
+
+    def __init__(self, variable, threads):
+        self.variable = variable
+        self.threads = threads
+
+    def __getattr__(self, name):
+        return getattr(self.variable, name)
+
+    def __len__(self):
+        return len(self.variable)
+
+    def __getitem__(self, key):
+        self.threads.add(threading.current_thread())
+        return self.variable[key]
+
+
+def test_winding_errors_reads_in_calling_thread(nodes):
+    """Gathered coordinates are read in the calling thread, not by the workers."""
+    threads = set()
+    variables = [ThreadRecorder(var, threads) for var in nodes]
+    faces = np.array([[0, 1, 2], [3, 4, 5], [6, 7, 8], [9, 11, 12]])
+    blocks = ((offset, faces[offset : offset + 1]) for offset in range(len(faces)))
+    found = coordinates.winding_errors(blocks, variables, workers=4, inflight=4, chunk_size=4)
+    expected = coordinates.winding_errors([(0, faces)], coordinates.read_nodes(nodes))
+    assert found == expected
+    assert threads == {threading.current_thread()}
+
+
+@pytest.mark.parametrize("chunk_size", [7, 2**20])
+def test_value_errors(nodes, chunk_size):
+    """NaN, masked and out-of-range values are counted, whatever the chunk size."""
+    assert coordinates.value_errors(nodes, chunk_size) == [(2, 0, 60), (0, 1, 70)]
+
+
+@pytest.mark.parametrize(("chunk_size", "partition_size"), [(2**20, 2**24), (64, 100), (32, 300)])
+def test_duplicate_nodes(nodes, chunk_size, partition_size):
+    """Duplicates are the same in a single sort or in hash partitions."""
+    ndup, pairs = coordinates.duplicate_nodes(nodes, chunk_size, partition_size, max_reported=3)
+    assert ndup == 4
+    assert pairs == [(10, 5), (20, 5), (30, 5)]
+    ndup, pairs = coordinates.duplicate_nodes(nodes, chunk_size, partition_size)
+    assert pairs[-1] == (50, 40)
@@ -0,0 +1,117 @@
+"""Tests for mesh topology discovery and metadata."""
+
+import pickle
+from pathlib import Path
+
+import pytest
+from netCDF4 import Dataset
+
+from cc_plugin_ugrid.mesh import DataVariable, MeshTopology, connectivity_order, find_data_variables, find_meshes
+
+ugridnc = Path(__file__).absolute().parent.parent.joinpath("resources", "ugrid.nc")
+
+
+@pytest.fixture
+def dset():
+    """Load the ugrid dataset in memory."""
+    ds = Dataset(ugridnc, "r+", diskless=True, persist=False)
+    yield ds
+    ds.close()
+
+
+def test_find_meshes(dset):
+    """Mesh topology variables are found, in variable order."""
+    assert [m.name for m in find_meshes(dset)] == ["mesh_topology", "mesh_topology2"]
+
+
+def test_find_meshes_scalar_and_nonscalar():
+    """Non-scalar mesh variables are found next to scalar ones."""
+    ds = Dataset("meshes.nc", "w", diskless=True, persist=False)
+    ds.createDimension("one", 1)
+    ds.createVariable("mesh1", "i4", ("one",)).cf_role = "mesh_topology"
+    ds.createVariable("mesh2", "i4").cf_role = "mesh_topology"
+    assert [m.name for m in find_meshes(ds)] == ["mesh1", "mesh2"]
+    ds.close()
+
+
+def test_connectivity_order(dset):
+    """Regular and non-standard orders are told apart; bad shapes are None."""
+    assert connectivity_order(dset, "enc", "edge_node_connectivity") == "regular"
+    assert connectivity_order(dset, "nv", "face_node_connectivity") == "nonstd"
+    # faces have at least 3 nodes, padded up to the maximum
+    assert connectivity_order(dset, "fec", "face_node_connectivity") == "regular"
+    assert connectivity_order(dset, "fec", "face_node_connectivity", "nedges") is None
+    assert connectivity_order(dset, "efc", "face_node_connectivity", "nedges") is None
+    assert connectivity_order(dset, "fec", "edge_node_connectivity") is None
+    assert connectivity_order(dset, "lat", "edge_node_connectivity") is None
+    assert connectivity_order(dset, "missing", "edge_node_connectivity") is None
+
+
+def test_mesh_topology(dset):
+    """Attributes, dimensions and shapes are resolved to plain values."""
+    topo = MeshTopology.from_variable(dset, dset.variables["mesh_topology"])
+    assert topo.name == "mesh_topology"
+    assert topo.topology_dimension == 2
+    assert topo.edge_node_connectivity == "enc"
+    assert topo.volume_node_connectivity is None
+    assert (topo.nnodes, topo.nedges, topo.nfaces, topo.max_nodes_per_face) == (5, 9, 9, 7)
+    assert dict(topo.orders) == {"edge_node_connectivity": "regular", "face_node_connectivity": "nonstd"}
+    assert topo.shapes["nv"] == (3, 9)
+    assert "lon" in topo.shapes
+    assert all(type(n) is int for shape in topo.shapes.values() for n in shape)
+    assert dict(topo.dimensions) == {"node": ("nnodes", 5), "edge": ("nedges", 9), "face": ("nfaces", 9)}
+
+
+def test_find_data_variables(dset):
+    """Data variables are grouped by mesh; connectivity variables are left out."""
+    found = find_data_variables(dset)
+    assert list(found) == ["mesh_topology"]
+    assert [var.name for var in found["mesh_topology"]][-2:] == ["northward_velocity", "flux"]
+    assert found["mesh_topology"][-1] == DataVariable("flux", "mesh_topology", "edge", ("time", "nedges"))
+    assert not any(var.name in ("enc", "nv", "time") for var in found["mesh_topology"])
+
+
+def test_find_data_variables_cf_role(dset):
+    """Only the UGRID roles set a variable apart from the data variables."""
+    dset.variables["temperature"].cf_role = "timeseries_id"
+    dset.variables["flux"].cf_role = "edge_node_connectivity"
+    names = [var.name for var in find_data_variables(dset)["mesh_topology"]]
+    assert "temperature" in names
+    assert "flux" not in names
+
+
+def test_mesh_topology_invalid_connectivity(dset):
+    """Sizes of elements whose node connectivity has a bad shape stay undefined."""
+    mesh = dset.variables["mesh_topology"]
+    mesh.setncattr("face_node_connectivity", "efc")
+    mesh.delncattr("edge_node_connectivity")
+    topo = MeshTopology.from_variable(dset, mesh)
+    assert dict(topo.orders) == {"face_node_connectivity": None}
+    assert topo.nedges is None
+    assert topo.nfaces is None
+
+
+def test_mesh_topology_read_only(dset):
+    """The descriptor cannot be modified in place, only copied with changes."""
+    topo = MeshTopology.from_variable(dset, dset.variables["mesh_topology"])
+    with pytest.raises(AttributeError):
+        topo.topology_dimension = 3
+    with pytest.raises(AttributeError):
+        del topo.nfaces
+    with pytest.raises(TypeError):
+        topo.shapes["lat"] = (1,)
+    with pytest.raises(AttributeError):
+        topo.not_a_field = 1
+
+    other = topo.replace(topology_dimension=3)
+    assert other.topology_dimension == 3
+    assert topo.topology_dimension == 2
+    assert other.shapes == topo.shapes
+    with pytest.raises(TypeError):
+        topo.replace(not_a_field=1)
+
+
+def test_mesh_topology_pickle(dset):
+    """Descriptors can be sent to other processes."""
+    topo = MeshTopology.from_variable(dset, dset.variables["mesh_topology"])
+    assert pickle.loads(pickle.dumps(topo)).as_dict() == topo.as_dict()  # noqa: S301
@@ -0,0 +1,108 @@
+"""Tests for the chunk-parallel map/reduce helpers."""
+
+import threading
+import time
+
+import numpy as np
+import pytest
+from netCDF4 import Dataset
+
+from cc_plugin_ugrid import connectivity, parallel
+
+
+def test_parse_size():
+    """Sizes are read in bytes, with binary suffixes."""
+    assert parallel.parse_size("4096") == 4096
+    assert parallel.parse_size("512M") == 512 * 2**20
+    assert parallel.parse_size("2GiB") == 2 * 2**30
+    with pytest.raises(ValueError, match="Invalid size"):
+        parallel.parse_size("lots")
+
+
+def test_plan():
+    """Blocks shrink to fit the budget, and as many as fit are held at once."""
+    assert parallel.plan(8, 2**20, 2**30) == (2**20, 32)
+    assert parallel.plan(8, 2**20, 2**10) == (32, 1)
+    assert parallel.plan(8, 2**20, 1) == (1, 1)
+
+
+@pytest.mark.parametrize(("workers", "inflight"), [(1, 1), (4, 1), (4, 3), (2, 8)])
+def test_map_blocks(workers, inflight):
+    """Results come in block order, with at most ``inflight`` blocks held."""
+    held = []
+    lock = threading.Lock()
+
+    def blocks():
+        for i in range(20):
+            with lock:
+                held.append(i)
+                assert len(held) <= inflight
+            yield i, i
+
+    def func(offset, block):
+        time.sleep(0.001 * (offset % 3))
+        with lock:
+            held.remove(block)
+        return offset * 10
+
+    assert list(parallel.map_blocks(func, blocks(), workers=workers, inflight=inflight)) == list(range(0, 200, 10))
+
+
+def test_tree_reduce():
+    """Values are combined in order; the initial value is returned for no values."""
+    assert parallel.tree_reduce(lambda a, b: a + b, ["a", "b", "c", "d", "e"]) == "abcde"
+    assert parallel.tree_reduce(lambda a, b: a + b, [], 0) == 0
+
+
+@pytest.mark.parametrize("axis", [0, 1])
+def test_connectivity_workers(axis):
+    """Parallel runs within a small budget give the sequential results."""
+    rng = np.random.default_rng(0)
+    values = rng.integers(1, 101, size=(5000, 4))
+    values[::7, 3] = -999
+    values[[1234, 2345, 3456], 1] = [0, 101, 500]
+    if axis == 1:
+        values = values.T.copy()
+    with Dataset("conn.nc", "w", diskless=True, persist=False) as nc:
+        nc.createDimension("a", values.shape[0])
+        nc.createDimension("b", values.shape[1])
+        var = nc.createVariable("conn", "i4", ("a", "b"), fill_value=-999)
+        var.start_index = 1
+        var[:] = values
+        expected = connectivity.summarize(var, 100, axis=axis).invalid
+        indices = connectivity.read_indices(var, axis=axis)
+        assert expected == (3, 1234)
+        np.testing.assert_array_equal(np.concatenate([b for _, b in connectivity.iter_indices(var, axis, chunk_size=100)]), indices)
+        for budget in (2**10, 2**14):
+            assert connectivity.summarize(var, 100, axis=axis, workers=4, memory_budget=budget).invalid == expected
+            np.testing.assert_array_equal(connectivity.read_indices(var, axis=axis, workers=4, memory_budget=budget), indices)
+
+
+@pytest.mark.parametrize("axis", [0, 1])
+def test_summarize(axis):
+    """Mixed triangles and quads are counted in a single pass; misplaced fill values are reported."""
+    rng = np.random.default_rng(0)
+    values = rng.integers(1, 101, size=(5000, 4))
+    values[::3, 3] = -999  # triangles
+    values[[10, 20], 1] = -999  # fill value before an index
+    values[30, 2] = 101
+    if axis == 1:
+        values = values.T.copy()
+    with Dataset("conn.nc", "w", diskless=True, persist=False) as nc:
+        nc.createDimension("a", values.shape[0])
+        nc.createDimension("b", values.shape[1])
+        var = nc.createVariable("conn", "i4", ("a", "b"), fill_value=-999)
+        var.start_index = 1
+        var[:] = values
+        summary = connectivity.summarize(var, 100, axis=axis, chunk_size=100)
+        assert summary.invalid == (1, 30)
+        assert summary.padding == (2, 10)
+        assert summary.histogram.tolist() == [0, 0, 0, 1669, 3331]
+        parallel_summary = connectivity.summarize(var, 100, axis=axis, workers=4, memory_budget=2**12)
+        assert parallel_summary[:2] == summary[:2]
+        np.testing.assert_array_equal(parallel_summary.histogram, summary.histogram)
+        assert connectivity.attribute_errors(var, 100) == []
+        var.start_index = 2
+        assert connectivity.attribute_errors(var, 1000) == ["start_index of conn must be 0 or 1, not 2"]
+        var.start_index = -1000
+        assert connectivity.attribute_errors(var, 1000)[1] == "_FillValue -999 of conn is a valid index"
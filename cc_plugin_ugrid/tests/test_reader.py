@@ -0,0 +1,138 @@
+"""Tests for the memory-mapped array reader."""
+
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pytest
+from netCDF4 import Dataset
+
+from cc_plugin_ugrid import coordinates
+from cc_plugin_ugrid.reader import ArrayReader, LockedVariable, MappedVariable, hdf5_layout, netcdf3_layout
+
+
+def make_file(path, fmt, **kwargs):
+    """Write fixed-size and record variables of several types."""
+    with Dataset(path, "w", format=fmt) as ds:
+        ds.title = "odd length title"
+        ds.createDimension("time", None)
+        ds.createDimension("n", 7)
+        ds.createDimension("k", 3)
+        conn = ds.createVariable("conn", "i4", ("n", "k"), fill_value=-1, **kwargs)
+        conn.start_index = 1
+        conn[:] = np.arange(21).reshape(7, 3)
+        ds.createVariable("x", "f8", ("n",), **kwargs)[:] = np.linspace(0, 1, 7)
+        ds.createVariable("small", "i1", ("k",), **kwargs)[:] = [1, 2, 3]
+        ds.createVariable("rec", "i2", ("time", "n"))[0:2] = np.ones((2, 7))
+        scaled = ds.createVariable("scaled", "i2", ("n",), **kwargs)
+        scaled.scale_factor = 0.5
+        scaled[:] = np.arange(7)
+        masked = ds.createVariable("masked", "f8", ("n",), **kwargs)
+        masked.missing_value = -999.0
+        masked.valid_range = np.array([0.0, 10.0])
+        masked[:] = [1, -999, 2, 20, 3, 4, 5]
+
+
+@pytest.mark.parametrize("fmt", ["NETCDF3_CLASSIC", "NETCDF3_64BIT_OFFSET", "NETCDF3_64BIT_DATA"])
+def test_netcdf3(tmp_path, fmt):
+    """Fixed-size netCDF3 variables are memory-mapped, record variables are not."""
+    path = tmp_path.joinpath("file.nc")
+    make_file(path, fmt)
+    assert set(netcdf3_layout(path)) == {"conn", "x", "small", "scaled", "masked"}
+
+    with Dataset(path) as ds:
+        reader = ArrayReader(ds, memmap=True)
+        for name in ("conn", "x", "small"):
+            var = reader[name]
+            assert isinstance(var, MappedVariable)
+            assert np.array_equal(var[:], ds.variables[name][:])
+        assert reader["conn"].getncattr("start_index") == 1
+        # interleaved, scaled or masked variables fall back to netCDF4
+        assert reader["rec"] is ds.variables["rec"]
+        assert reader["scaled"] is ds.variables["scaled"]
+        assert reader["masked"] is ds.variables["masked"]
+        assert reader["conn"] is reader["conn"]
+
+
+@pytest.mark.parametrize("fmt", ["NETCDF3_CLASSIC", "NETCDF4"])
+def test_memmap_same_values(tmp_path, fmt):
+    """Memory-mapped reads give the values of netCDF4 reads, masked and unpacked alike."""
+    path = tmp_path.joinpath("file.nc")
+    make_file(path, fmt, **({"contiguous": True} if fmt == "NETCDF4" else {}))
+    with Dataset(path) as ds:
+        mapped, plain = ArrayReader(ds, memmap=True), ArrayReader(ds)
+        for name in ds.variables:
+            a, b = mapped[name][:], plain[name][:]
+            assert np.ma.allequal(a, b), name
+            assert np.array_equal(np.ma.getmaskarray(a), np.ma.getmaskarray(b)), name
+        assert coordinates.value_errors([mapped["masked"]]) == coordinates.value_errors([plain["masked"]]) == [(2, 0, 1)]
+
+
+def test_disabled_or_diskless(tmp_path):
+    """Without memmap, or for a dataset not on disk, netCDF4 variables are used."""
+    path = tmp_path.joinpath("file.nc")
+    make_file(path, "NETCDF3_CLASSIC")
+    with Dataset(path) as ds:
+        assert ArrayReader(ds)["conn"] is ds.variables["conn"]
+
+    with Dataset("notondisk.nc", "w", diskless=True, persist=False, format="NETCDF3_CLASSIC") as ds:
+        ds.createDimension("n", 2)
+        var = ds.createVariable("x", "i4", ("n",))
+        assert ArrayReader(ds, memmap=True)["x"] is var
+
+
+def test_netcdf4(tmp_path):
+    """Contiguous netCDF4 variables are memory-mapped if h5py is installed."""
+    path = tmp_path.joinpath("file.nc")
+    make_file(path, "NETCDF4", contiguous=True)
+    with Dataset(path) as ds:
+        reader = ArrayReader(ds, memmap=True)
+        var = reader["conn"]
+        assert np.array_equal(var[:], ds.variables["conn"][:])
+        assert reader["rec"] is ds.variables["rec"]
+
+
+def test_hdf5_layout(tmp_path):
+    """Only contiguous, unfiltered HDF5 datasets are located."""
+    pytest.importorskip("h5py")
+    path = tmp_path.joinpath("file.nc")
+    with Dataset(path, "w") as ds:
+        ds.createDimension("n", 5)
+        ds.createVariable("contiguous", "i4", ("n",), contiguous=True)[:] = np.arange(5)
+        ds.createVariable("compressed", "i4", ("n",), zlib=True)[:] = np.arange(5)
+    assert set(hdf5_layout(path, ["contiguous", "compressed", "missing"])) == {"contiguous"}
+
+
+def test_count_bytes_read(tmp_path):
+    """With count enabled, the bytes sliced from the variables are counted."""
+    path = tmp_path.joinpath("file.nc")
+    make_file(path, "NETCDF4")
+    with Dataset(path) as ds:
+        reader = ArrayReader(ds, count=True)
+        var = reader["conn"]
+        assert var.shape == ds.variables["conn"].shape
+        assert var.getncattr("start_index") == 1
+        values = var[:]
+        assert reader.bytes_read == values.nbytes
+        var[0]
+        assert reader.bytes_read == values.nbytes + values[0].nbytes
+
+
+def test_threads(tmp_path):
+    """Threaded reads through their own views do not share the masking state."""
+    path = tmp_path.joinpath("file.nc")
+    make_file(path, "NETCDF4")
+    with Dataset(path) as ds:
+        reader = ArrayReader(ds, threads=True)
+        raw, masked = reader["conn"], reader["conn"]
+        assert isinstance(raw, LockedVariable)
+        raw.set_auto_mask(False)
+        expected = ds.variables["conn"][:]
+
+        def read(var):
+            return [var[:] for _ in range(50)]
+
+        with ThreadPoolExecutor(4) as pool:
+            raws, maskeds = pool.map(read, [raw, masked])
+        assert all(np.array_equal(v, expected.data) and not np.ma.isMaskedArray(v) for v in raws)
+        assert all(np.ma.allequal(v, expected) for v in maskeds)
+        assert ds.variables["conn"].mask
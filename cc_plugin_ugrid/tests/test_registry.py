@@ -0,0 +1,87 @@
+"""Tests of the check registry and scheduler."""
+
+import pytest
+
+from cc_plugin_ugrid import registry
+from cc_plugin_ugrid.checker import UgridChecker
+from cc_plugin_ugrid.mesh import MeshTopology
+
+
+def names(batches):
+    """Names of the checks of each batch."""
+    return [[spec.name for spec in batch] for batch in batches]
+
+
+def test_schedule_checker():
+    """The UGRID checks run in dependency order."""
+    assert names(registry.schedule(UgridChecker)) == [
+        ["_check1_topology_dim", "_check2_connectivity_attrs"],
+        [
+            "_check10_degenerate_faces",
+            "_check12_volume_topology",
+            "_check13_connected_nodes",
+            "_check3_ncoords_exist",
+            "_check4_edge_face_conn",
+            "_check5_face_edge_conn",
+            "_check6_face_face_conn",
+            "_check9_data_variable_binding",
+        ],
+        ["_check11_face_winding", "_check7_edge_face_topology", "_check8_node_coordinate_values"],
+    ]
+
+
+def test_schedule_not_alphabetical():
+    """Dependencies, not names, decide the order; undecorated checks are included."""
+
+    class Checker:
+        @registry.check(after=("_check2",))
+        def _check10(self, mesh):
+            pass
+
+        @registry.check(after=("_check3",))
+        def _check2(self, mesh):
+            pass
+
+        def _check3(self, mesh):
+            pass
+
+    assert names(registry.schedule(Checker)) == [["_check3"], ["_check2"], ["_check10"]]
+
+
+@pytest.mark.parametrize("after", [("_check_missing",), ("_check_b",)])
+def test_schedule_invalid(after):
+    """Unknown dependencies and cycles are rejected."""
+
+    class Checker:
+        @registry.check(after=after)
+        def _check_a(self, mesh):
+            pass
+
+        @registry.check(after=("_check_a",))
+        def _check_b(self, mesh):
+            pass
+
+    with pytest.raises(ValueError, match="_check"):
+        registry.schedule(Checker)
+
+
+def test_applies():
+    """A check applies only if its mesh fields and options are present."""
+    spec = registry.CheckSpec("_check", requires=("nedges", "nfaces"), options=("validate_data",))
+    topo = MeshTopology("mesh", nedges=5, nfaces=2)
+    assert spec.applies(UgridChecker({"validate_data"}), topo)
+    assert not spec.applies(UgridChecker(), topo)
+    assert not spec.applies(UgridChecker({"validate_data"}), topo.replace(nfaces=None))
+
+
+def test_yield_checks_skips_missing_inputs():
+    """Checks of a mesh without the required fields are not yielded."""
+    uchecker = UgridChecker()
+    uchecker.meshes = {"mesh": MeshTopology("mesh", topology_dimension=1, nedges=3)}
+    assert [name for name, _ in uchecker.yield_checks("mesh")] == [
+        "_check1_topology_dim",
+        "_check2_connectivity_attrs",
+        "_check3_ncoords_exist",
+        "_check9_data_variable_binding",
+    ]
+    assert len(list(uchecker.yield_checks())) == 13
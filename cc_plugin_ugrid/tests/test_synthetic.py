@@ -0,0 +1,33 @@
+"""Smoke tests of the synthetic meshes of the benchmarks."""
+
+import pytest
+from netCDF4 import Dataset
+
+from cc_plugin_ugrid.checker import UgridChecker
+
+synthetic = pytest.importorskip("benchmarks.synthetic")
+
+CONNECTIVITY_CHECKS = {
+    "line": ("_check2_connectivity_attrs",),
+    "triangles": ("_check2_connectivity_attrs", "_check5_face_edge_conn", "_check6_face_face_conn", "_check7_edge_face_topology"),
+    "mixed": ("_check2_connectivity_attrs", "_check5_face_edge_conn", "_check6_face_face_conn", "_check7_edge_face_topology"),
+    "hexahedra": ("_check2_connectivity_attrs", "_check12_volume_topology"),
+}
+
+
+@pytest.mark.parametrize("nonstd", [False, True])
+@pytest.mark.parametrize("kind", synthetic.KINDS)
+def test_synthetic_mesh(tmp_path, kind, nonstd):
+    """Every kind of synthetic mesh passes all the checks it is given."""
+    path = tmp_path.joinpath(f"{kind}.nc")
+    synthetic.write_mesh(path, kind, 200, nonstd=nonstd, derived=True)
+    with Dataset(path) as ds:
+        uchecker = UgridChecker(options={"validate_data"})
+        uchecker.setup(ds)
+        (mesh,) = uchecker.meshes
+        results = {name: check(mesh) for name, check in uchecker.yield_checks(mesh)}
+    for name in CONNECTIVITY_CHECKS[kind]:
+        assert results[name].value[1] > 0, name
+    for name, result in results.items():
+        score, out_of = result.value
+        assert score == out_of, (name, result.msgs)
@@ -0,0 +1,580 @@
+"""Vectorized derivation and comparison of UGRID mesh topology.
+
+All functions work on zero-based int64 index arrays as returned by
+``cc_plugin_ugrid.connectivity.read_indices``, where -1 marks a fill value
+and -2 an index below ``start_index``. Edges are identified by a key packing
+their two (sorted) node indices into a single int64, so sorting and searching
+replace any per-element Python loop.
+
+Duplicate rows (faces with the same nodes, nodes at the same position) are
+found by sorting; arrays larger than a partition are split by a hash of their
+rows and each partition is sorted in turn, re-reading the array, so memory
+use stays bounded.
+
+The volumes of 3D meshes are checked block by block against their shape
+type, and the volume adjacency is derived from the volume faces in
+partitions of volumes, again re-reading the array.
+
+The nodes of a mesh are linked by a sparse (CSR) adjacency built with a
+counting sort, and its connected components are labelled by a vectorized
+union-find, both in time linear in the number of elements.
+"""
+
+import math
+import typing
+
+import numpy as np
+
+from cc_plugin_ugrid import parallel
+from cc_plugin_ugrid.connectivity import FILL, INVALID
+
+_SENTINEL = np.iinfo(np.int64).max
+
+# number of nodes of the volume shapes, by their name in flag_meanings
+NODES_PER_VOLUME = {"tetrahedron": 4, "pyramid": 5, "wedge": 6, "hexahedron": 8}
+
+
+def edge_keys(a, b, nnodes):
+    """Pack node pairs into int64 keys independent of the node order.
+
+    :param numpy.ndarray a, b: node indices of the edge ends
+    :param int nnodes        : number of nodes of the mesh
+    """
+    a = np.asarray(a, dtype=np.int64)
+    b = np.asarray(b, dtype=np.int64)
+    return np.minimum(a, b) * nnodes + np.maximum(a, b)
+
+
+def _face_edge_mask(faces, nnodes):
+    """Locate the edges of every face.
+
+    The edges of a face join consecutive nodes, the last node being joined to
+    the first. Rows may be padded with trailing fill values.
+
+    :returns numpy.ndarray, numpy.ndarray: mask of the (face, position)
+             holding an edge, and the node following each position
+    """
+    maxnodes = faces.shape[1]
+    valid = (faces >= 0) & (faces < nnodes)
+    counts = valid.sum(axis=1)
+    cols = np.arange(maxnodes)
+    nxt = np.take_along_axis(faces, (cols + 1) % np.maximum(counts, 1)[:, None], axis=1)
+    mask = (cols < counts[:, None]) & valid & (nxt >= 0) & (nxt < nnodes) & (counts[:, None] > 1)
+    return mask, nxt
+
+
+def _rows_differ(a, b):
+    """Compare two index arrays row by row, ignoring the order within rows.
+
+    The narrower array is padded with fill values.
+
+    :returns numpy.ndarray: boolean mask of the rows that differ
+    """
+    width = max(a.shape[1], b.shape[1])
+    a = np.pad(a, ((0, 0), (0, width - a.shape[1])), constant_values=FILL)
+    b = np.pad(b, ((0, 0), (0, width - b.shape[1])), constant_values=FILL)
+    return (np.sort(a, axis=1) != np.sort(b, axis=1)).any(axis=1)
+
+
+class MeshEdges(typing.NamedTuple):
+    """Edges of a 2D mesh derived from its face node connectivity.
+
+    Built with a single hashing pass over the face edges; the face-edge,
+    edge-face and face-face adjacencies all derive from it.
+
+    Attributes:
+        nnodes    : number of nodes of the mesh
+        keys      : (nedges,) sorted unique edge keys, see ``edge_keys``
+        counts    : (nedges,) number of faces sharing each edge
+        face_edges: (nfaces, maxnodes) edge of each face position, -1 if none
+        edge_faces: (nedges, 2) faces on either side of each edge, -1 if none
+        face_faces: (nfaces, maxnodes) face across each face edge, -1 if none
+
+    """
+
+    nnodes: int
+    keys: np.ndarray
+    counts: np.ndarray
+    face_edges: np.ndarray
+    edge_faces: np.ndarray
+    face_faces: np.ndarray
+
+    @classmethod
+    def from_faces(cls, faces, nnodes):
+        """Derive the edges of a mesh.
+
+        :param numpy.ndarray faces: (nfaces, maxnodes) face node connectivity
+        :param int nnodes         : number of nodes of the mesh
+        """
+        mask, nxt = _face_edge_mask(faces, nnodes)
+        face_ids = np.broadcast_to(np.arange(faces.shape[0])[:, None], faces.shape)[mask]
+        keys, edge_ids, counts = np.unique(
+            edge_keys(faces[mask], nxt[mask], nnodes),
+            return_inverse=True,
+            return_counts=True,
+        )
+        edge_ids = edge_ids.reshape(-1)
+
+        face_edge = np.full(faces.shape, FILL, dtype=np.int64)
+        face_edge[mask] = edge_ids
+
+        # the first two faces of each edge, in face order
+        order = np.argsort(edge_ids, kind="stable")
+        first = np.cumsum(counts) - counts
+        edge_faces = np.full((len(keys), 2), FILL, dtype=np.int64)
+        edge_faces[:, 0] = face_ids[order][first]
+        shared = counts > 1
+        edge_faces[shared, 1] = face_ids[order][first[shared] + 1]
+
+        first_face = edge_faces[edge_ids, 0]
+        face_face = np.full(faces.shape, FILL, dtype=np.int64)
+        face_face[mask] = np.where(first_face == face_ids, edge_faces[edge_ids, 1], first_face)
+
+        return cls(nnodes, keys, counts, face_edge, edge_faces, face_face)
+
+    def lookup(self, edges):
+        """Find the derived edges matching node pairs.
+
+        :param numpy.ndarray edges: (n, 2) node indices
+
+        :returns numpy.ndarray, numpy.ndarray: index of each pair in ``keys``
+                 (``len(keys)`` if not found) and a mask of the pairs found
+        """
+        ea, eb = edges[:, 0], edges[:, 1]
+        valid = (ea >= 0) & (eb >= 0) & (ea < self.nnodes) & (eb < self.nnodes)
+        keys = edge_keys(ea, eb, self.nnodes)
+        pos = np.searchsorted(np.append(self.keys, _SENTINEL), keys)
+        found = valid & (pos < len(self.keys))
+        found[found] = self.keys[pos[found]] == keys[found]
+        return np.where(found, pos, len(self.keys)), found
+
+    def edge_face_mismatches(self, edges, edge_faces):
+        """Find edges whose listed faces do not match the derived ones.
+
+        An edge is consistent if the faces listed for it in
+        edge_face_connectivity are exactly the faces having the edge's two
+        nodes as consecutive nodes.
+
+        :param numpy.ndarray edges     : (n, 2) edge node connectivity
+        :param numpy.ndarray edge_faces: (n, 2) edge face connectivity of the
+                                         same edges
+
+        :returns numpy.ndarray: indices of the inconsistent rows
+        """
+        pos, _ = self.lookup(edges)
+        derived = np.append(self.edge_faces, [[FILL, FILL]], axis=0)[pos]
+        bad = _rows_differ(derived, edge_faces)
+        bad |= np.append(self.counts, 0)[pos] > 2  # non-manifold edge
+        bad |= (edges < 0).any(axis=1) | (edges >= self.nnodes).any(axis=1)
+        return np.flatnonzero(bad)
+
+    def edge_ids(self, edges):
+        """Find the derived edge of each row of edge_node_connectivity.
+
+        :param numpy.ndarray edges: (n, 2) edge node connectivity
+
+        :returns numpy.ndarray: index of each edge in ``keys``, ``INVALID`` if
+                                its nodes are not an edge of the faces
+        """
+        pos, found = self.lookup(edges)
+        return np.where(found, pos, INVALID)
+
+    def face_edge_mismatches(self, face_edges, edge_ids, offset=0):
+        """Find faces whose listed edges do not match the derived ones.
+
+        The edge indices of face_edge_connectivity refer to the rows of
+        edge_node_connectivity; the order of the edges within a face is not
+        compared.
+
+        :param numpy.ndarray face_edges: (n, maxnodes) face edge connectivity
+                                         of the faces from ``offset``
+        :param numpy.ndarray edge_ids  : (nedges,) derived edge of each row of
+                                         edge_node_connectivity, see ``edge_ids``
+        :param int offset              : index of the first face
+
+        :returns numpy.ndarray: indices of the inconsistent faces, relative to ``offset``
+        """
+        listed = face_edges >= 0
+        in_range = listed & (face_edges < len(edge_ids))
+        stored = np.where(listed, INVALID, face_edges)
+        stored[in_range] = edge_ids[face_edges[in_range]]
+        return np.flatnonzero(_rows_differ(self.face_edges[offset : offset + len(face_edges)], stored))
+
+    def face_face_mismatches(self, face_faces, offset=0):
+        """Find faces whose listed neighbors do not match the derived ones.
+
+        :param numpy.ndarray face_faces: (n, maxnodes) face face connectivity
+                                         of the faces from ``offset``
+        :param int offset              : index of the first face
+
+        :returns numpy.ndarray: indices of the inconsistent faces, relative to ``offset``
+        """
+        return np.flatnonzero(_rows_differ(self.face_faces[offset : offset + len(face_faces)], face_faces))
+
+
+class NodeAdjacency(typing.NamedTuple):
+    """Sparse (CSR) adjacency of the nodes of a mesh.
+
+    Each element links its consecutive nodes, the last to the first, as for
+    the edges of a face; for volumes, this follows their listed node order,
+    which connects their nodes without being their edge graph. A neighbor
+    shared by several elements is listed once per element.
+
+    Attributes:
+        indptr : (nnodes + 1,) offsets of the neighbors of each node in ``indices``
+        indices: neighbors of each node, in node order
+
+    """
+
+    indptr: np.ndarray
+    indices: np.ndarray
+
+    @classmethod
+    def from_elements(cls, elements, nnodes):
+        """Build the adjacency of the nodes of a mesh.
+
+        :param list elements: (nelements, maxnodes) zero-based node indices of
+                              the edges, faces and volumes of the mesh, padded
+                              with trailing negative values
+        :param int nnodes   : number of nodes of the mesh
+        """
+        dtype = np.int32 if nnodes < 2**31 else np.int64
+        src, dst = [np.empty(0, dtype=dtype)], [np.empty(0, dtype=dtype)]
+        for nodes in elements:
+            mask, nxt = _face_edge_mask(nodes, nnodes)
+            a, b = nodes[mask].astype(dtype), nxt[mask].astype(dtype)
+            src += [a, b]
+            dst += [b, a]
+        src, dst = np.concatenate(src), np.concatenate(dst)
+        indptr = np.zeros(nnodes + 1, dtype=np.int64)
+        np.cumsum(np.bincount(src, minlength=nnodes), out=indptr[1:])
+        return cls(indptr, dst[np.argsort(src, kind="stable")])
+
+    @property
+    def degrees(self):
+        """Number of neighbors of each node, 0 for nodes of no element."""
+        return np.diff(self.indptr)
+
+    def components(self):
+        """Label the connected components of the nodes.
+
+        Union-find over all the node pairs at once: each round hooks the
+        larger root of every pair joining two components onto the smaller
+        one, then compresses the paths by pointer jumping. Pairs within a
+        component are dropped, so each round works on fewer pairs.
+
+        :returns numpy.ndarray: the smallest node of the component of each node
+        """
+        nnodes = len(self.indptr) - 1
+        src = np.repeat(np.arange(nnodes, dtype=self.indices.dtype), self.degrees)
+        dst = self.indices
+        keep = src < dst  # each pair is listed both ways
+        src, dst = src[keep], dst[keep]
+        parent = np.arange(nnodes, dtype=self.indices.dtype)
+        while len(src):
+            a, b = parent[src], parent[dst]
+            join = a != b
+            src, dst, a, b = src[join], dst[join], a[join], b[join]
+            np.minimum.at(parent, np.maximum(a, b), np.minimum(a, b))
+            while True:
+                grand = parent[parent]
+                if np.array_equal(grand, parent):
+                    break
+                parent = grand
+        return parent
+
+
+def face_node_sets(faces):
+    """Reduce each face to its set of distinct nodes.
+
+    :param numpy.ndarray faces: (nfaces, maxnodes) face node connectivity
+
+    :returns numpy.ndarray, numpy.ndarray: the sorted distinct nodes of each
+             face, preceded by fill values (so faces with the same nodes have
+             the same row whatever their order, padding or repeated nodes),
+             and a mask of the faces listing a node more than once
+    """
+    sets = np.sort(faces, axis=1)
+    repeated = np.zeros(sets.shape, dtype=bool)
+    repeated[:, 1:] = (sets[:, 1:] == sets[:, :-1]) & (sets[:, 1:] >= 0)
+    sets[repeated] = FILL
+    sets.sort(axis=1)
+    return sets, repeated.any(axis=1)
+
+
+class FaceDefects(typing.NamedTuple):
+    """Degenerate and duplicate faces of a mesh.
+
+    Each field holds the number of faces found and the first of them (face
+    indices, or (duplicate, first face) pairs for ``duplicates``).
+
+    Attributes:
+        repeated  : faces listing a node more than once
+        collapsed : faces with fewer than 3 distinct nodes
+        duplicates: faces with the same nodes as a previous face
+
+    """
+
+    repeated: tuple
+    collapsed: tuple
+    duplicates: tuple
+
+
+def face_defects(read_faces, nfaces, partition_size, max_reported=10, *, nnodes=None, workers=1, inflight=1):  # noqa: PLR0913
+    """Find the degenerate and duplicate faces of a mesh, block by block.
+
+    Padding and out-of-range entries (below ``start_index``, or beyond the
+    ``nnodes`` nodes) are not nodes of the face. The faces are read once per
+    partition of ``duplicate_rows``; the degenerate faces are counted during
+    the first pass.
+
+    :param callable read_faces : returns a new iterable of (offset, faces)
+                                 blocks of zero-based indices, see
+                                 ``connectivity.iter_indices``
+    :param int nfaces          : number of faces
+    :param int partition_size  : maximum number of faces sorted at once
+    :param int max_reported    : number of faces returned for each defect
+    :param int nnodes          : number of nodes, None if unknown
+    :param int workers         : number of threads reducing the blocks to
+                                 their node sets
+    :param int inflight        : maximum number of blocks held at once
+
+    :returns FaceDefects
+    """
+    repeated, collapsed = [0, []], [0, []]
+    passes = 0
+
+    def reduce(offset, faces):
+        faces[(faces < 0) | (faces >= (nnodes if nnodes is not None else np.iinfo(faces.dtype).max))] = FILL
+        sets, repeats = face_node_sets(faces)
+        return offset, sets, repeats, (sets >= 0).sum(axis=1)
+
+    def node_sets():
+        nonlocal passes
+        passes += 1
+        for offset, sets, repeats, nodes in parallel.map_blocks(reduce, read_faces(), workers=workers, inflight=inflight):
+            if passes == 1:
+                _add_found(repeated, offset + np.flatnonzero(repeats), max_reported)
+                _add_found(collapsed, offset + np.flatnonzero(nodes < 3), max_reported)
+            yield offset, sets, nodes > 0
+
+    duplicates = duplicate_rows(node_sets, nfaces, partition_size, max_reported)
+    return FaceDefects(tuple(repeated), tuple(collapsed), duplicates)
+
+
+def hash_rows(block):
+    """Hash the rows of a 64-bit (integer or float) block into uint64 values."""
+    bits = np.ascontiguousarray(block).view(np.uint64)
+    h = np.zeros(len(block), dtype=np.uint64)
+    for i in range(bits.shape[1]):
+        h ^= bits[:, i] + np.uint64(0x9E3779B97F4A7C15) + (h << np.uint64(6)) + (h >> np.uint64(2))
+    h ^= h >> np.uint64(33)
+    h *= np.uint64(0xFF51AFD7ED558CCD)
+    h ^= h >> np.uint64(33)
+    return h
+
+
+def sorted_duplicates(rows, index):
+    """Find the duplicate rows of a set of rows.
+
+    :returns numpy.ndarray, numpy.ndarray: indices of each duplicate and of
+             the first row with the same values
+    """
+    order = np.lexsort((index, *rows.T[::-1]))
+    rows, index = rows[order], index[order]
+    same = np.zeros(len(rows), dtype=bool)
+    same[1:] = (rows[1:] == rows[:-1]).all(axis=1)
+    first = np.maximum.accumulate(np.where(same, 0, np.arange(len(rows))))
+    return index[same], index[first[same]]
+
+
+def duplicate_rows(read_rows, nrows, partition_size, max_reported=10):
+    """Find the rows equal to a previous row, in hash partitions.
+
+    :param callable read_rows : returns a new iterable of (offset, rows, keep)
+                                blocks of 64-bit rows, ``keep`` masking the
+                                rows to compare; called once per partition
+    :param int nrows          : total number of rows
+    :param int partition_size : maximum number of rows sorted at once
+    :param int max_reported   : number of duplicates returned
+
+    :returns int, list of (int, int): the number of duplicate rows and the
+             (duplicate, first row) pairs of the first duplicates
+    """
+    npartitions = max(1, math.ceil(nrows / partition_size))
+    count = 0
+    examples = []
+    for partition in range(npartitions):
+        rows, index = [], []
+        for offset, block, keep in read_rows():
+            selected = keep & (hash_rows(block) % np.uint64(npartitions) == partition) if npartitions > 1 else keep
+            rows.append(block[selected])
+            index.append(offset + np.flatnonzero(selected))
+        if not rows:
+            continue
+        dup, first = sorted_duplicates(np.concatenate(rows), np.concatenate(index))
+        count += len(dup)
+        smallest = np.argsort(dup, kind="stable")[:max_reported]
+        examples.extend(zip(dup[smallest].tolist(), first[smallest].tolist()))
+    return count, sorted(examples)[:max_reported]
+
+
+def volume_shape_nodes(flag_values, flag_meanings):
+    """Map the values of a volume_shape_type variable to numbers of nodes.
+
+    :param flag_values      : ``flag_values`` of the variable
+    :param str flag_meanings: ``flag_meanings`` of the variable, the shape
+                              name of each value (see ``NODES_PER_VOLUME``)
+
+    :returns dict, list: {value: number of nodes} of the known shapes and
+             the names of the unknown ones
+    """
+    nodes, unknown = {}, []
+    for value, name in zip(np.atleast_1d(flag_values).tolist(), str(flag_meanings).split()):
+        if name in NODES_PER_VOLUME:
+            nodes[value] = NODES_PER_VOLUME[name]
+        else:
+            unknown.append(name)
+    return nodes, unknown
+
+
+def _add_found(found, index, max_reported):
+    """Count the indices found and keep the first ``max_reported`` of them."""
+    found[0] += len(index)
+    found[1].extend(index[: max_reported - len(found[1])].tolist())
+
+
+def node_count_errors(blocks, nodes, *, max_reported=10, workers=1, inflight=1):
+    """Find the volumes whose number of nodes does not match their shape type.
+
+    Fill values are not nodes; out-of-range entries are left to the range
+    check of the connectivity.
+
+    :param iterable blocks : (offset, (volumes, shapes)) blocks of zero-based
+                             node indices (see ``connectivity.iter_indices``)
+                             and the shape type value of each volume
+    :param dict nodes      : {shape type value: number of nodes}, see
+                             ``volume_shape_nodes``
+    :param int max_reported: number of volumes returned for each error
+    :param int workers     : number of threads processing the blocks
+    :param int inflight    : maximum number of blocks held at once
+
+    :returns (int, list), (int, list): the number of volumes with the wrong
+             number of nodes and the first of them, and the same for volumes
+             whose shape type is not a known value
+    """
+    values = np.array(sorted(nodes) or [0])
+    counts = np.array([nodes.get(value, -1) for value in values.tolist()])
+
+    def find(offset, block):
+        volumes, shapes = block
+        pos = np.minimum(np.searchsorted(values, shapes), len(values) - 1)
+        known = (values[pos] == shapes) & (counts[pos] >= 0)
+        wrong = known & ((volumes != FILL).sum(axis=1) != counts[pos])
+        return tuple((int(np.count_nonzero(m)), (offset + np.flatnonzero(m)[:max_reported]).tolist()) for m in (wrong, ~known))
+
+    def combine(a, b):
+        return tuple((n + m, (first + other)[:max_reported]) for (n, first), (m, other) in zip(a, b))
+
+    found = parallel.map_blocks(find, blocks, workers=workers, inflight=inflight)
+    return parallel.tree_reduce(combine, found, ((0, []), (0, [])))
+
+
+def mismatches(blocks, find, *, max_reported=10, workers=1, inflight=1):
+    """Find the elements of connectivity arrays not matching a derived structure.
+
+    :param iterable blocks : (offset, arrays) blocks of the zero-based indices
+                             of the same elements in each array
+    :param callable find   : called with the offset of a block and its
+                             arrays, returns the indices of the inconsistent
+                             elements relative to the offset
+    :param int max_reported: number of elements returned
+    :param int workers     : number of threads processing the blocks
+    :param int inflight    : maximum number of blocks held at once
+
+    :returns int, list: the number of inconsistent elements and the first of them
+    """
+    found = [0, []]
+    for offset, bad in parallel.map_blocks(lambda offset, arrays: (offset, find(offset, *arrays)), blocks, workers=workers, inflight=inflight):
+        _add_found(found, offset + bad, max_reported)
+    return tuple(found)
+
+
+def _face_volumes(read_faces, faces, nvolumes, step):
+    """Find the volumes on either side of a set of faces.
+
+    :param callable read_faces : see ``volume_adjacency_errors``
+    :param numpy.ndarray faces : sorted distinct face indices
+    :param int nvolumes        : number of volumes
+    :param int step            : number of volumes read at once
+
+    :returns numpy.ndarray, numpy.ndarray: the number of times each face is
+             listed, and the first two volumes listing it (-1 if none)
+    """
+    face_ids, volume_ids = [np.empty(0, dtype=np.int64)], [np.empty(0, dtype=np.int64)]
+    for start in range(0, nvolumes, step):
+        block = read_faces(start, min(start + step, nvolumes))
+        pos = np.searchsorted(faces, block)
+        hit = (block >= 0) & (np.append(faces, FILL)[pos] == block)
+        rows, cols = np.nonzero(hit)
+        face_ids.append(pos[rows, cols])
+        volume_ids.append(start + rows)
+    face_ids = np.concatenate(face_ids)
+    volume_ids = np.concatenate(volume_ids)
+    volume_ids = volume_ids[np.lexsort((volume_ids, face_ids))]
+    counts = np.bincount(face_ids, minlength=len(faces))
+    first = np.cumsum(counts) - counts
+    sides = np.full((len(faces), 2), FILL, dtype=np.int64)
+    listed = counts > 0
+    sides[listed, 0] = volume_ids[first[listed]]
+    shared = counts > 1
+    sides[shared, 1] = volume_ids[first[shared] + 1]
+    return counts, sides
+
+
+def volume_adjacency_errors(read_faces, read_neighbors, nvolumes, partition_size, *, chunk_size, max_reported=10):  # noqa: PLR0913
+    """Cross-check the faces and the neighbors of volumes.
+
+    Two volumes are neighbors if they share a face. For each partition of
+    at most ``partition_size`` volumes, the faces of the partition are
+    searched in the whole volume_face_connectivity, re-read in blocks, to
+    find the volume across each of them. The neighbors derived this way
+    must be the ones listed in volume_volume_connectivity, in any order, and
+    no face may be shared by more than two volumes.
+
+    :param callable read_faces     : called with (start, stop), returns the
+                                     zero-based face indices of these
+                                     volumes, see ``connectivity.read_rows``
+    :param callable read_neighbors : same for their neighboring volumes
+    :param int nvolumes            : number of volumes
+    :param int partition_size      : maximum number of volumes per partition
+    :param int chunk_size          : maximum number of values read at once
+    :param int max_reported        : number of elements returned for each error
+
+    :returns (int, list), (int, list): the number of faces shared by more
+             than two volumes and the first of them, and the number of
+             volumes whose listed neighbors differ from the derived ones and
+             the first of them
+    """
+    shared, mismatched = [0, []], [0, []]
+    for start in range(0, nvolumes, partition_size):
+        stop = min(start + partition_size, nvolumes)
+        faces = read_faces(start, stop)
+        listed = faces >= 0
+        wanted = np.unique(faces[listed])
+        step = max(1, chunk_size // max(1, faces.shape[1]))
+        counts, sides = _face_volumes(read_faces, wanted, nvolumes, step)
+
+        # faces of more than two volumes, reported by the partition of their first volume
+        over = (counts > 2) & (sides[:, 0] >= start) & (sides[:, 0] < stop)
+        _add_found(shared, wanted[over], max_reported)
+
+        pos = np.where(listed, np.searchsorted(wanted, faces), len(wanted))
+        counts = np.append(counts, 0)[pos]
+        sides = np.append(sides, [[FILL, FILL]], axis=0)[pos]
+        volumes = np.arange(start, stop)[:, None]
+        across = np.where(sides[..., 0] == volumes, sides[..., 1], sides[..., 0])
+        derived = np.where(counts == 2, across, FILL)
+        _add_found(mismatched, start + np.flatnonzero(_rows_differ(derived, read_neighbors(start, stop))), max_reported)
+    shared[1] = sorted(shared[1])[:max_reported]
+    return tuple(shared), tuple(mismatched)